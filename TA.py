@@ -1,6 +1,50 @@
-import tkinter as tk
-from tkinter import messagebox, filedialog
+import time
+_T_MULAI = time.perf_counter() # Untuk mengukur waktu start (opsi --timing)
+
+import calendar
+import csv
+import io
+import itertools
+import json
+import mmap
+import os
+import queue
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from collections.abc import Mapping, ItemsView
 from datetime import datetime
+from fractions import Fraction
+from functools import lru_cache
+from math import isfinite, lcm
+
+# tkinter dan NumPy diimpor saat pertama kali dibutuhkan, sehingga
+# WarisanCalculator dan mode CLI tidak membayar biaya impor GUI.
+tk = messagebox = filedialog = None
+np = None
+_numpy_dicoba = False
+
+def _import_gui():
+    """Impor tkinter (sekali) saat GUI benar-benar dibangun."""
+    global tk, messagebox, filedialog
+    if tk is None:
+        import tkinter as tk
+        from tkinter import messagebox, filedialog
+
+def _import_numpy():
+    """Impor NumPy (opsional) untuk compute_batch; None jika tidak terpasang."""
+    global np, _numpy_dicoba
+    if not _numpy_dicoba:
+        _numpy_dicoba = True
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
 
 # --- KONSTANTA TAMPILAN (MODUL 8: GUI) ---
 BG_MAIN = "#E8F5E9"
@@ -20,6 +64,52 @@ FONT_SUB = ("Times New Roman", 12, "italic")
 FONT_NORMAL = ("Arial", 11)
 FONT_SMALL = ("Arial", 10)
 SIDEBAR_WIDTH = 220
+PLAN_CACHE_SIZE = 512 # Jumlah konfigurasi ahli waris yang disimpan di cache rencana
+RIWAYAT_WINDOW = 500 # Jumlah riwayat terbaru yang tetap di RAM (backend SQLite)
+EXPORT_BLOCK = 1000 # Jumlah entri yang diformat lalu ditulis sekaligus saat export
+EXPORT_BUFFER = 1 << 20 # Ukuran buffer file export (byte)
+EXPORT_POLL_MS = 100 # Interval GUI memeriksa progres export di thread latar
+BATCH_GUI_CHUNK = 250 # Jumlah kasus per kiriman dari thread latar view Hitung Massal
+BATCH_GUI_POLL_MS = 50 # Interval GUI mengambil hasil Hitung Massal dari antrian
+BATCH_CHUNK = 10000 # Jumlah baris CSV per tugas worker (batch --workers)
+SERVICE_MAX_INFLIGHT = 256 # Batas request yang diproses bersamaan (mode serve)
+SERVICE_WORKERS = 1 # Thread perhitungan layanan; >1 berguna pada interpreter tanpa GIL
+SERVICE_MAX_LINE = 64 * 1024 # Panjang maksimum satu baris request JSON (byte)
+SERVICE_LATENCY_WINDOW = 10000 # Jumlah latensi terakhir untuk statistik p50/p99
+BENCH_THRESHOLD = 0.25 # Benchmark dianggap regresi jika lebih lambat > 25% dari baseline
+RENDER_FRAME_MS = 12 # Anggaran waktu per frame saat menyisipkan hasil ke Text (ms)
+RENDER_ANIMASI_LABEL = True # Efek ketik pada judul; False = tampil sekaligus
+DEDUP_CACHE_SIZE = 4096 # Jumlah kasus unik (inputs -> hasil) yang dipakai bersama oleh riwayat
+IMPORT_BATCH = 1000 # Jumlah entri yang disisipkan sekaligus saat import riwayat
+IMPORT_MAX_GALAT = 100 # Jumlah blok rusak yang dicatat rinci di laporan import
+PREVIEW_DEBOUNCE_MS = 250 # Jeda setelah input terakhir sebelum pratinjau dihitung ulang
+TOTAL_MAKS_RIWAYAT = 2 ** 63 - 1 # Total harta terbesar yang bisa disimpan di riwayat (kolom int64)
+ANAK_MAKS_RIWAYAT = 2 ** 32 - 1 # Jumlah anak terbesar yang bisa disimpan di riwayat (kolom uint32)
+
+# --- LABEL HASIL (dipakai bersama oleh compute dan compute_batch) ---
+LABEL_AYAH = "👨 Ayah"
+LABEL_IBU = "👩 Ibu"
+LABEL_SUAMI = "👨‍🦱 Suami"
+LABEL_ISTRI = "👩‍🦰 Istri"
+LABEL_ANAK_PEREMPUAN_1 = "👧 Anak Perempuan (1)"
+LABEL_ANAK_PEREMPUAN_TOTAL = "👧 Anak Perempuan (total)"
+LABEL_ANAK_LAKI_TOTAL = "🧒 Anak Laki-laki (total)"
+LABEL_SISA = "📦 Sisa (tidak terdistribusi)"
+LABEL_PER_ANAK_LAKI = "  └─ Anak Laki-laki"
+LABEL_PER_ANAK_PEREMPUAN = "  └─ Anak Perempuan"
+LABEL_KAKEK = "👴 Kakek"
+LABEL_NENEK = "👵 Nenek"
+LABEL_CUCU_PEREMPUAN_1 = "👧 Cucu Perempuan (1)"
+LABEL_CUCU_PEREMPUAN_TOTAL = "👧 Cucu Perempuan (total)"
+LABEL_CUCU_LAKI_TOTAL = "🧒 Cucu Laki-laki (total)"
+LABEL_PER_CUCU_PEREMPUAN = "  └─ Cucu Perempuan"
+LABEL_PER_CUCU_LAKI = "  └─ Cucu Laki-laki"
+LABEL_SAUDARA_PEREMPUAN_1 = "👩 Saudari Kandung (1)"
+LABEL_SAUDARA_PEREMPUAN_TOTAL = "👩 Saudari Kandung (total)"
+LABEL_SAUDARA_LAKI_TOTAL = "👨 Saudara Kandung (total)"
+LABEL_PER_SAUDARA_PEREMPUAN = "  └─ Saudari Kandung"
+LABEL_PER_SAUDARA_LAKI = "  └─ Saudara Kandung"
+INPUT_KEYS = ('ayah', 'ibu', 'suami', 'istri', 'anak_laki', 'anak_perempuan')
 
 # --- HELPER FUNCTIONS (MODUL 4: Function) ---
 def format_rp(amount):
@@ -32,6 +122,60 @@ def format_rp(amount):
     s = f"{a:,}"
     return f"Rp {s}"
 
+def _format_hasil(hasil):
+    """Pasangan (label, teks Rupiah) dari hasil; HasilWarisan memformat sekali per kelas."""
+    if isinstance(hasil, HasilWarisan):
+        return hasil.format_items(format_rp)
+    return ((k, format_rp(v)) for k, v in hasil.items())
+
+def _kolom_hasil(hasil):
+    """Hasil sebagai dict label -> nilai dengan bagian per anak digabung ke satu kolom."""
+    if isinstance(hasil, HasilWarisan):
+        kolom = {}
+        for label, nilai, jumlah, label_anak, per in hasil.baris:
+            kolom[label] = nilai
+            if jumlah:
+                kolom[label_anak] = per
+        return kolom
+    kolom = {}
+    for k, v in hasil.items():
+        for prefix in (LABEL_PER_ANAK_LAKI, LABEL_PER_ANAK_PEREMPUAN):
+            if k.startswith(prefix):
+                k = prefix
+        kolom[k] = v
+    return kolom
+
+def format_riwayat_label(entry):
+    """Teks satu baris Listbox riwayat (nomor = ID stabil entri)."""
+    return f"{entry['id']}. {entry['timestamp']} — {format_rp(entry['total'])}"
+
+def parse_total(teks):
+    """Total harta dari teks ("1,250,000"): bilangan bulat tetap eksak, selain itu float."""
+    teks = str(teks).replace(",", "").strip()
+    try:
+        return int(teks)
+    except ValueError:
+        return float(teks)
+
+def _cek_total(total):
+    """ValueError jika total harta bukan angka terhingga yang lebih besar dari 0."""
+    # Pengkondisian (Modul 2); int Python selalu terhingga berapa pun besarnya
+    if not isinstance(total, int) and not isfinite(total):
+        raise ValueError("Total harta harus berupa angka terhingga (bukan inf/nan).")
+    if total <= 0:
+        raise ValueError("Total harta harus lebih besar dari 0.")
+
+def _cek_riwayat(total, anak_laki, anak_perempuan):
+    """ValueError jika kasus tidak muat di kolom riwayat (int64 total, uint32 jumlah anak).
+
+    total harus sudah lolos _cek_total.
+    """
+    # Pengkondisian (Modul 2)
+    if total > TOTAL_MAKS_RIWAYAT:
+        raise ValueError(f"Total harta terlalu besar untuk disimpan di riwayat (maksimum {format_rp(TOTAL_MAKS_RIWAYAT)}).")
+    if anak_laki > ANAK_MAKS_RIWAYAT or anak_perempuan > ANAK_MAKS_RIWAYAT:
+        raise ValueError(f"Jumlah anak terlalu besar untuk disimpan di riwayat (maksimum {ANAK_MAKS_RIWAYAT:,}).")
+
 def safe_int(s, default=0):
     """Konversi string ke integer dengan aman."""
     try:
@@ -54,214 +198,2643 @@ class AhliWaris:
 
 class Ayah(AhliWaris):
     """Implementasi Ayah (bagian 1/6 jika ada anak, ashabah jika tidak ada anak)."""
-    def __init__(self): super().__init__("👨 Ayah")
-    # Polymorphism: Logika bagian Ayah
+    kunci = 'ayah'
+    def __init__(self): super().__init__(LABEL_AYAH)
+    # Polymorphism: bagian Ayah dibaca dari tabel aturan (ashabah ditangani mesin)
     def get_bagian(self, harta, ctx):
-        if not ctx.get('ayah', False) or ctx.get('jumlah_anak', 0) == 0: 
-            return 0 # Bagian residu (ashabah) ditangani di Calculator jika tidak ada anak
-        # Jika ada anak, bagian tetap Ayah adalah 1/6
-        return harta * (1/6)
+        return _bagian_dari_tabel(self.kunci, harta, ctx)
 
 class Ibu(AhliWaris):
     """Implementasi Ibu (1/6 bila ada anak; 1/3 bila tidak ada anak)."""
-    def __init__(self): super().__init__("👩 Ibu")
-    # Polymorphism: Logika bagian Ibu
+    kunci = 'ibu'
+    def __init__(self): super().__init__(LABEL_IBU)
+    # Polymorphism: bagian Ibu dibaca dari tabel aturan
+    def get_bagian(self, harta, ctx):
+        return _bagian_dari_tabel(self.kunci, harta, ctx)
+
+class Suami(AhliWaris):
+    """Suami mendapatkan 1/4 (ada anak) atau 1/2 (tidak ada anak)."""
+    kunci = 'suami'
+    def __init__(self): super().__init__(LABEL_SUAMI)
+    # Polymorphism: bagian Suami dibaca dari tabel aturan
     def get_bagian(self, harta, ctx):
-        if not ctx.get('ibu', False): return 0
+        return _bagian_dari_tabel(self.kunci, harta, ctx)
+
+class Istri(AhliWaris):
+    """Istri mendapatkan 1/8 (ada anak) atau 1/4 (tidak ada anak)."""
+    kunci = 'istri'
+    def __init__(self): super().__init__(LABEL_ISTRI)
+    # Polymorphism: bagian Istri dibaca dari tabel aturan
+    def get_bagian(self, harta, ctx):
+        return _bagian_dari_tabel(self.kunci, harta, ctx)
+
+class Anak(AhliWaris):
+    """Kelas untuk menampung jumlah anak dan menghitung unit ashabah."""
+    def __init__(self, laki=0, perempuan=0):
+        super().__init__("Anak-anak")
+        self._laki = laki
+        self._perempuan = perempuan
+    # Setter (Modul 6)
+    def set_jumlah(self, laki, perempuan):
+        self._laki = laki
+        self._perempuan = perempuan
+    def total_unit_ashabah(self): 
+        # Laki-laki = 2 unit, Perempuan = 1 unit (Modul 1: Variabel/Tipe Data)
+        return self._laki * 2 + self._perempuan * 1
+    def get_bagian(self, harta, ctx): 
+        # Method ini tidak digunakan untuk perhitungan fixed share
+        return 0 
+
+# --- MESIN ATURAN FARAIDH (BERBASIS TABEL) ---
+# Satu baris per kelas ahli waris; urutan baris = urutan bagian tetap pada hasil.
+#   jumlah : True jika bisa lebih dari satu orang (input berupa bilangan)
+#   hajb   : ahli waris yang menghalangi (mahjub jika salah satunya ada)
+#   furudh : (syarat, pecahan); syarat pertama yang terpenuhi dipakai
+#   radd   : False jika tidak ikut menerima pengembalian sisa (suami/istri)
+# Syarat berupa token dipisah spasi: "ada:x" (x ada), "banyak:x" (x >= 2),
+# nama FAKTA_TURUNAN, awalan "!" = negasi, string kosong = selalu.
+ATURAN_AHLI_WARIS = (
+    {'kunci': 'ayah', 'label': LABEL_AYAH, 'furudh': (("keturunan", Fraction(1, 6)),)},
+    {'kunci': 'kakek', 'label': LABEL_KAKEK, 'hajb': ('ayah',), 'furudh': (("keturunan", Fraction(1, 6)),)},
+    {'kunci': 'ibu', 'label': LABEL_IBU,
+     'furudh': (("keturunan", Fraction(1, 6)), ("saudara_banyak", Fraction(1, 6)), ("", Fraction(1, 3)))},
+    {'kunci': 'nenek', 'label': LABEL_NENEK, 'hajb': ('ibu',), 'furudh': (("", Fraction(1, 6)),)},
+    {'kunci': 'suami', 'label': LABEL_SUAMI, 'radd': False,
+     'furudh': (("keturunan", Fraction(1, 4)), ("", Fraction(1, 2)))},
+    {'kunci': 'istri', 'label': LABEL_ISTRI, 'radd': False,
+     'furudh': (("keturunan", Fraction(1, 8)), ("", Fraction(1, 4)))},
+    {'kunci': 'anak_perempuan', 'jumlah': True, 'label': LABEL_ANAK_PEREMPUAN_TOTAL,
+     'label_satu': LABEL_ANAK_PEREMPUAN_1, 'label_per': LABEL_PER_ANAK_PEREMPUAN,
+     'furudh': (("!ada:anak_laki !banyak:anak_perempuan", Fraction(1, 2)), ("!ada:anak_laki", Fraction(2, 3)))},
+    {'kunci': 'anak_laki', 'jumlah': True, 'label': LABEL_ANAK_LAKI_TOTAL, 'label_per': LABEL_PER_ANAK_LAKI},
+    {'kunci': 'cucu_perempuan', 'jumlah': True, 'label': LABEL_CUCU_PEREMPUAN_TOTAL,
+     'label_satu': LABEL_CUCU_PEREMPUAN_1, 'label_per': LABEL_PER_CUCU_PEREMPUAN, 'hajb': ('anak_laki',),
+     'furudh': (("!ada:cucu_laki !ada:anak_perempuan !banyak:cucu_perempuan", Fraction(1, 2)),
+                ("!ada:cucu_laki !ada:anak_perempuan", Fraction(2, 3)),
+                ("!ada:cucu_laki !banyak:anak_perempuan", Fraction(1, 6)))},
+    {'kunci': 'cucu_laki', 'jumlah': True, 'label': LABEL_CUCU_LAKI_TOTAL, 'label_per': LABEL_PER_CUCU_LAKI,
+     'hajb': ('anak_laki',)},
+    {'kunci': 'saudara_perempuan', 'jumlah': True, 'label': LABEL_SAUDARA_PEREMPUAN_TOTAL,
+     'label_satu': LABEL_SAUDARA_PEREMPUAN_1, 'label_per': LABEL_PER_SAUDARA_PEREMPUAN,
+     'hajb': ('ayah', 'kakek', 'anak_laki', 'cucu_laki'),
+     'furudh': (("!keturunan !ada:saudara_laki !banyak:saudara_perempuan", Fraction(1, 2)),
+                ("!keturunan !ada:saudara_laki", Fraction(2, 3)))},
+    {'kunci': 'saudara_laki', 'jumlah': True, 'label': LABEL_SAUDARA_LAKI_TOTAL, 'label_per': LABEL_PER_SAUDARA_LAKI,
+     'hajb': ('ayah', 'kakek', 'anak_laki', 'cucu_laki')},
+)
+
+# Ashabah: kelompok pertama yang syaratnya terpenuhi mengambil seluruh sisa,
+# dibagi menurut bobot x jumlah orang (laki-laki 2 : perempuan 1)
+KELOMPOK_ASHABAH = (
+    {'syarat': "ada:anak_laki", 'anggota': (('anak_laki', 2), ('anak_perempuan', 1))},
+    {'syarat': "ada:cucu_laki", 'anggota': (('cucu_laki', 2), ('cucu_perempuan', 1))},
+    {'syarat': "ada:ayah !keturunan", 'anggota': (('ayah', 1),)},
+    {'syarat': "ada:kakek !keturunan", 'anggota': (('kakek', 1),)},
+    {'syarat': "ada:saudara_laki", 'anggota': (('saudara_laki', 2), ('saudara_perempuan', 1))},
+    # Saudari bersama keturunan perempuan menjadi ashabah ma'al ghair
+    {'syarat': "ada:saudara_perempuan keturunan_perempuan", 'anggota': (('saudara_perempuan', 1),)},
+)
+
+# Fakta turunan: jumlah orang (sebelum hajb) pada anggota >= minimum
+FAKTA_TURUNAN = {
+    'keturunan': (('anak_laki', 'anak_perempuan', 'cucu_laki', 'cucu_perempuan'), 1),
+    'keturunan_perempuan': (('anak_perempuan', 'cucu_perempuan'), 1),
+    'saudara_banyak': (('saudara_laki', 'saudara_perempuan'), 2),
+}
+
+class MesinFaraidh:
+    """Evaluator tabel aturan Faraidh yang dikompilasi sekali menjadi bitmask.
+
+    Setiap ahli waris mendapat dua bit fakta ("ada" dan "banyak"), fakta
+    turunan mendapat satu bit, dan setiap syarat menjadi pasangan mask
+    (wajib, larang). Evaluasi satu himpunan ahli waris adalah satu lintasan:
+    hitung mask, terapkan hajb, ambil struktur bagian tetap + Awl + radd
+    dari cache per mask, lalu bagi sisa ke kelompok ashabah.
+    """
+    def __init__(self, aturan=ATURAN_AHLI_WARIS, kelompok=KELOMPOK_ASHABAH, fakta=FAKTA_TURUNAN):
+        self.kunci = tuple(a['kunci'] for a in aturan)
+        self._indeks = {k: i for i, k in enumerate(self.kunci)}
+        n = len(self.kunci)
+        self._bit_fakta = {}
+        for i, k in enumerate(self.kunci):
+            self._bit_fakta[f"ada:{k}"] = 1 << (2 * i)
+            self._bit_fakta[f"banyak:{k}"] = 1 << (2 * i + 1)
+        # Fakta turunan dihitung dari bit: minimum 1 = ada anggota; minimum 2 =
+        # ada anggota "banyak" atau sedikitnya dua anggota berbeda yang ada
+        self._fakta = []
+        for j, (nama, (anggota, minimum)) in enumerate(fakta.items()):
+            self._bit_fakta[nama] = 1 << (2 * n + j)
+            ada = banyak = 0
+            for k in anggota:
+                ada |= self._bit_fakta[f"ada:{k}"]
+                banyak |= self._bit_fakta[f"banyak:{k}"]
+            self._fakta.append((1 << (2 * n + j), ada, banyak, minimum))
+
+        self._jenis_jumlah = tuple(bool(a.get('jumlah')) for a in aturan)
+        self._label = tuple(a['label'] for a in aturan)
+        self._label_satu = tuple(a.get('label_satu', a['label']) for a in aturan)
+        self._label_per = tuple(a.get('label_per') for a in aturan)
+        self._radd = tuple(a.get('radd', True) for a in aturan)
+        self._hajb = tuple(self._mask_ada(a.get('hajb', ())) for a in aturan)
+        # Hanya ahli waris yang punya hajb yang perlu diperiksa: (indeks, bit ada, mask penghalang)
+        self._cek_hajb = tuple((i, 1 << (2 * i), h) for i, h in enumerate(self._hajb) if h)
+        self._furudh = tuple(tuple(self._syarat(s) + (pecahan,) for s, pecahan in a.get('furudh', ()))
+                             for a in aturan)
+        self._kelompok = tuple(self._syarat(g['syarat']) + (tuple((self._indeks[k], b) for k, b in g['anggota']),)
+                               for g in kelompok)
+        # (mask, radd) -> (baris tetap, sisa, anggota ashabah); dipakai bersama semua thread,
+        # get/set dict atomik dan struktur yang sama boleh tersusun dua kali
+        self._struktur = {}
+        self._posisi_input = tuple(self._indeks[k] for k in INPUT_KEYS)
+
+    # --- Kompilasi tabel ---
+    def _mask_ada(self, kunci):
+        mask = 0
+        for k in kunci:
+            mask |= self._bit_fakta[f"ada:{k}"]
+        return mask
+
+    def _syarat(self, teks):
+        """Token syarat -> (mask wajib, mask larang)."""
+        wajib = larang = 0
+        for token in teks.split():
+            if token.startswith("!"):
+                larang |= self._bit_fakta[token[1:]]
+            else:
+                wajib |= self._bit_fakta[token]
+        return wajib, larang
+
+    # --- Evaluasi ---
+    def vektor_input(self, ayah, ibu, suami, istri, anak_laki, anak_perempuan):
+        """vektor() untuk enam input lama (sudah dinormalisasi bool/int oleh get_plan)."""
+        jumlah = [0] * len(self.kunci)
+        for i, v in zip(self._posisi_input, (ayah, ibu, suami, istri, anak_laki, anak_perempuan)):
+            jumlah[i] = int(v)
+        if anak_laki < 0 or anak_perempuan < 0:
+            raise ValueError("Jumlah ahli waris tidak boleh negatif.")
+        return tuple(jumlah)
+
+    def vektor(self, ahli_waris):
+        """Tuple jumlah orang per ahli waris (urutan tabel) dari dict kunci -> bool/int."""
+        jumlah = [0] * len(self.kunci)
+        for k, v in ahli_waris.items():
+            i = self._indeks.get(k)
+            if i is None:
+                raise ValueError(f"Ahli waris tidak dikenal: {k}")
+            v = int(v)
+            if v < 0:
+                raise ValueError("Jumlah ahli waris tidak boleh negatif.")
+            jumlah[i] = v if self._jenis_jumlah[i] else min(v, 1)
+        return tuple(jumlah)
+
+    def _mask(self, jumlah):
+        """Mask fakta: bit ada/banyak dari jumlah efektif (setelah hajb) + fakta turunan."""
+        mask = 0
+        for i, n in enumerate(jumlah):
+            if n:
+                mask |= (3 if n > 1 else 1) << (2 * i)
+        # Fakta turunan memakai jumlah sebelum hajb (mis. saudara yang mahjub tetap mengurangi bagian ibu)
+        turunan = 0
+        for bit, ada, banyak, minimum in self._fakta:
+            if mask & ada and (minimum == 1 or mask & banyak or (mask & ada).bit_count() >= 2):
+                turunan |= bit
+        terhalang = [i for i, bit_ada, h in self._cek_hajb if mask & bit_ada and mask & h]
+        if terhalang:
+            efektif = list(jumlah)
+            for i in terhalang:
+                efektif[i] = 0
+                mask &= ~(3 << (2 * i))
+            return mask | turunan, tuple(efektif)
+        return mask | turunan, jumlah
+
+    def furudh(self, kunci, jumlah):
+        """Bagian tetap (sebelum Awl) satu ahli waris; 0 jika tidak punya furudh/mahjub."""
+        mask, efektif = self._mask(jumlah)
+        i = self._indeks[kunci]
+        if not efektif[i]:
+            return 0
+        for wajib, larang, pecahan in self._furudh[i]:
+            if mask & wajib == wajib and not mask & larang:
+                return pecahan
+        return 0
+
+    def evaluasi(self, jumlah, radd=False, pakai_cache=True):
+        """Baris (label, pecahan, jumlah_orang, label_per) untuk satu himpunan ahli waris."""
+        mask, efektif = self._mask(jumlah)
+        struktur = self._struktur.get((mask, radd)) if pakai_cache else None
+        if struktur is None:
+            struktur = self._susun_struktur(mask, efektif, radd)
+            if pakai_cache:
+                self._struktur[(mask, radd)] = struktur
+        tetap, sisa, anggota = struktur
+        if not anggota:
+            return tetap
+
+        # Pembagian Residu (Ashabah) menurut bobot x jumlah orang (Modul 3)
+        baris = list(tetap)
+        units = sum(bobot * efektif[i] for i, bobot, _, _, _ in anggota)
+        for i, bobot, label, label_per, posisi in anggota:
+            n = efektif[i]
+            if not n:
+                continue
+            bagian = sisa * Fraction(bobot * n, units)
+            if posisi is None:
+                baris.append((label, bagian, n if label_per else 0, label_per))
+            else:
+                # Ahli waris yang juga punya bagian tetap (mis. Ayah): digabung ke barisnya
+                baris[posisi] = (label, baris[posisi][1] + bagian, n if label_per else 0, label_per)
+        return tuple(baris)
+
+    def _susun_struktur(self, mask, efektif, radd):
+        """Bagian tetap, Awl, dan pilihan kelompok ashabah/radd; hanya bergantung pada mask."""
+        harta = Fraction(1)
+        tetap = {}
+        # 1. Bagian tetap (Ashabul Furudh) - syarat pertama yang cocok (Modul 2)
+        for i, aturan_furudh in enumerate(self._furudh):
+            if not efektif[i]:
+                continue
+            for wajib, larang, pecahan in aturan_furudh:
+                if mask & wajib == wajib and not mask & larang:
+                    tetap[i] = harta * pecahan
+                    break
+        total_fixed = sum(tetap.values())
+
+        # 2. Aturan Awl: bagian tetap melebihi harta -> diperkecil proporsional
+        if total_fixed > harta:
+            scale = harta / total_fixed
+            # Perulangan untuk Scale down (Modul 3)
+            for i in tetap:
+                tetap[i] = tetap[i] * scale
+            total_fixed = sum(tetap.values())
+        sisa = harta - total_fixed
+
+        # 3. Kelompok ashabah pertama yang syaratnya terpenuhi
+        anggota = ()
+        if sisa > 0:
+            for wajib, larang, calon in self._kelompok:
+                if mask & wajib == wajib and not mask & larang:
+                    anggota = calon
+                    break
+
+        # 4. Tanpa ashabah: radd ke ashabul furudh (selain suami/istri) atau sisa
+        if sisa > 0 and not anggota and radd:
+            penerima = [i for i in tetap if self._radd[i]]
+            dasar = sum(tetap[i] for i in penerima)
+            if dasar:
+                for i in penerima:
+                    tetap[i] += sisa * tetap[i] / dasar
+                sisa = Fraction(0)
+
+        baris = [((self._label_satu[i] if not mask & (2 << (2 * i)) else self._label[i]), pecahan, 0, None)
+                 for i, pecahan in tetap.items()]
+        if sisa > 0 and not anggota:
+            baris.append((LABEL_SISA, sisa, 0, None))
+        # Anggota ashabah beserta posisi baris tetapnya (untuk digabung) bila ada
+        posisi = {i: p for p, i in enumerate(tetap)}
+        anggota = tuple((i, bobot, self._label[i], self._label_per[i], posisi.get(i)) for i, bobot in anggota)
+        return tuple(baris), sisa, anggota
+
+MESIN_FARAIDH = MesinFaraidh()
+
+def _bagian_dari_tabel(kunci, harta, ctx):
+    """Adapter get_bagian lama: ctx (flag ahli waris + jumlah_anak) -> bagian tetap dari tabel."""
+    ahli_waris = {k: v for k, v in ctx.items() if k in MESIN_FARAIDH._indeks}
+    if 'jumlah_anak' in ctx and not ('anak_laki' in ctx or 'anak_perempuan' in ctx):
+        # ctx lama hanya tahu jumlah anak; cukup untuk syarat "keturunan"
+        ahli_waris['anak_laki'] = ctx['jumlah_anak']
+    pecahan = MESIN_FARAIDH.furudh(kunci, MESIN_FARAIDH.vektor(ahli_waris))
+    return harta * pecahan if pecahan else 0
+
+# --- KELAS HASIL PERHITUNGAN ---
+class HasilWarisan(Mapping):
+    """Hasil perhitungan yang ringkas: satu nilai per kelas ahli waris.
+
+    Baris per anak ("  └─ Anak Laki-laki 1", ...) tidak disimpan, tetapi
+    dibangkitkan saat diiterasi. Akses seperti dict (hasil[key], .items(),
+    .get(), len) tetap berlaku untuk pemanggil lama.
+
+    nilai_per_anak adalah bagian dasar (nilai // jumlah_anak); sisa rupiah
+    pembagian diberikan satu per satu ke anak-anak pertama (largest
+    remainder dengan sisa yang sama), sehingga jumlah baris per anak tepat
+    sama dengan nilai kelasnya.
+    """
+    __slots__ = ('_baris',)
+
+    def __init__(self, baris=()):
+        # Tiap baris: (label, nilai, jumlah_anak, label_anak, nilai_per_anak)
+        self._baris = tuple(baris)
+
+    @staticmethod
+    def _lebih(nilai, jumlah, per):
+        """Banyaknya anak pertama yang menerima per + 1 (sisa rupiah kelas)."""
+        if type(nilai) is not int or type(per) is not int:
+            return 0
+        lebih = nilai - per * jumlah
+        return lebih if 0 < lebih < jumlah else 0
+
+    @property
+    def baris(self):
+        return self._baris
+
+    def __getitem__(self, key):
+        for label, nilai, jumlah, label_anak, per in self._baris:
+            if key == label:
+                return nilai
+            # Kunci per anak: "<label_anak> <i>" dengan 1 <= i <= jumlah
+            if jumlah and key.startswith(label_anak):
+                nomor = key[len(label_anak):]
+                if nomor[:1] == " " and nomor[1:].isdigit() and 1 <= int(nomor[1:]) <= jumlah:
+                    return per + 1 if int(nomor[1:]) <= self._lebih(nilai, jumlah, per) else per
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key, _ in self._iter_items():
+            yield key
+
+    def __len__(self):
+        return sum(1 + jumlah for _, _, jumlah, _, _ in self._baris)
+
+    def items(self):
+        return _HasilItems(self)
+
+    def _iter_items(self):
+        # Perulangan untuk ekspansi per anak (Modul 3)
+        for label, nilai, jumlah, label_anak, per in self._baris:
+            yield label, nilai
+            lebih = self._lebih(nilai, jumlah, per) if jumlah else 0
+            for i in range(1, jumlah + 1):
+                yield f"{label_anak} {i}", per + 1 if i <= lebih else per
+
+    def format_items(self, fmt):
+        """Seperti items(), tetapi nilai diformat dengan fmt sekali per kelas ahli waris."""
+        for label, nilai, jumlah, label_anak, per in self._baris:
+            yield label, fmt(nilai)
+            if jumlah:
+                lebih = self._lebih(nilai, jumlah, per)
+                per_teks = fmt(per)
+                lebih_teks = fmt(per + 1) if lebih else per_teks
+                for i in range(1, jumlah + 1):
+                    yield f"{label_anak} {i}", lebih_teks if i <= lebih else per_teks
+
+    def __repr__(self):
+        return f"HasilWarisan({dict(self._iter_items())!r})"
+
+class _HasilItems(ItemsView):
+    """ItemsView yang mengiterasi baris secara langsung (tanpa lookup per kunci)."""
+    __slots__ = ()
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+class RencanaWarisan(tuple):
+    """Rencana pembagian: tuple baris (label, pecahan, jumlah, label_anak, pecahan_per).
+
+    Pecahan disimpan eksak (Fraction). Untuk alokasi rupiah, semua pecahan
+    juga dinyatakan sebagai bilangan bulat `bobot` atas satu `penyebut`
+    bersama, sehingga pembagian cukup memakai aritmetika int.
+    """
+    def __new__(cls, baris):
+        self = super().__new__(cls, baris)
+        rasio = [pecahan.as_integer_ratio() for _, pecahan, _, _, _ in self]
+        self.penyebut = penyebut = lcm(*[d for _, d in rasio]) if rasio else 1
+        self.bobot = tuple([n * (penyebut // d) for n, d in rasio])
+        self.total_bobot = sum(self.bobot)
+        return self
+
+# --- INSTRUMENTASI (OPT-IN) ---
+class Instrumentasi:
+    """Penghitung dan histogram latensi per fase perhitungan/export.
+
+    Dipasang lewat WarisanCalculator.enable_instrumentasi(); selama tidak
+    dipasang, compute dan export hanya membayar satu pengecekan None.
+    Aman dipanggil dari beberapa thread sekaligus.
+    """
+    # Batas atas bucket histogram (mikrodetik); bucket terakhir = lebih dari itu
+    BATAS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000, 100000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._fase = {} # nama -> [jumlah, total_detik, maks_detik, bucket]
+
+    def catat(self, nama, detik):
+        bucket = bisect_left(self.BATAS_US, detik * 1e6)
+        with self._lock:
+            data = self._fase.get(nama)
+            if data is None:
+                data = self._fase[nama] = [0, 0.0, 0.0, [0] * (len(self.BATAS_US) + 1)]
+            data[0] += 1
+            data[1] += detik
+            if detik > data[2]:
+                data[2] = detik
+            data[3][bucket] += 1
+
+    def stats(self):
+        """dict nama fase -> jumlah, total_ms, rata_us, maks_us, histogram {"<=N µs": jumlah}."""
+        label_bucket = [f"<={b} µs" for b in self.BATAS_US] + [f">{self.BATAS_US[-1]} µs"]
+        hasil = {}
+        with self._lock:
+            fase = [(nama, data[0], data[1], data[2], list(data[3])) for nama, data in self._fase.items()]
+        for nama, jumlah, total, maks, bucket in fase:
+            hasil[nama] = {'jumlah': jumlah, 'total_ms': total * 1000, 'rata_us': total / jumlah * 1e6,
+                           'maks_us': maks * 1e6,
+                           'histogram': {lb: n for lb, n in zip(label_bucket, bucket) if n}}
+        return hasil
+
+# --- PENYIMPANAN HASIL UNIK (DEDUP) ---
+class HasilUnik:
+    """Penyimpanan berkunci hash untuk rekaman unik (inputs -> hasil).
+
+    Kasus yang sama persis (total dan konfigurasi ahli waris) memakai dict
+    inputs dan HasilWarisan yang sama, sehingga entri riwayat yang berulang
+    hanya berisi referensi. Penghitung hit/miss menunjukkan seberapa
+    berulang beban kerja. Rekaman yang paling lama tidak dipakai dibuang
+    jika melebihi maxsize (riwayat tetap memegang referensinya sendiri).
+
+    Aman dipakai bersama oleh beberapa thread: lock hanya dipegang selama
+    operasi dict, buat() dijalankan di luar lock.
+    """
+    def __init__(self, maxsize=DEDUP_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ambil(self, kunci, buat):
+        """Rekaman untuk kunci; buat() dipanggil hanya jika belum tersimpan."""
+        with self._lock:
+            rekam = self._data.pop(kunci, None)
+            if rekam is not None:
+                self.hits += 1
+                self._data[kunci] = rekam # Pindah ke posisi "terbaru"
+                return rekam
+            self.misses += 1
+        rekam = buat()
+        if self.maxsize <= 0:
+            return rekam
+        with self._lock:
+            # Thread lain bisa lebih dulu menyimpan kasus yang sama: pakai rekamannya
+            rekam = self._data.pop(kunci, rekam)
+            if len(self._data) >= self.maxsize:
+                del self._data[next(iter(self._data))]
+            self._data[kunci] = rekam
+        return rekam
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'currsize': len(self._data), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+def _intern_baris(baris):
+    """Baris hasil dengan label di-intern (dipakai saat memuat dari JSON/SQLite)."""
+    intern = sys.intern
+    return tuple((intern(label), nilai, jumlah, intern(label_anak) if label_anak else label_anak, per)
+                 for label, nilai, jumlah, label_anak, per in baris)
+
+# --- PENYIMPANAN RIWAYAT (BACKEND) ---
+def _konfigurasi(inputs):
+    """Kunci konfigurasi ahli waris dari dict inputs (untuk indeks & filter)."""
+    return tuple(inputs[k] for k in INPUT_KEYS)
+
+class _SnapshotRiwayat:
+    """Salinan beku daftar entri riwayat, aman dibaca dari thread lain (export)."""
+    def __init__(self, entries, ids=None):
+        self._entries = entries
+        self._ids = ids if ids is not None else [e.get('id', 0) for e in entries]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __getitem__(self, idx):
+        return self._entries[idx]
+
+    def page(self, start, stop):
+        return self._entries[max(start, 0):stop]
+
+    def posisi_setelah(self, entry_id):
+        return bisect_right(self._ids, entry_id)
+
+class _SnapshotSQLite:
+    """Snapshot riwayat SQLite untuk export di thread latar.
+
+    Memakai koneksi tersendiri dengan transaksi baca yang dibuka saat
+    snapshot diambil; dengan journal WAL, perubahan riwayat sesudahnya
+    tidak terlihat dan tidak terhalang oleh export yang berjalan.
+    """
+    def __init__(self, path):
+        self.path = path
+        # Dibaca oleh thread export; dibuat & ditutup bisa dari thread lain
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("BEGIN")
+        self._jumlah, id_maks = self._conn.execute("SELECT COUNT(*), MAX(id) FROM riwayat").fetchone()
+        self._id_maks = id_maks or 0
+        self._lanjut = (0, 0) # (posisi, id terakhir) untuk paging berurutan tanpa OFFSET
+
+    def __len__(self):
+        return self._jumlah
+
+    def page(self, start, stop):
+        start, stop = max(start, 0), min(stop, self._jumlah)
+        if start >= stop:
+            return []
+        conn = self._conn
+        pos, id_terakhir = self._lanjut
+        if start == pos:
+            rows = conn.execute(f"SELECT {RiwayatSQLite.KOLOM} FROM riwayat WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                                (id_terakhir, self._id_maks, stop - start)).fetchall()
+        else:
+            rows = conn.execute(f"SELECT {RiwayatSQLite.KOLOM} FROM riwayat WHERE id <= ? ORDER BY id LIMIT ? OFFSET ?",
+                                (self._id_maks, stop - start, start)).fetchall()
+        if rows:
+            self._lanjut = (start + len(rows), rows[-1][0])
+        return [RiwayatSQLite._ke_entry(r) for r in rows]
+
+    def posisi_setelah(self, entry_id):
+        return self._conn.execute("SELECT COUNT(*) FROM riwayat WHERE id <= ?",
+                                  (min(entry_id, self._id_maks),)).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+class _DaftarTerurut:
+    """List terurut berblok untuk indeks riwayat.
+
+    Isi disimpan dalam blok-blok list terurut (paling banyak 2 x BLOK
+    elemen) dan Fenwick tree atas ukuran blok. Sisip, hapus, bisect dan
+    akses per posisi O(log n) ditambah geser di dalam satu blok yang
+    ukurannya dibatasi BLOK, bukan geser seluruh list seperti insort/del.
+    Blok dipecah/digabung saat terlalu besar/kecil (Fenwick dibangun ulang,
+    O(n / BLOK), jarang terjadi).
+    """
+    BLOK = 512
+
+    def __init__(self):
+        self._blok = []
+        self._maks = [] # Elemen terbesar tiap blok (untuk bisect blok)
+        self._fen = [0]
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for blok in self._blok:
+            yield from blok
+
+    def clear(self):
+        self._blok, self._maks, self._fen, self._n = [], [], [0], 0
+
+    # --- Fenwick tree atas ukuran blok ---
+    def _bangun_fenwick(self):
+        k = len(self._blok)
+        fen = [0] * (k + 1)
+        for i, blok in enumerate(self._blok, 1):
+            fen[i] += len(blok)
+            j = i + (i & -i)
+            if j <= k:
+                fen[j] += fen[i]
+        self._fen = fen
+
+    def _fen_tambah(self, b, delta):
+        fen = self._fen
+        i = b + 1
+        while i < len(fen):
+            fen[i] += delta
+            i += i & -i
+
+    def _awal_blok(self, b):
+        """Jumlah elemen pada blok-blok sebelum blok b."""
+        fen, i, hasil = self._fen, b, 0
+        while i:
+            hasil += fen[i]
+            i -= i & -i
+        return hasil
+
+    def _lokasi(self, pos):
+        """(blok, offset) untuk posisi 0 <= pos < len (turun di Fenwick tree)."""
+        fen = self._fen
+        b, langkah = 0, 1 << (len(fen) - 1).bit_length()
+        while langkah:
+            j = b + langkah
+            if j < len(fen) and fen[j] <= pos:
+                b = j
+                pos -= fen[j]
+            langkah >>= 1
+        return b, pos
+
+    # --- Perubahan ---
+    def add(self, x):
+        if not self._blok:
+            self._blok.append([x])
+            self._maks.append(x)
+            self._bangun_fenwick()
+            self._n = 1
+            return
+        b = bisect_left(self._maks, x)
+        if b == len(self._maks):
+            b -= 1
+        blok = self._blok[b]
+        insort(blok, x)
+        self._maks[b] = blok[-1]
+        self._n += 1
+        if len(blok) > 2 * self.BLOK:
+            self._blok[b:b + 1] = [blok[:self.BLOK], blok[self.BLOK:]]
+            self._maks[b:b + 1] = [blok[self.BLOK - 1], blok[-1]]
+            self._bangun_fenwick()
+        else:
+            self._fen_tambah(b, 1)
+
+    def remove(self, x):
+        b = bisect_left(self._maks, x)
+        blok = self._blok[b] if b < len(self._blok) else ()
+        i = bisect_left(blok, x)
+        if i == len(blok) or blok[i] != x:
+            raise ValueError(f"{x!r} tidak ada")
+        del blok[i]
+        self._n -= 1
+        if len(blok) < self.BLOK // 4 and len(self._blok) > 1:
+            # Blok terlalu kecil: gabung dengan tetangga (dipecah lagi jika kebesaran)
+            a = b - 1 if b else b
+            gabung = self._blok[a] + self._blok[a + 1]
+            bagian = [gabung] if len(gabung) <= 2 * self.BLOK else [gabung[:self.BLOK], gabung[self.BLOK:]]
+            self._blok[a:a + 2] = bagian
+            self._maks[a:a + 2] = [p[-1] for p in bagian]
+            self._bangun_fenwick()
+        elif not blok:
+            del self._blok[b], self._maks[b]
+            self._bangun_fenwick()
+        else:
+            self._maks[b] = blok[-1]
+            self._fen_tambah(b, -1)
+
+    # --- Pencarian ---
+    def bisect_left(self, x):
+        b = bisect_left(self._maks, x)
+        if b == len(self._maks):
+            return self._n
+        return self._awal_blok(b) + bisect_left(self._blok[b], x)
+
+    def bisect_right(self, x):
+        b = bisect_right(self._maks, x)
+        if b == len(self._maks):
+            return self._n
+        return self._awal_blok(b) + bisect_right(self._blok[b], x)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._n)
+            if step != 1:
+                return list(self)[idx]
+            return self.irisan(start, stop)
+        if idx < 0:
+            idx += self._n
+        if not 0 <= idx < self._n:
+            raise IndexError("indeks di luar jangkauan")
+        b, i = self._lokasi(idx)
+        return self._blok[b][i]
+
+    def irisan(self, start, stop):
+        """Elemen pada posisi [start, stop) tanpa menyalin blok lain."""
+        hasil = []
+        if start >= stop:
+            return hasil
+        b, i = self._lokasi(start)
+        sisa = stop - start
+        while sisa > 0:
+            potong = self._blok[b][i:i + sisa]
+            hasil.extend(potong)
+            sisa -= len(potong)
+            b, i = b + 1, 0
+        return hasil
+
+class RiwayatMemori:
+    """Riwayat di RAM dengan ID stabil dan indeks sekunder.
+
+    Berperilaku seperti list (len, indeks, slice, iterasi, append, pop,
+    clear). Setiap entri mendapat entry['id'] yang tidak pernah dipakai
+    ulang. Indeks terurut berblok (_DaftarTerurut) untuk id, timestamp dan
+    total, serta dict untuk konfigurasi ahli waris: append, hapus-per-ID,
+    akses per posisi dan batas rentang cari() masing-masing O(log n).
+
+    versi bertambah tepat 1 untuk setiap entri yang ditambahkan di akhir dan
+    lebih dari itu untuk perubahan lain (hapus, sisip di tengah, clear):
+    jika selisih versi sama dengan selisih len, perubahannya hanya
+    penambahan di akhir. Atribut yang sama dimiliki backend riwayat lain.
+    """
+    def __init__(self):
+        self._next_id = 1
+        self.versi = 0
+        self._ids = _DaftarTerurut() # Urut naik = urutan riwayat
+        self._by_id = {}
+        self._idx_waktu = _DaftarTerurut() # (timestamp, id) terurut
+        self._idx_total = _DaftarTerurut() # (total, id) terurut
+        self._idx_konfig = {} # konfigurasi -> set(id)
+
+    # --- Protokol list ---
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        by_id = self._by_id
+        return (by_id[i] for i in list(self._ids))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._by_id[i] for i in self._ids[idx]]
+        return self._by_id[self._ids[idx]]
+
+    def page(self, start, stop):
+        return self[max(start, 0):stop]
+
+    def snapshot(self):
+        """Salinan beku urutan entri saat ini (untuk export di thread latar)."""
+        ids = list(self._ids)
+        by_id = self._by_id
+        return _SnapshotRiwayat([by_id[i] for i in ids], ids)
+
+    def append(self, entry):
+        if entry.get('id') is None or entry['id'] in self._by_id:
+            entry['id'] = self._next_id
+        self._next_id = max(self._next_id, entry['id'] + 1)
+        i = entry['id']
+        self.versi += 1 if not self._ids or i > self._ids[-1] else 2
+        self._ids.add(i)
+        self._by_id[i] = entry
+        self._idx_waktu.add((entry['timestamp'], i))
+        self._idx_total.add((entry['total'], i))
+        self._idx_konfig.setdefault(_konfigurasi(entry['inputs']), set()).add(i)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def pop(self, idx=-1):
+        return self.delete_id(self._ids[idx])
+
+    def clear(self):
+        # ID tidak direset agar tetap unik sepanjang sesi
+        self._ids.clear(); self._by_id.clear()
+        self.versi += 1
+        self._idx_waktu.clear(); self._idx_total.clear(); self._idx_konfig.clear()
+
+    # --- Akses berdasarkan ID ---
+    def get_id(self, entry_id):
+        return self._by_id[entry_id]
+
+    def index_of_id(self, entry_id):
+        """Posisi entri dengan ID tertentu (pencarian biner)."""
+        if entry_id not in self._by_id:
+            raise KeyError(entry_id)
+        return self._ids.bisect_left(entry_id)
+
+    def posisi_setelah(self, entry_id):
+        """Jumlah entri dengan id <= entry_id (posisi entri pertama sesudahnya)."""
+        return self._ids.bisect_right(entry_id)
+
+    def delete_id(self, entry_id):
+        """Hapus entri berdasarkan ID; O(log n) pada setiap indeks."""
+        entry = self._by_id.pop(entry_id)
+        self.versi += 1
+        self._ids.remove(entry_id)
+        for indeks, kunci in ((self._idx_waktu, entry['timestamp']), (self._idx_total, entry['total'])):
+            indeks.remove((kunci, entry_id))
+        konfig = _konfigurasi(entry['inputs'])
+        ids = self._idx_konfig[konfig]
+        ids.discard(entry_id)
+        if not ids:
+            del self._idx_konfig[konfig]
+        return entry
+
+    # --- Query berindeks ---
+    def cari(self, waktu_dari=None, waktu_sampai=None, total_min=None, total_max=None, konfigurasi=None):
+        """Daftar entri (urut riwayat) yang memenuhi semua filter yang diberikan.
+
+        waktu_dari/waktu_sampai dibandingkan sebagai string timestamp
+        ("YYYY-MM-DD HH:MM:SS", prefiks tanggal juga boleh), total_min/max
+        inklusif, konfigurasi berupa tuple nilai INPUT_KEYS.
+        """
+        kandidat = []
+        if waktu_dari is not None or waktu_sampai is not None:
+            kandidat.append(self._rentang(self._idx_waktu, waktu_dari, waktu_sampai))
+        if total_min is not None or total_max is not None:
+            kandidat.append(self._rentang(self._idx_total, total_min, total_max))
+        if konfigurasi is not None:
+            kandidat.append(self._idx_konfig.get(tuple(konfigurasi), set()))
+        if not kandidat:
+            return list(self)
+        # Irisan dimulai dari himpunan terkecil (Modul 3)
+        kandidat.sort(key=len)
+        hasil = set(kandidat[0])
+        for k in kandidat[1:]:
+            hasil.intersection_update(k)
+        return [self._by_id[i] for i in sorted(hasil)]
+
+    @staticmethod
+    def _rentang(indeks, bawah, atas):
+        """ID pada indeks terurut dengan bawah <= kunci <= atas (batas None = terbuka)."""
+        lo = 0 if bawah is None else indeks.bisect_left((bawah,))
+        if atas is None:
+            hi = len(indeks)
+        elif isinstance(atas, str):
+            # Batas atas tanggal: "2024-05-01" mencakup seluruh hari itu
+            hi = indeks.bisect_right((atas + "\uffff",))
+        else:
+            hi = indeks.bisect_right((atas, float("inf")))
+        return {i for _, i in indeks.irisan(lo, hi)}
+
+class RiwayatKolom:
+    """Riwayat di RAM dalam bentuk kolom (array paralel), hemat memori.
+
+    Tiap entri hanya menempati satu slot di beberapa array bertipe tetap:
+    id, waktu (epoch detik), total, bitmask ahli waris, jumlah anak, dan
+    kolom bagian per kelas ahli waris (-1 = tidak ada). Dict entri,
+    timestamp teks dan HasilWarisan baru dibentuk saat entri dibaca untuk
+    ditampilkan/diexport. API (termasuk versi) sama dengan RiwayatMemori.
+    """
+    FORMAT_WAKTU = "%Y-%m-%d %H:%M:%S"
+    # Urutan kolom bagian = urutan baris hasil _compile_plan
+    LABEL_BAGIAN = (Ayah().get_nama(), Ibu().get_nama(), Suami().get_nama(), Istri().get_nama(),
+                    LABEL_ANAK_PEREMPUAN_1, LABEL_ANAK_LAKI_TOTAL, LABEL_ANAK_PEREMPUAN_TOTAL, LABEL_SISA)
+    _URUTAN = tuple(range(len(LABEL_BAGIAN)))
+    _URUTAN_TANPA_ANAK = _URUTAN[1:-1] + (0, _URUTAN[-1])
+    _kolom_bagian = {label: c for c, label in enumerate(LABEL_BAGIAN)}
+
+    def __init__(self):
+        self._next_id = 1
+        self.versi = 0
+        self._id = array('q') # Urut naik = urutan riwayat
+        self._waktu = array('q')
+        self._total = array('q')
+        self._flags = array('B')
+        self._laki = array('I')
+        self._perempuan = array('I')
+        self._bagian = [array('q') for _ in self.LABEL_BAGIAN]
+        self._per_laki = array('q')
+        self._per_perempuan = array('q')
+        # Entri yang tidak bisa dinyatakan dalam kolom (mis. hasil dengan label lain)
+        self._lain = {}
+
+    def _semua_kolom(self):
+        return [self._id, self._waktu, self._total, self._flags, self._laki, self._perempuan,
+                self._per_laki, self._per_perempuan] + self._bagian
+
+    # --- Protokol list ---
+    def __len__(self):
+        return len(self._id)
+
+    def __iter__(self):
+        return (self._entry(pos) for pos in range(len(self._id)))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._entry(pos) for pos in range(*idx.indices(len(self._id)))]
+        if idx < 0:
+            idx += len(self._id)
+        if not 0 <= idx < len(self._id):
+            raise IndexError("indeks riwayat di luar jangkauan")
+        return self._entry(idx)
+
+    def page(self, start, stop):
+        return self[max(start, 0):stop]
+
+    def snapshot(self):
+        """Salinan kolom saat ini (array disalin utuh, tanpa membentuk entri)."""
+        salinan = RiwayatKolom()
+        for tujuan, asal in zip(salinan._semua_kolom(), self._semua_kolom()):
+            tujuan.extend(asal)
+        salinan._lain.update(self._lain)
+        salinan._next_id = self._next_id
+        return salinan
+
+    def append_kasus(self, waktu, total, ayah, ibu, suami, istri, anak_laki, anak_perempuan, hasil):
+        """Jalur cepat dari WarisanCalculator.compute: simpan tanpa membentuk dict entri."""
+        nilai = [-1] * len(self.LABEL_BAGIAN)
+        per_laki = per_perempuan = -1
+        kolom = self._kolom_bagian
+        for label, v, jumlah, label_anak, per in hasil.baris:
+            nilai[kolom[label]] = v
+            if jumlah:
+                if label_anak == LABEL_PER_ANAK_LAKI:
+                    per_laki = per
+                else:
+                    per_perempuan = per
+        return self._tambah(None, int(waktu), round(total), self._ke_flags(ayah, ibu, suami, istri), anak_laki, anak_perempuan,
+                            nilai, per_laki, per_perempuan)
+
+    def append(self, entry):
+        inputs = entry['inputs']
+        flags = self._ke_flags(*(inputs.get(k) for k in INPUT_KEYS[:4]))
+        laki, perempuan = inputs.get('anak_laki', 0), inputs.get('anak_perempuan', 0)
+        try:
+            waktu = int(datetime.strptime(entry['timestamp'], self.FORMAT_WAKTU).timestamp())
+        except (TypeError, ValueError):
+            waktu = None
+        kolom = self._ke_kolom(entry['hasil'], laki, perempuan) if waktu is not None else None
+        if kolom is None:
+            nilai, per_laki, per_perempuan = [-1] * len(self.LABEL_BAGIAN), -1, -1
+        else:
+            nilai, per_laki, per_perempuan = kolom
+        entry_id = self._tambah(entry.get('id'), waktu or 0, entry['total'], flags, laki, perempuan,
+                                nilai, per_laki, per_perempuan)
+        entry['id'] = entry_id
+        if kolom is None:
+            self._lain[entry_id] = entry
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    @staticmethod
+    def _ke_flags(ayah, ibu, suami, istri):
+        """Bitmask ahli waris: ayah=1, ibu=2, suami=4, istri=8."""
+        return (1 if ayah else 0) | (2 if ibu else 0) | (4 if suami else 0) | (8 if istri else 0)
+
+    @classmethod
+    def _ke_kolom(cls, hasil, laki, perempuan):
+        """Nilai kolom bagian untuk satu hasil, atau None jika tidak bisa dibentuk ulang persis."""
+        baris = tuple(hasil.baris) if isinstance(hasil, HasilWarisan) else tuple(
+            (k, v, 0, None, 0) for k, v in hasil.items())
+        nilai = [-1] * len(cls.LABEL_BAGIAN)
+        per_laki = per_perempuan = -1
+        for label, v, jumlah, label_anak, per in baris:
+            c = cls._kolom_bagian.get(label)
+            if c is None or not isinstance(v, int) or v < 0:
+                return None
+            nilai[c] = v
+            if jumlah:
+                if label_anak == LABEL_PER_ANAK_LAKI:
+                    per_laki = per
+                else:
+                    per_perempuan = per
+        if tuple(cls._baris(nilai, per_laki, per_perempuan, laki, perempuan)) != baris:
+            return None
+        return nilai, per_laki, per_perempuan
+
+    def _tambah(self, entry_id, waktu, total, flags, laki, perempuan, nilai, per_laki, per_perempuan):
+        if entry_id is None or self._cari_pos(entry_id) is not None:
+            entry_id = self._next_id
+        self._next_id = max(self._next_id, entry_id + 1)
+        pos = len(self._id)
+        if pos and entry_id < self._id[-1]:
+            pos = bisect_left(self._id, entry_id) # Entri disisipkan di tengah urutan
+        for kol, v in zip(self._semua_kolom(),
+                          [entry_id, waktu, total, flags, laki, perempuan, per_laki, per_perempuan] + nilai):
+            kol.insert(pos, v)
+        self.versi += 1 if pos == len(self._id) - 1 else 2
+        return entry_id
+
+    def pop(self, idx=-1):
+        return self.delete_id(self._id[idx])
+
+    def clear(self):
+        # ID tidak direset agar tetap unik sepanjang sesi
+        for kol in self._semua_kolom():
+            del kol[:]
+        self._lain.clear()
+        self.versi += 1
+
+    # --- Pembentukan entri untuk tampilan ---
+    def _entry(self, pos):
+        entry_id = self._id[pos]
+        lain = self._lain.get(entry_id)
+        if lain is not None:
+            return lain
+        flags, laki, perempuan = self._flags[pos], self._laki[pos], self._perempuan[pos]
+        nilai = [kol[pos] for kol in self._bagian]
+        return {
+            'id': entry_id,
+            'timestamp': datetime.fromtimestamp(self._waktu[pos]).strftime(self.FORMAT_WAKTU),
+            'total': self._total[pos],
+            'inputs': {'ayah': bool(flags & 1), 'ibu': bool(flags & 2), 'suami': bool(flags & 4),
+                       'istri': bool(flags & 8), 'anak_laki': laki, 'anak_perempuan': perempuan},
+            'hasil': HasilWarisan(self._baris(nilai, self._per_laki[pos], self._per_perempuan[pos], laki, perempuan))
+        }
+
+    @classmethod
+    def _baris(cls, nilai, per_laki, per_perempuan, laki, perempuan):
+        """Baris HasilWarisan dari nilai kolom (urutan sama dengan _compile_plan)."""
+        # Tanpa anak, Ayah menjadi ashabah dan barisnya ditambahkan setelah bagian tetap
+        urutan = cls._URUTAN_TANPA_ANAK if laki == 0 and perempuan == 0 else cls._URUTAN
+        for c in urutan:
+            v = nilai[c]
+            if v < 0:
+                continue
+            label = cls.LABEL_BAGIAN[c]
+            if label == LABEL_ANAK_LAKI_TOTAL and per_laki >= 0:
+                yield (label, v, laki, LABEL_PER_ANAK_LAKI, per_laki)
+            elif label == LABEL_ANAK_PEREMPUAN_TOTAL and per_perempuan >= 0:
+                yield (label, v, perempuan, LABEL_PER_ANAK_PEREMPUAN, per_perempuan)
+            else:
+                yield (label, v, 0, None, 0)
+
+    # --- Akses berdasarkan ID ---
+    def _cari_pos(self, entry_id):
+        pos = bisect_left(self._id, entry_id)
+        if pos == len(self._id) or self._id[pos] != entry_id:
+            return None
+        return pos
+
+    def get_id(self, entry_id):
+        return self._entry(self.index_of_id(entry_id))
+
+    def index_of_id(self, entry_id):
+        """Posisi entri dengan ID tertentu (pencarian biner pada kolom id)."""
+        pos = self._cari_pos(entry_id)
+        if pos is None:
+            raise KeyError(entry_id)
+        return pos
+
+    def posisi_setelah(self, entry_id):
+        """Jumlah entri dengan id <= entry_id (posisi entri pertama sesudahnya)."""
+        return bisect_right(self._id, entry_id)
+
+    def delete_id(self, entry_id):
+        pos = self.index_of_id(entry_id)
+        entry = self._entry(pos)
+        for kol in self._semua_kolom():
+            del kol[pos]
+        self._lain.pop(entry_id, None)
+        self.versi += 1
+        return entry
+
+    # --- Query (pemindaian kolom) ---
+    def cari(self, waktu_dari=None, waktu_sampai=None, total_min=None, total_max=None, konfigurasi=None):
+        """Sama dengan RiwayatMemori.cari; filter dijalankan langsung pada kolom."""
+        posisi = range(len(self._id))
+        if waktu_dari is not None:
+            bawah = self._epoch(waktu_dari, atas=False)
+            posisi = [p for p in posisi if self._waktu[p] >= bawah]
+        if waktu_sampai is not None:
+            atas = self._epoch(waktu_sampai, atas=True)
+            posisi = [p for p in posisi if self._waktu[p] <= atas]
+        if total_min is not None:
+            posisi = [p for p in posisi if self._total[p] >= total_min]
+        if total_max is not None:
+            posisi = [p for p in posisi if self._total[p] <= total_max]
+        if konfigurasi is not None:
+            ayah, ibu, suami, istri, laki, perempuan = konfigurasi
+            flags = self._ke_flags(ayah, ibu, suami, istri)
+            posisi = [p for p in posisi if self._flags[p] == flags
+                      and self._laki[p] == laki and self._perempuan[p] == perempuan]
+        return [self._entry(p) for p in posisi]
+
+    @classmethod
+    def _epoch(cls, teks, atas):
+        """Epoch dari prefiks "YYYY-MM-DD HH:MM:SS"; batas atas mencakup seluruh periode prefiks."""
+        pola = "9999-12-31 23:59:59" if atas else "0001-01-01 00:00:00"
+        lengkap = teks + pola[len(teks):]
+        try:
+            y, mo, d, h, mi, sec = (int(x) for x in
+                                    (lengkap[0:4], lengkap[5:7], lengkap[8:10], lengkap[11:13], lengkap[14:16], lengkap[17:19]))
+            if atas:
+                d = min(d, calendar.monthrange(y, mo)[1])
+            return int(datetime(y, mo, d, h, mi, sec).timestamp())
+        except (ValueError, OverflowError, OSError):
+            raise ValueError(f"Format waktu tidak dikenali: {teks!r} (gunakan YYYY-MM-DD)")
+
+class RiwayatSQLite:
+    """Riwayat append-only di file SQLite dengan jendela entri terbaru di RAM.
+
+    Berperilaku seperti list riwayat biasa (len, indeks, iterasi, append,
+    pop, clear), sehingga bisa dipasang ke WarisanCalculator(history=...).
+    Hanya RIWAYAT_WINDOW entri terakhir yang disimpan di memori; entri lama
+    dibaca dari disk saat dibutuhkan. versi (lihat RiwayatMemori) hanya
+    mencatat perubahan lewat objek ini, bukan dari proses lain.
+    """
+    KOLOM = "id, timestamp, total, ayah, ibu, suami, istri, anak_laki, anak_perempuan, hasil"
+
+    def __init__(self, path, window=RIWAYAT_WINDOW):
+        self.path = path
+        # Penulisan dari thread lain diserialkan oleh lock riwayat WarisanCalculator
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL: snapshot export di thread lain tidak menghalangi penulisan riwayat
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS riwayat ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, total INTEGER,"
+            " ayah INTEGER, ibu INTEGER, suami INTEGER, istri INTEGER,"
+            " anak_laki INTEGER, anak_perempuan INTEGER, hasil TEXT)")
+        # Indeks sekunder untuk filter di view Riwayat
+        self._conn.execute("CREATE INDEX IF NOT EXISTS riwayat_waktu ON riwayat (timestamp)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS riwayat_total ON riwayat (total)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS riwayat_konfig ON riwayat"
+                           " (ayah, ibu, suami, istri, anak_laki, anak_perempuan)")
+        self._conn.commit()
+        self._window = deque(maxlen=window)
+        self.versi = 0
+        self._jumlah = self._conn.execute("SELECT COUNT(*) FROM riwayat").fetchone()[0]
+        self._muat_window()
+
+    # --- Konversi baris <-> entri ---
+    @staticmethod
+    def _ke_baris(entry):
+        i = entry['inputs']
+        hasil = entry['hasil']
+        if isinstance(hasil, HasilWarisan):
+            baris = [list(b) for b in hasil.baris]
+        else:
+            baris = [[k, v, 0, None, 0] for k, v in hasil.items()]
+        return (entry.get('id'), entry['timestamp'], entry['total'], i['ayah'], i['ibu'], i['suami'], i['istri'],
+                i['anak_laki'], i['anak_perempuan'], json.dumps(baris, ensure_ascii=False))
+
+    @staticmethod
+    def _ke_entry(row):
+        entry_id, timestamp, total, ayah, ibu, suami, istri, laki, perempuan, hasil = row
+        return {
+            'id': entry_id,
+            'timestamp': timestamp,
+            'total': total,
+            'inputs': {'ayah': bool(ayah), 'ibu': bool(ibu), 'suami': bool(suami), 'istri': bool(istri),
+                       'anak_laki': laki, 'anak_perempuan': perempuan},
+            'hasil': HasilWarisan(_intern_baris(json.loads(hasil)))
+        }
+
+    def _muat_window(self):
+        self._window.clear()
+        rows = self._conn.execute(
+            f"SELECT {self.KOLOM} FROM riwayat ORDER BY id DESC LIMIT ?", (self._window.maxlen,)).fetchall()
+        self._window.extend(self._ke_entry(r) for r in reversed(rows))
+
+    # --- Protokol list ---
+    def __len__(self):
+        return self._jumlah
+
+    def __iter__(self):
+        # Baca per blok agar memori tetap konstan (Modul 3)
+        terakhir = 0
+        while True:
+            rows = self._conn.execute(
+                f"SELECT {self.KOLOM} FROM riwayat WHERE id > ? ORDER BY id LIMIT 1000", (terakhir,)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._ke_entry(row)
+            terakhir = rows[-1][0]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self.page(*idx.indices(self._jumlah)[:2])
+        if idx < 0:
+            idx += self._jumlah
+        if not 0 <= idx < self._jumlah:
+            raise IndexError("indeks riwayat di luar jangkauan")
+        awal_window = self._jumlah - len(self._window)
+        if idx >= awal_window:
+            return self._window[idx - awal_window]
+        row = self._conn.execute(
+            f"SELECT {self.KOLOM} FROM riwayat ORDER BY id LIMIT 1 OFFSET ?", (idx,)).fetchone()
+        return self._ke_entry(row)
+
+    def page(self, start, stop):
+        """Ambil entri [start, stop) sebagai list (dipakai view Riwayat)."""
+        start, stop = max(start, 0), min(stop, self._jumlah)
+        if start >= stop:
+            return []
+        awal_window = self._jumlah - len(self._window)
+        if start >= awal_window:
+            return [self._window[i - awal_window] for i in range(start, stop)]
+        rows = self._conn.execute(
+            f"SELECT {self.KOLOM} FROM riwayat ORDER BY id LIMIT ? OFFSET ?", (stop - start, start)).fetchall()
+        return [self._ke_entry(r) for r in rows]
+
+    def snapshot(self):
+        """Snapshot untuk export di thread latar (dibaca lewat koneksi tersendiri)."""
+        return _SnapshotSQLite(self.path)
+
+    def append(self, entry):
+        self.extend((entry,))
+
+    def extend(self, entries):
+        """Sisipkan beberapa entri dalam satu transaksi (satu commit per batch)."""
+        conn = self._conn
+        id_akhir = self._window[-1]['id'] if self._window else 0
+        baru = []
+        try:
+            for entry in entries:
+                if entry.get('id') is not None and conn.execute(
+                        "SELECT 1 FROM riwayat WHERE id = ?", (entry['id'],)).fetchone():
+                    entry['id'] = None # ID sudah dipakai: minta ID baru
+                cur = conn.execute(f"INSERT INTO riwayat ({self.KOLOM}) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                                   self._ke_baris(entry))
+                entry['id'] = cur.lastrowid
+                baru.append(entry)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        self._jumlah += len(baru)
+        self.versi += len(baru)
+        for entry in baru:
+            if entry['id'] < id_akhir:
+                self.versi += 1
+                self._muat_window() # Entri disisipkan di tengah urutan
+                break
+            id_akhir = entry['id']
+        else:
+            self._window.extend(baru)
+
+    def pop(self, idx=-1):
+        if idx < 0:
+            idx += self._jumlah
+        if not 0 <= idx < self._jumlah:
+            raise IndexError("indeks riwayat di luar jangkauan")
+        return self.delete_id(self[idx]['id'])
+
+    # --- Akses berdasarkan ID (memakai PRIMARY KEY dan indeks SQLite) ---
+    def get_id(self, entry_id):
+        row = self._conn.execute(f"SELECT {self.KOLOM} FROM riwayat WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            raise KeyError(entry_id)
+        return self._ke_entry(row)
+
+    def index_of_id(self, entry_id):
+        entry = self.get_id(entry_id)
+        return self.posisi_setelah(entry['id']) - 1
+
+    def posisi_setelah(self, entry_id):
+        """Jumlah entri dengan id <= entry_id."""
+        return self._conn.execute("SELECT COUNT(*) FROM riwayat WHERE id <= ?", (entry_id,)).fetchone()[0]
+
+    def delete_id(self, entry_id):
+        entry = self.get_id(entry_id)
+        self._conn.execute("DELETE FROM riwayat WHERE id = ?", (entry_id,))
+        self._conn.commit()
+        self._jumlah -= 1
+        self.versi += 1
+        if any(e['id'] == entry_id for e in self._window):
+            self._muat_window()
+        return entry
+
+    def cari(self, waktu_dari=None, waktu_sampai=None, total_min=None, total_max=None, konfigurasi=None):
+        """Sama dengan RiwayatMemori.cari, dijalankan sebagai query SQL berindeks."""
+        syarat, param = [], []
+        if waktu_dari is not None:
+            syarat.append("timestamp >= ?"); param.append(waktu_dari)
+        if waktu_sampai is not None:
+            syarat.append("timestamp <= ?"); param.append(waktu_sampai + "\uffff")
+        if total_min is not None:
+            syarat.append("total >= ?"); param.append(total_min)
+        if total_max is not None:
+            syarat.append("total <= ?"); param.append(total_max)
+        if konfigurasi is not None:
+            syarat.append("(ayah, ibu, suami, istri, anak_laki, anak_perempuan) = (?,?,?,?,?,?)")
+            param.extend(konfigurasi)
+        where = f" WHERE {' AND '.join(syarat)}" if syarat else ""
+        rows = self._conn.execute(f"SELECT {self.KOLOM} FROM riwayat{where} ORDER BY id", param).fetchall()
+        return [self._ke_entry(r) for r in rows]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM riwayat")
+        self._conn.commit()
+        self._window.clear()
+        self._jumlah = 0
+        self.versi += 1
+
+    def close(self):
+        self._conn.close()
+
+class RiwayatBiner:
+    """Riwayat hasil export_bin, dibaca lewat memory mapping (hanya baca).
+
+    Format file: MAGIC, panjang header (uint32 little-endian), header JSON
+    (versi, ukuran rekaman, daftar kolom beserta offset), lalu rekaman
+    berukuran tetap yang dimulai pada offset kelipatan 8. Kolom sama dengan
+    RiwayatKolom: id, waktu (epoch detik), total, bagian per kelas ahli waris
+    (-1 = tidak ada), jumlah anak dan bitmask ahli waris.
+
+    Tidak ada yang di-parse atau dimuat ke RAM saat dibuka: kolom(nama)
+    memberi view tanpa salinan atas satu kolom, tabel() memberi array NumPy
+    terstruktur (jika terpasang), dan entri (dict) hanya dibentuk saat
+    dibaca lewat indeks/page, sehingga objek ini juga bisa menjadi sumber
+    export lain (_export sumber=).
+    """
+    MAGIC = b"WARISREC"
+    VERSI = 1
+    # (nama, kode struct/array); kolom 8 byte lebih dulu agar setiap kolom sejajar
+    KOLOM = (("id", "q"), ("waktu", "q"), ("total", "q"), ("per_laki", "q"), ("per_perempuan", "q"),
+             *((f"bagian_{c}", "q") for c in range(len(RiwayatKolom.LABEL_BAGIAN))),
+             ("laki", "I"), ("perempuan", "I"), ("flags", "B"))
+    STRUCT = struct.Struct("<" + "".join(kode for _, kode in KOLOM) + "7x")
+    versi = 0 # Hanya baca: isi tidak pernah berubah
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._awal, self._offset = self._baca_header()
+        except ValueError:
+            self._mm.close()
+            raise
+        self._jumlah = (len(self._mm) - self._awal) // self.STRUCT.size
+        self._view = memoryview(self._mm)[self._awal:self._awal + self._jumlah * self.STRUCT.size]
+        self._kolom = {}
+        self._id = self.kolom("id")
+
+    # --- Format file ---
+    @classmethod
+    def header(cls):
+        """Bytes header file (ditulis sekali di awal export penuh)."""
+        offset, kolom = 0, []
+        for nama, kode in cls.KOLOM:
+            kolom.append([nama, kode, offset])
+            offset += struct.calcsize(kode)
+        teks = json.dumps({'versi': cls.VERSI, 'ukuran_rekaman': cls.STRUCT.size, 'kolom': kolom,
+                           'label_bagian': RiwayatKolom.LABEL_BAGIAN}, ensure_ascii=False).encode("utf-8")
+        panjang = len(cls.MAGIC) + 4 + len(teks)
+        teks += b" " * (-panjang % 8)
+        return cls.MAGIC + struct.pack("<I", len(teks)) + teks
+
+    def _baca_header(self):
+        mm = self._mm
+        if mm[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"Bukan file riwayat biner: {self.path}")
+        awal = len(self.MAGIC) + 4
+        panjang, = struct.unpack_from("<I", mm, len(self.MAGIC))
+        try:
+            info = json.loads(bytes(mm[awal:awal + panjang]))
+        except ValueError:
+            raise ValueError(f"Header file riwayat biner rusak: {self.path}")
+        kolom = [[nama, kode] for nama, kode, _ in info.get('kolom', ())]
+        if (info.get('versi') != self.VERSI or info.get('ukuran_rekaman') != self.STRUCT.size
+                or kolom != [list(k) for k in self.KOLOM]
+                or info.get('label_bagian') != list(RiwayatKolom.LABEL_BAGIAN)):
+            raise ValueError(f"Versi/struktur file riwayat biner tidak didukung: {self.path}")
+        return awal + panjang, {nama: offset for nama, _, offset in info['kolom']}
+
+    @classmethod
+    def rekaman(cls, entry):
+        """Bytes satu rekaman untuk entri riwayat; ValueError jika tidak bisa dinyatakan dalam kolom."""
+        inputs = entry['inputs']
+        laki, perempuan = inputs.get('anak_laki', 0), inputs.get('anak_perempuan', 0)
+        try:
+            waktu = int(datetime.fromisoformat(entry['timestamp']).timestamp())
+        except (TypeError, ValueError):
+            raise ValueError(f"Entri id {entry.get('id')}: timestamp tidak valid {entry['timestamp']!r}")
+        kolom = RiwayatKolom._ke_kolom(entry['hasil'], laki, perempuan)
+        if kolom is None:
+            raise ValueError(f"Entri id {entry.get('id')}: hasil tidak bisa disimpan dalam format biner")
+        nilai, per_laki, per_perempuan = kolom
+        try:
+            return cls.STRUCT.pack(entry['id'], waktu, round(entry['total']), per_laki, per_perempuan, *nilai,
+                                   laki, perempuan, RiwayatKolom._ke_flags(*(inputs.get(k) for k in INPUT_KEYS[:4])))
+        except struct.error as e:
+            raise ValueError(f"Entri id {entry.get('id')}: nilai di luar jangkauan format biner ({e})")
+
+    # --- Akses kolom (tanpa salinan) ---
+    def kolom(self, nama):
+        """View satu kolom (id, waktu, total, laki, ...) langsung di atas file yang di-mmap.
+
+        Hasilnya bisa diindeks, di-slice, di-iterasi atau dijumlahkan tanpa
+        memuat kolom lain. View ini dilepas oleh close(); salin (list/array)
+        jika nilainya masih diperlukan sesudahnya.
+        """
+        view = self._kolom.get(nama)
+        if view is None:
+            kode = dict(self.KOLOM)[nama]
+            ukuran = struct.calcsize(kode)
+            langkah = self.STRUCT.size // ukuran
+            view = self._view.cast("B")
+            if ukuran > 1:
+                view = view.cast(kode)
+            view = view[self._offset[nama] // ukuran::langkah]
+            if sys.byteorder != "little":
+                view = array(kode, view)
+                view.byteswap()
+            self._kolom[nama] = view
+        return view
+
+    def tabel(self):
+        """Semua rekaman sebagai array NumPy terstruktur di atas mmap (None jika NumPy tidak terpasang).
+
+        Array tidak disalin: selama masih dipegang, close() tidak bisa
+        melepas mapping-nya (lihat close()). Gunakan .copy() jika datanya
+        perlu bertahan lepas dari file.
+        """
+        numpy = _import_numpy()
+        if numpy is None:
+            return None
+        dtype = numpy.dtype({'names': [nama for nama, _ in self.KOLOM],
+                             'formats': ["<" + ("u4" if kode == "I" else "u1" if kode == "B" else "i8")
+                                         for _, kode in self.KOLOM],
+                             'offsets': [self._offset[nama] for nama, _ in self.KOLOM],
+                             'itemsize': self.STRUCT.size})
+        return numpy.frombuffer(self._view, dtype=dtype, count=self._jumlah)
+
+    # --- Protokol list (entri dibentuk saat dibaca) ---
+    def __len__(self):
+        return self._jumlah
+
+    def __iter__(self):
+        return (self._entry(pos) for pos in range(self._jumlah))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._entry(pos) for pos in range(*idx.indices(self._jumlah))]
+        if idx < 0:
+            idx += self._jumlah
+        if not 0 <= idx < self._jumlah:
+            raise IndexError("indeks riwayat di luar jangkauan")
+        return self._entry(idx)
+
+    def page(self, start, stop):
+        return self[max(start, 0):stop]
+
+    def snapshot(self):
+        # Isi file yang sudah di-mmap tidak berubah
+        return self
+
+    def _entry(self, pos):
+        entry_id, waktu, total, per_laki, per_perempuan, *nilai, laki, perempuan, flags = \
+            self.STRUCT.unpack_from(self._view, pos * self.STRUCT.size)
+        return {
+            'id': entry_id,
+            'timestamp': datetime.fromtimestamp(waktu).strftime(RiwayatKolom.FORMAT_WAKTU),
+            'total': total,
+            'inputs': {'ayah': bool(flags & 1), 'ibu': bool(flags & 2), 'suami': bool(flags & 4),
+                       'istri': bool(flags & 8), 'anak_laki': laki, 'anak_perempuan': perempuan},
+            'hasil': HasilWarisan(RiwayatKolom._baris(nilai, per_laki, per_perempuan, laki, perempuan))
+        }
+
+    # --- Akses berdasarkan ID (kolom id urut naik) ---
+    def get_id(self, entry_id):
+        return self._entry(self.index_of_id(entry_id))
+
+    def index_of_id(self, entry_id):
+        pos = bisect_left(self._id, entry_id)
+        if pos == self._jumlah or self._id[pos] != entry_id:
+            raise KeyError(entry_id)
+        return pos
+
+    def posisi_setelah(self, entry_id):
+        return bisect_right(self._id, entry_id)
+
+    def close(self):
+        """Lepas view kolom dan tutup mmap; aman dipanggil lebih dari sekali.
+
+        Jika pemanggil masih memegang buffer di atas mmap (array dari tabel(),
+        np.asarray(kolom(...)), ...), mmap tidak bisa ditutup sekarang
+        (BufferError). Referensi objek ini dilepas saja; mapping ditutup
+        otomatis setelah buffer terakhir dibebaskan, dan buffer tersebut
+        tetap sah dibaca sampai saat itu.
+        """
+        if self._mm is None:
+            return
+        self._id = None
+        views = [v for v in self._kolom.values() if isinstance(v, memoryview)]
+        try:
+            for view in views + [self._view]:
+                try:
+                    view.release()
+                except BufferError:
+                    pass
+            self._mm.close()
+        except BufferError:
+            # Masih ada buffer milik pemanggil: mmap ditutup oleh GC
+            pass
+        self._kolom.clear()
+        self._view = self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- IMPORT RIWAYAT (STREAMING) ---
+FORMAT_IMPORT = ("txt", "jsonl", "csv")
+
+class _PembacaBaris:
+    """Iterasi baris file biner beserta nomor baris dan posisi byte (untuk progres).
+
+    Baris yang bukan UTF-8 valid dihasilkan sebagai None sehingga parser
+    dapat melaporkannya sebagai blok rusak tanpa menghentikan import.
+    """
+    def __init__(self, f):
+        self._f = f
+        self.nomor = 0
+        self.posisi = 0
+
+    def __iter__(self):
+        for raw in self._f:
+            self.nomor += 1
+            self.posisi += len(raw)
+            try:
+                teks = raw.decode("utf-8").rstrip("\r\n")
+            except UnicodeDecodeError:
+                yield None
+                continue
+            yield teks.lstrip("\ufeff") if self.nomor == 1 else teks
+
+def _deteksi_format_impor(path):
+    """Tebak format file riwayat dari baris pertama yang tidak kosong (lalu ekstensi)."""
+    with open(path, "rb") as f:
+        for raw in f:
+            teks = raw.decode("utf-8", "replace").lstrip("\ufeff").strip()
+            if not teks:
+                continue
+            if teks.startswith("{"):
+                return "jsonl"
+            if teks.startswith("=== Riwayat "):
+                return "txt"
+            if teks.split(",", 1)[0] == "no":
+                return "csv"
+            break
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in FORMAT_IMPORT:
+        return ext
+    raise ValueError("Format file riwayat tidak dikenali (gunakan txt, jsonl, atau csv).")
+
+def _parse_rp(teks):
+    """Kebalikan format_rp: "Rp 1,250,000" -> 1250000."""
+    angka = teks.strip()
+    if angka.startswith("Rp "):
+        angka = angka[3:]
+    try:
+        return int(angka.replace(",", ""))
+    except ValueError:
+        raise ValueError(f"nilai Rupiah tidak valid: {teks!r}")
+
+def _entry_impor(timestamp, total, inputs, baris, entry_id=None):
+    """Entri riwayat dari data import; ValueError jika tidak lengkap atau tidak konsisten."""
+    try:
+        datetime.strptime(timestamp, RiwayatKolom.FORMAT_WAKTU)
+    except (TypeError, ValueError):
+        raise ValueError(f"timestamp tidak valid: {timestamp!r}")
+    if type(total) is not int or total <= 0:
+        raise ValueError(f"total harta tidak valid: {total!r}")
+    if not isinstance(inputs, dict) or set(inputs) != set(INPUT_KEYS):
+        raise ValueError("input ahli waris tidak lengkap")
+    for k in INPUT_KEYS[:4]:
+        if type(inputs[k]) is not bool:
+            raise ValueError(f"input {k} harus True/False")
+    for k in INPUT_KEYS[4:]:
+        if type(inputs[k]) is not int or inputs[k] < 0:
+            raise ValueError(f"input {k} harus bilangan bulat >= 0")
+    if inputs['suami'] and inputs['istri']:
+        raise ValueError("suami dan istri tidak boleh bersamaan")
+    _cek_riwayat(total, inputs['anak_laki'], inputs['anak_perempuan'])
+    if entry_id is not None and (type(entry_id) is not int or not 0 < entry_id <= TOTAL_MAKS_RIWAYAT):
+        raise ValueError(f"id tidak valid: {entry_id!r}")
+    hasil = []
+    for b in baris:
+        try:
+            label, nilai, jumlah, label_anak, per = b
+        except (TypeError, ValueError):
+            raise ValueError(f"baris hasil tidak valid: {b!r}")
+        if (not isinstance(label, str) or type(nilai) is not int or type(jumlah) is not int or jumlah < 0
+                or type(per) is not int or not (label_anak is None or isinstance(label_anak, str))
+                or (jumlah and label_anak is None) or abs(nilai) > TOTAL_MAKS_RIWAYAT or abs(per) > TOTAL_MAKS_RIWAYAT):
+            raise ValueError(f"baris hasil tidak valid: {b!r}")
+        hasil.append((label, nilai, jumlah, label_anak, per))
+    if not hasil:
+        raise ValueError("hasil kosong")
+    return {'id': entry_id, 'timestamp': timestamp, 'total': total, 'inputs': inputs,
+            'hasil': HasilWarisan(_intern_baris(hasil))}
+
+class _BlokTxt:
+    """Parser bertahap untuk satu blok "=== Riwayat N ===" dari export_txt.
+
+    Baris per anak ("  └─ Anak Laki-laki 1: ...") langsung diringkas ke
+    baris kelasnya, sehingga memori per blok tidak bergantung jumlah anak.
+    """
+    PREFIX_ANAK = "  └─ "
+
+    def __init__(self, nomor, galat=None):
+        self.nomor = nomor
+        self.galat = galat
+        self.bagian = "kepala"
+        self.waktu = self.total = None
+        self.inputs = {}
+        self.baris = []
+        self.turun = False # Bagian per anak kelas terakhir sudah turun ke bagian dasar
+
+    def tambah(self, teks, nomor):
+        if self.galat is None:
+            try:
+                self._tambah(teks)
+            except ValueError as e:
+                # Dilaporkan pada baris yang salah; sisa blok diabaikan
+                self.nomor, self.galat = nomor, str(e)
+
+    def _tambah(self, teks):
+        if teks is None:
+            raise ValueError("bukan teks UTF-8")
+        if not teks:
+            return
+        if teks in ("Input:", "Hasil:"):
+            self.bagian = teks[:-1].lower()
+            return
+        if self.bagian == "kepala":
+            kunci, _, nilai = teks.partition(": ")
+            if kunci == "Waktu":
+                self.waktu = nilai
+            elif kunci == "Total Harta":
+                self.total = _parse_rp(nilai)
+            else:
+                raise ValueError(f"baris tidak dikenali: {teks!r}")
+            return
+        kunci, sep, nilai = teks[2:].rpartition(": ")
+        if not teks.startswith("  ") or not sep:
+            raise ValueError(f"baris tidak dikenali: {teks!r}")
+        if self.bagian == "input":
+            if kunci not in INPUT_KEYS or kunci in self.inputs:
+                raise ValueError(f"input tidak dikenali: {kunci!r}")
+            if kunci in INPUT_KEYS[:4]:
+                if nilai not in ("True", "False"):
+                    raise ValueError(f"input {kunci} harus True/False")
+                self.inputs[kunci] = nilai == "True"
+            else:
+                self.inputs[kunci] = safe_int(nilai, -1)
+            return
+        v = _parse_rp(nilai)
+        if kunci.startswith(self.PREFIX_ANAK) and self.baris:
+            label_anak, _, i = kunci.rpartition(" ")
+            akhir = self.baris[-1]
+            # Anak-anak pertama boleh menerima satu rupiah lebih (sisa pembagian kelas)
+            if akhir[2] and (label_anak != akhir[3] or not (v == akhir[4] or v == akhir[4] - 1 and not self.turun)):
+                raise ValueError(f"bagian per anak tidak konsisten: {kunci!r}")
+            if i != str(akhir[2] + 1):
+                raise ValueError(f"nomor anak tidak berurutan: {kunci!r}")
+            self.turun = self.turun or (akhir[2] > 0 and v != akhir[4])
+            akhir[2:] = [akhir[2] + 1, label_anak, v]
+            return
+        self.turun = False
+        self.baris.append([kunci, v, 0, None, 0])
+
+    def selesai(self):
+        """(nomor_baris, entry) atau (nomor_baris, ValueError)."""
+        if self.galat is None and self.bagian != "hasil":
+            self.galat = f"blok terpotong (bagian {self.bagian})"
+        if self.galat is not None:
+            return self.nomor, ValueError(self.galat)
+        try:
+            return self.nomor, _entry_impor(self.waktu, self.total, self.inputs, self.baris)
+        except ValueError as e:
+            return self.nomor, e
+
+def _baca_txt(pembaca):
+    """Entri dari export_txt: hasilkan (nomor_baris, entry | ValueError) per blok."""
+    blok = None
+    for teks in pembaca:
+        if teks is not None and teks.startswith("=== Riwayat ") and teks.endswith(" ==="):
+            if blok is not None:
+                yield blok.selesai()
+            blok = _BlokTxt(pembaca.nomor)
+        elif blok is not None:
+            blok.tambah(teks, pembaca.nomor)
+        elif teks is None or teks.strip():
+            # Teks sebelum blok pertama: dilaporkan sekali, dilewati sampai blok berikutnya
+            blok = _BlokTxt(pembaca.nomor, galat="teks di luar blok \"=== Riwayat N ===\"")
+    if blok is not None:
+        yield blok.selesai()
+
+def _baca_jsonl(pembaca):
+    """Entri dari export_jsonl: satu objek JSON per baris."""
+    for teks in pembaca:
+        if teks is not None and not teks.strip():
+            continue
+        try:
+            if teks is None:
+                raise ValueError("bukan teks UTF-8")
+            obj = json.loads(teks)
+            if not isinstance(obj, dict):
+                raise ValueError("bukan objek JSON")
+            yield pembaca.nomor, _entry_impor(obj.get('timestamp'), obj.get('total'), obj.get('inputs'),
+                                              obj.get('hasil') or (), obj.get('id'))
+        except ValueError as e:
+            # json.JSONDecodeError juga turunan ValueError
+            yield pembaca.nomor, ValueError(str(e))
+
+def _baca_csv(pembaca, calc):
+    """Entri dari export_csv; baris hasil disusun ulang dari rencana konfigurasi ahli warisnya.
+
+    CSV hanya menyimpan satu kolom per kelas ahli waris; urutan baris dan
+    jumlah anak diambil dari get_plan(), nilainya dari kolom file.
+    """
+    kolom = label_hasil = None
+    for teks in pembaca:
+        if teks is not None and not teks.strip():
+            continue
+        try:
+            if teks is None:
+                raise ValueError("bukan teks UTF-8")
+            sel = next(csv.reader((teks,)))
+            if kolom is None:
+                hilang = [k for k in ("timestamp", "total", *INPUT_KEYS) if k not in sel]
+                if hilang:
+                    raise ValueError(f"header CSV tidak lengkap: {', '.join(hilang)}")
+                kolom = {nama: c for c, nama in enumerate(sel)}
+                label_hasil = [label for label in calc._label_batch() if label in kolom]
+                continue
+            if len(sel) != len(kolom):
+                raise ValueError(f"jumlah kolom {len(sel)}, seharusnya {len(kolom)}")
+            inputs = {k: _parse_bool(sel[kolom[k]]) for k in INPUT_KEYS[:4]}
+            inputs.update((k, safe_int(sel[kolom[k]], -1)) for k in INPUT_KEYS[4:])
+            nilai = {}
+            for label in label_hasil:
+                nilai[label] = safe_int(sel[kolom[label]], None)
+                if nilai[label] is None:
+                    raise ValueError(f"kolom {label.strip()!r} bukan bilangan bulat")
+            baris = []
+            if min(inputs['anak_laki'], inputs['anak_perempuan']) >= 0:
+                # Perulangan atas rencana (Modul 3): kolom yang dipakai diambil, sisanya harus 0
+                for label, _, jumlah, label_anak, _ in calc.get_plan(*(inputs[k] for k in INPUT_KEYS)):
+                    if label not in nilai or (jumlah and label_anak not in nilai):
+                        raise ValueError(f"kolom {(label if label not in nilai else label_anak).strip()!r} tidak ada")
+                    v = nilai.pop(label)
+                    if label == LABEL_SISA and not v:
+                        continue # Sama dengan _terapkan_plan: Sisa Rp 0 tidak dicantumkan
+                    baris.append((label, v, jumlah, label_anak, nilai.pop(label_anak) if jumlah else 0))
+                lebih = [label.strip() for label, v in nilai.items() if v]
+                if lebih:
+                    raise ValueError(f"kolom {lebih[0]!r} berisi nilai, tetapi ahli waris itu tidak ada")
+            entry_id = safe_int(sel[kolom['id']], -1) if 'id' in kolom else None
+            yield pembaca.nomor, _entry_impor(sel[kolom['timestamp']], safe_int(sel[kolom['total']], -1),
+                                              inputs, baris, entry_id)
+        except ValueError as e:
+            yield pembaca.nomor, e
+
+class WarisanCalculator:
+    """Logika inti perhitungan warisan Faraidh.
+
+    Satu objek boleh dipakai bersama oleh banyak thread: hitung() tidak
+    mengubah state apa pun selain cache (rencana, struktur, hasil unik) yang
+    aman dipakai bersama, dan penulisan riwayat lewat compute() dilindungi
+    satu lock.
+    """
+    def __init__(self, history=None):
+        # Inisialisasi objek ahli waris (Modul 5)
+        self.ayah = Ayah()
+        self.ibu = Ibu()
+        self.suami = Suami()
+        self.istri = Istri()
+        self.anak = Anak(0,0)
+        # List untuk riwayat, bertindak sebagai Stack (Modul 7)
+        # Backend default RiwayatMemori; bisa diganti mis. RiwayatSQLite
+        self.history = history if history is not None else RiwayatMemori()
+        # Sink riwayat: backend riwayat tidak thread-safe, satu penulis pada satu waktu
+        self._kunci_riwayat = threading.Lock()
+        # Cache LRU rencana pembagian per konfigurasi ahli waris
+        self._plan_cache = lru_cache(maxsize=PLAN_CACHE_SIZE)(self._compile_plan)
+        # Mesin aturan berbasis tabel (dikompilasi sekali saat modul dimuat)
+        self.mesin = MESIN_FARAIDH
+        self._plan_lengkap_cache = lru_cache(maxsize=PLAN_CACHE_SIZE)(self._compile_plan_lengkap)
+        # Rekaman unik (inputs -> hasil) yang dipakai bersama oleh entri riwayat
+        self.hasil_unik = HasilUnik()
+        # Instrumentasi per fase (None = nonaktif)
+        self.instrumentasi = None
+        # (kunci, rencana) terakhir yang dipakai pratinjau; satu tuple agar diganti secara atomik
+        self._preview = (None, None)
+
+    # Method utama perhitungan (Modul 4)
+    def hitung(self, total, ayah=False, ibu=False, suami=False, istri=False, anak_laki=0, anak_perempuan=0):
+        """Hitung satu kasus tanpa efek samping: tidak menulis riwayat, reentrant dan thread-safe."""
+        _cek_total(total)
+        return self._hitung(total, ayah, ibu, suami, istri, anak_laki, anak_perempuan)
+
+    def compute(self, total, ayah=False, ibu=False, suami=False, istri=False, anak_laki=0, anak_perempuan=0):
+        """Hitung satu kasus lalu catat ke riwayat (lihat hitung() untuk versi tanpa riwayat)."""
+        _cek_total(total)
+        _cek_riwayat(total, anak_laki, anak_perempuan)
+
+        ins = self.instrumentasi
+        if ins is not None:
+            return self._compute_terukur(ins, total, ayah, ibu, suami, istri, anak_laki, anak_perempuan)
+
+        # Kasus yang pernah dihitung dipakai ulang dari penyimpanan hasil unik
+        inputs, hasil = self.hasil_unik.ambil(
+            (total, ayah, ibu, suami, istri, anak_laki, anak_perempuan),
+            lambda: ({'ayah': ayah, 'ibu': ibu, 'suami': suami, 'istri': istri,
+                      'anak_laki': anak_laki, 'anak_perempuan': anak_perempuan},
+                     self._hitung(total, ayah, ibu, suami, istri, anak_laki, anak_perempuan)))
+        self._simpan_riwayat(total, inputs, hasil)
+        return hasil
+
+    def preview(self, total, ayah=False, ibu=False, suami=False, istri=False, anak_laki=0, anak_perempuan=0):
+        """Hitung seperti compute() tetapi tanpa menulis riwayat (pratinjau langsung).
+
+        Jika konfigurasi ahli waris sama dengan pratinjau sebelumnya, rencananya
+        dipakai ulang sehingga hanya perkalian dengan total yang dikerjakan.
+        """
+        _cek_total(total)
+        kunci = (bool(ayah), bool(ibu), bool(suami), bool(istri), int(anak_laki), int(anak_perempuan))
+        kunci_lama, plan = self._preview
+        if kunci != kunci_lama:
+            plan = self._plan_cache(*kunci)
+            self._preview = (kunci, plan)
+        return self._terapkan_plan(total, plan)
+
+    def _compute_terukur(self, ins, total, ayah, ibu, suami, istri, anak_laki, anak_perempuan):
+        """compute() dengan pencatatan waktu per fase ke Instrumentasi."""
+        waktu = time.perf_counter
+        def buat():
+            # Fase plan & pembagian hanya terjadi jika kasus belum ada di penyimpanan unik
+            t0 = waktu()
+            plan = self.get_plan(ayah, ibu, suami, istri, anak_laki, anak_perempuan)
+            t1 = waktu()
+            hasil = self._terapkan_plan(total, plan)
+            ins.catat("compute/plan", t1 - t0)
+            ins.catat("compute/pembagian", waktu() - t1)
+            return ({'ayah': ayah, 'ibu': ibu, 'suami': suami, 'istri': istri,
+                     'anak_laki': anak_laki, 'anak_perempuan': anak_perempuan}, hasil)
+        t0 = waktu()
+        inputs, hasil = self.hasil_unik.ambil((total, ayah, ibu, suami, istri, anak_laki, anak_perempuan), buat)
+        t1 = waktu()
+        self._simpan_riwayat(total, inputs, hasil)
+        t2 = waktu()
+        ins.catat("compute/hasil", t1 - t0)
+        ins.catat("compute/riwayat", t2 - t1)
+        ins.catat("compute/total", t2 - t0)
+        return hasil
+
+    def _simpan_riwayat(self, total, inputs, hasil):
+        # Simpan riwayat (Modul 7: Stack/Push)
+        append_kasus = getattr(self.history, "append_kasus", None)
+        if append_kasus is not None:
+            # Backend kolom: timestamp diformat hanya saat ditampilkan
+            waktu = time.time()
+            with self._kunci_riwayat:
+                append_kasus(waktu, total, inputs['ayah'], inputs['ibu'], inputs['suami'], inputs['istri'],
+                             inputs['anak_laki'], inputs['anak_perempuan'], hasil)
+            return
+        # inputs dan hasil dipakai bersama oleh entri lain dengan kasus yang sama
+        entry = {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'total': round(total),
+            'inputs': inputs,
+            'hasil': hasil
+        }
+        with self._kunci_riwayat:
+            self.history.append(entry)
+
+    def tulis_riwayat(self, entries):
+        """Sisipkan entri (dict) ke riwayat lewat lock yang sama dengan compute()."""
+        simpan = getattr(self.history, "extend", None)
+        with self._kunci_riwayat:
+            if simpan is not None:
+                simpan(entries)
+            else:
+                for entry in entries:
+                    self.history.append(entry)
+
+    def _hitung(self, total, ayah, ibu, suami, istri, anak_laki, anak_perempuan):
+        """Inti perhitungan satu kasus (tanpa validasi dan tanpa riwayat)."""
+        return self._terapkan_plan(total, self.get_plan(ayah, ibu, suami, istri, anak_laki, anak_perempuan))
+
+    @staticmethod
+    def _terapkan_plan(total, plan):
+        """Bagikan total harta (rupiah bulat) sesuai rencana dengan aritmetika int eksak.
+
+        Tiap kelas mendapat floor(total * bobot / penyebut). Rupiah yang
+        tersisa karena pembulatan ke bawah diberikan satu per satu kepada
+        kelas dengan sisa pembagian terbesar (largest remainder; seri diputus
+        menurut urutan baris), sehingga jumlah semua baris tepat sama dengan
+        total. Bagian dasar per anak = bagian kelas // jumlah anak; sisanya
+        dibagikan HasilWarisan satu rupiah per anak ke anak-anak pertama.
+        Baris Sisa yang bernilai Rp 0 setelah alokasi tidak dicantumkan.
+        """
+        rp = round(total)
+        penyebut = plan.penyebut
+        # Perulangan atas rencana yang sudah dikompilasi (Modul 3)
+        bagian = [rp * b // penyebut for b in plan.bobot]
+        kurang = rp * plan.total_bobot // penyebut - sum(bagian)
+        if kurang == 1:
+            # Kasus paling umum; max() mengembalikan indeks pertama jika seri
+            sisa = [rp * b % penyebut for b in plan.bobot]
+            bagian[max(range(len(sisa)), key=sisa.__getitem__)] += 1
+        elif kurang:
+            sisa = [rp * b % penyebut for b in plan.bobot]
+            for i in sorted(range(len(sisa)), key=sisa.__getitem__, reverse=True)[:kurang]:
+                bagian[i] += 1
+        return HasilWarisan([(label, v, jumlah, label_anak, v // jumlah if jumlah else 0)
+                             for (label, _, jumlah, label_anak, _), v in zip(plan, bagian)
+                             if v or label != LABEL_SISA])
+
+    # --- RENCANA PEMBAGIAN (PLAN) ---
+    def get_plan(self, ayah=False, ibu=False, suami=False, istri=False, anak_laki=0, anak_perempuan=0):
+        """Ambil rencana pembagian untuk satu konfigurasi ahli waris (ber-cache).
+
+        Rencana adalah RencanaWarisan: tuple baris (label, pecahan, jumlah_anak,
+        label_anak, pecahan_per_anak) dengan pecahan eksak; bagian rupiah
+        dialokasikan dari total oleh _terapkan_plan.
+        """
+        return self._plan_cache(bool(ayah), bool(ibu), bool(suami), bool(istri),
+                                int(anak_laki), int(anak_perempuan))
+
+    def plan_cache_info(self):
+        """Statistik cache rencana (hits, misses, maxsize, currsize)."""
+        return self._plan_cache.cache_info()
+
+    # --- INSTRUMENTASI ---
+    def enable_instrumentasi(self):
+        """Aktifkan pencatatan waktu per fase; kembalikan objek Instrumentasi."""
+        if self.instrumentasi is None:
+            self.instrumentasi = Instrumentasi()
+        return self.instrumentasi
+
+    def disable_instrumentasi(self):
+        self.instrumentasi = None
+
+    def instrumentasi_stats(self):
+        """Statistik fase (kosong jika nonaktif) ditambah penghitung cache rencana & dedup."""
+        info = self.plan_cache_info()
+        return {'aktif': self.instrumentasi is not None,
+                'fase': self.instrumentasi.stats() if self.instrumentasi is not None else {},
+                'plan_cache': {'hits': info.hits, 'misses': info.misses, 'currsize': info.currsize,
+                               'maxsize': info.maxsize},
+                'dedup': self.hasil_unik.info(),
+                'riwayat': len(self.history)}
+
+    def _compile_plan(self, ayah, ibu, suami, istri, anak_laki, anak_perempuan):
+        """Evaluasi tabel aturan sekali untuk konfigurasi ini (pecahan eksak).
+
+        Struktur bagian tetap + Awl di-cache oleh MesinFaraidh per mask
+        fakta (ada/tidaknya tiap ahli waris), sehingga perubahan jumlah anak
+        umumnya hanya mengulang pembagian ashabah.
+        """
+        return self._compile_plan_lengkap(
+            self.mesin.vektor_input(ayah, ibu, suami, istri, anak_laki, anak_perempuan), False)
+
+    def _compile_plan_lengkap(self, jumlah, radd, pakai_cache=True):
+        """Rencana dari vektor jumlah ahli waris (urutan ATURAN_AHLI_WARIS)."""
+        ins = self.instrumentasi
+        t0 = time.perf_counter() if ins is not None else 0
+        baris = self.mesin.evaluasi(jumlah, radd, pakai_cache)
+        if ins is not None:
+            t1 = time.perf_counter(); ins.catat("plan/evaluasi", t1 - t0); t0 = t1
+
+        # Susun rencana; pecahan tetap eksak, penyebut bersama dihitung sekali
+        plan = RencanaWarisan([(label, pecahan, jumlah_orang, label_per,
+                                Fraction(pecahan.numerator, pecahan.denominator * jumlah_orang) if jumlah_orang else 0)
+                               for label, pecahan, jumlah_orang, label_per in baris])
+        if ins is not None:
+            ins.catat("plan/susun", time.perf_counter() - t0)
+        return plan
+
+    def get_plan_lengkap(self, radd=False, **ahli_waris):
+        """Rencana untuk himpunan ahli waris lengkap (kunci ATURAN_AHLI_WARIS), ber-cache."""
+        return self._plan_lengkap_cache(self.mesin.vektor(ahli_waris), bool(radd))
+
+    def hitung_lengkap(self, total, radd=False, **ahli_waris):
+        """Hitung dengan ahli waris tambahan dari tabel aturan (tanpa riwayat).
+
+        ahli_waris memakai kunci ATURAN_AHLI_WARIS, mis. kakek=True, nenek=True,
+        cucu_laki=2, saudara_perempuan=1. radd=True mengembalikan sisa yang tidak
+        punya ashabah kepada ashabul furudh selain suami/istri.
+        """
+        # Pengkondisian (Modul 2)
+        _cek_total(total)
+        if ahli_waris.get('suami') and ahli_waris.get('istri'):
+            raise ValueError("Pilih Suami ATAU Istri, tidak keduanya.")
+        return self._terapkan_plan(total, self.get_plan_lengkap(radd=radd, **ahli_waris))
+
+    # --- PERHITUNGAN VARIAN (INKREMENTAL) ---
+    def hitung_varian(self, dasar, verifikasi=False, **perubahan):
+        """Hitung varian dari kasus sebelumnya dengan sebagian input diubah.
+
+        dasar adalah entri riwayat (atau hasil hitung_varian sebelumnya) yang
+        memiliki 'total' dan 'inputs'; perubahan berupa total= dan/atau kunci
+        INPUT_KEYS. Hanya bagian yang terpengaruh yang dihitung ulang: jika
+        konfigurasi ahli waris sama, rencana lama cukup dikalikan total baru;
+        jika hanya jumlah anak berubah (dan ahli waris yang ada tetap sama),
+        struktur bagian tetap diambil dari cache mesin dan hanya ashabah yang
+        dibagi ulang.
+        Hasil tidak disimpan ke riwayat. verifikasi=True membandingkan dengan
+        perhitungan penuh tanpa cache.
+        """
+        asing = set(perubahan) - set(INPUT_KEYS) - {'total'}
+        if asing:
+            raise ValueError(f"Input tidak dikenal: {', '.join(sorted(asing))}")
+        inputs = dict(dasar['inputs'])
+        inputs.update((k, v) for k, v in perubahan.items() if k != 'total')
+        total = perubahan.get('total', dasar['total'])
         # Pengkondisian (Modul 2)
-        if ctx.get('jumlah_anak', 0) > 0:
-            return harta * (1/6)
-        return harta * (1/3)
+        _cek_total(total)
+        if inputs['anak_laki'] < 0 or inputs['anak_perempuan'] < 0:
+            raise ValueError("Jumlah anak tidak boleh negatif.")
+
+        hasil = self._terapkan_plan(total, self.get_plan(*(inputs[k] for k in INPUT_KEYS)))
+        if verifikasi:
+            jumlah = self.mesin.vektor({k: inputs[k] for k in INPUT_KEYS})
+            penuh = self._terapkan_plan(total, self._compile_plan_lengkap(jumlah, False, pakai_cache=False))
+            if tuple(penuh.baris) != tuple(hasil.baris):
+                raise RuntimeError(f"Hasil varian berbeda dari perhitungan penuh untuk {inputs} (total {total}).")
+        return {'total': round(total), 'inputs': inputs, 'hasil': hasil}
+
+    def sweep_varian(self, dasar, **rentang):
+        """Hitung semua kombinasi varian; setiap argumen berupa urutan nilai.
+
+        Total diputar paling dalam sehingga setiap konfigurasi ahli waris
+        hanya mengambil rencananya sekali. Menghasilkan dict seperti
+        hitung_varian, satu per kombinasi.
+        """
+        totals = list(rentang.pop('total', [dasar['total']]))
+        if not totals:
+            return
+        kunci = list(rentang)
+        # Perulangan bersarang via product (Modul 3)
+        for nilai in itertools.product(*(rentang[k] for k in kunci)):
+            varian = self.hitung_varian(dasar, total=totals[0], **dict(zip(kunci, nilai)))
+            yield varian
+            plan = self.get_plan(*(varian['inputs'][k] for k in INPUT_KEYS))
+            for total in totals[1:]:
+                _cek_total(total)
+                yield {'total': round(total), 'inputs': varian['inputs'], 'hasil': self._terapkan_plan(total, plan)}
+
+    # --- PERHITUNGAN MASSAL (KOLOM) ---
+    def compute_batch(self, total, ayah=None, ibu=None, suami=None, istri=None, anak_laki=None, anak_perempuan=None):
+        """Hitung banyak kasus sekaligus dari kolom-kolom input.
+
+        Setiap argumen adalah urutan sepanjang jumlah kasus (None berarti
+        semua False/0). Hasilnya berupa kolom: dict label -> urutan rupiah,
+        dengan 0 untuk ahli waris yang tidak mendapat bagian. Bagian per anak
+        disimpan sekali per baris di kolom LABEL_PER_ANAK_LAKI dan
+        LABEL_PER_ANAK_PEREMPUAN. Nilainya identik dengan compute() per baris,
+        namun tidak menambah riwayat.
+        """
+        if _import_numpy() is not None:
+            kolom = self._compute_batch_numpy(total, ayah, ibu, suami, istri, anak_laki, anak_perempuan)
+            if kolom is not None:
+                return kolom
+
+        # Tanpa NumPy (atau total terlalu besar untuk int64): perulangan biasa atas inti _hitung (Modul 3)
+        total = list(total)
+        n = len(total)
+        kolom_input = [list(c) if c is not None else [0] * n
+                       for c in (ayah, ibu, suami, istri, anak_laki, anak_perempuan)]
+        for t in total:
+            _cek_total(t)
+        kolom = {label: [0] * n for label in self._label_batch()}
+        for i in range(n):
+            ay, ib, su, ist, laki, perempuan = (c[i] for c in kolom_input)
+            hasil = self._hitung(total[i], bool(ay), bool(ib), bool(su), bool(ist), int(laki), int(perempuan))
+            for label, v, jumlah, label_anak, per in hasil.baris:
+                kolom[label][i] = v
+                if jumlah:
+                    kolom[label_anak][i] = per
+        return kolom
+
+    def _label_batch(self):
+        """Urutan kolom hasil compute_batch."""
+        return [self.ayah.get_nama(), self.ibu.get_nama(), self.suami.get_nama(), self.istri.get_nama(),
+                LABEL_ANAK_PEREMPUAN_1, LABEL_ANAK_PEREMPUAN_TOTAL, LABEL_ANAK_LAKI_TOTAL,
+                LABEL_PER_ANAK_LAKI, LABEL_PER_ANAK_PEREMPUAN, LABEL_SISA]
+
+    def _compute_batch_numpy(self, total, ayah, ibu, suami, istri, anak_laki, anak_perempuan):
+        """Versi vektor compute_batch: satu rencana per konfigurasi unik, alokasi int64 per baris.
+
+        Alokasinya sama dengan _terapkan_plan (floor + largest remainder).
+        Mengembalikan None jika total * penyebut bisa melampaui int64; kasus
+        itu dihitung di jalur skalar yang memakai int Python.
+        """
+        t = np.asarray(total)
+        if t.dtype.kind not in "iuf":
+            return None # Mis. int Python di atas 2^63 (dtype object)
+        n = t.shape[0]
+        def kolom(c):
+            return np.zeros(n, dtype=np.int64) if c is None else np.asarray(c).astype(np.int64)
+        if t.dtype.kind == "f" and not np.isfinite(t).all():
+            return None # inf/nan ditolak _cek_total di jalur skalar
+        if (t <= 0).any():
+            raise ValueError("Total harta harus lebih besar dari 0.")
+        if n and float(t.max()) >= 2.0 ** 62:
+            return None
+        # np.rint = round-half-even, sama dengan round() di jalur skalar
+        rp = np.rint(t).astype(np.int64) if t.dtype.kind == "f" else t.astype(np.int64)
+
+        # Kelompokkan baris berdasarkan konfigurasi ahli waris
+        konfig = np.stack([kolom(ayah) != 0, kolom(ibu) != 0, kolom(suami) != 0, kolom(istri) != 0,
+                           kolom(anak_laki), kolom(anak_perempuan)], axis=1).astype(np.int64)
+        unik, invers = np.unique(konfig, axis=0, return_inverse=True)
+        invers = invers.reshape(-1)
+
+        # Tabel per konfigurasi unik (satu kolom per label): bobot, urutan baris di rencana,
+        # dan untuk kolom per anak: kolom kelasnya serta jumlah anak
+        labels = self._label_batch()
+        k = len(labels)
+        posisi = {label: j for j, label in enumerate(labels)}
+        tabel = []
+        for row in unik.tolist():
+            plan = self.get_plan(*row)
+            baris = plan.__dict__.get('tabel_batch')
+            if baris is None:
+                # Disimpan di rencana (yang ber-cache) agar batch berikutnya tinggal memakai ulang
+                b, o, kl, pb = [0] * k, [k] * k, [-1] * k, [1] * k
+                for j, (label, _, jumlah, label_anak, _) in enumerate(plan):
+                    c = posisi[label]
+                    b[c], o[c] = plan.bobot[j], j
+                    if jumlah:
+                        kl[posisi[label_anak]], pb[posisi[label_anak]] = c, jumlah
+                baris = plan.tabel_batch = b + o + kl + pb + [plan.penyebut]
+            tabel.append(baris)
+        if n and max(int(rp.max()), k + 1) * max(r[-1] for r in tabel) >= 2 ** 63:
+            return None
+        tabel = np.array(tabel, dtype=np.int64)[invers]
+        bobot, urutan, kelas, pembagi = (tabel[:, i * k:(i + 1) * k] for i in range(4))
+        penyebut = tabel[:, -1]
+
+        bagian, sisa = np.divmod(rp[:, None] * bobot, penyebut[:, None])
+        kurang = rp * bobot.sum(axis=1) // penyebut - bagian.sum(axis=1)
+        # Largest remainder: kunci unik per kolom = (sisa, lalu urutan baris rencana yang lebih awal);
+        # kurang < jumlah baris rencana, jadi cukup paling banyak k putaran argmax
+        perlu = np.flatnonzero(kurang)
+        kunci = sisa[perlu] * (k + 1) + (k - urutan[perlu])
+        kurang = kurang[perlu]
+        semua = np.arange(len(perlu))
+        for putaran in range(int(kurang.max()) if len(perlu) else 0):
+            j = kunci.argmax(axis=1)
+            dapat = np.flatnonzero(kurang > putaran)
+            bagian[perlu[dapat], j[dapat]] += 1
+            kunci[semua, j] = -1
+        for c in np.flatnonzero((kelas >= 0).any(axis=0)):
+            baris = np.flatnonzero(kelas[:, c] >= 0)
+            bagian[baris, c] = bagian[baris, kelas[baris, c]] // pembagi[baris, c]
+        return {label: bagian[:, j] for j, label in enumerate(labels)}
+
+    # --- METHOD UNTUK MANAJEMEN RIWAYAT ---
+    def reset_history(self):
+        # Non-Return Method (Modul 4)
+        with self._kunci_riwayat:
+            self.history.clear()
+
+    def hapus_riwayat(self, entry_id):
+        """Hapus satu entri riwayat berdasarkan ID di bawah lock riwayat yang sama dengan compute()."""
+        with self._kunci_riwayat:
+            return self.history.delete_id(entry_id)
+
+    def history_page(self, start, stop):
+        """Ambil riwayat [start, stop) tanpa memuat seluruh riwayat."""
+        if hasattr(self.history, "page"):
+            return self.history.page(start, stop)
+        return self.history[max(start, 0):stop]
+
+    def close(self):
+        """Tutup backend riwayat (jika ada)."""
+        if hasattr(self.history, "close"):
+            self.history.close()
+
+    # --- EXPORT RIWAYAT ---
+    def export_txt(self, path, incremental=False, **opsi):
+        """Export riwayat perhitungan ke file teks."""
+        return self._export(path, self._format_txt, incremental, **opsi)
+
+    def export_csv(self, path, incremental=False, **opsi):
+        """Export riwayat ke CSV (satu baris per perhitungan, satu kolom per ahli waris)."""
+        header = ["no", "id", "timestamp", "total", *INPUT_KEYS, *self._label_batch()]
+        return self._export(path, self._format_csv, incremental, header=self._format_csv_rows([header]), **opsi)
+
+    def export_jsonl(self, path, incremental=False, **opsi):
+        """Export riwayat ke JSON Lines (satu objek JSON per perhitungan)."""
+        return self._export(path, self._format_jsonl, incremental, **opsi)
+
+    def export_bin(self, path, incremental=False, **opsi):
+        """Export riwayat ke file rekaman biner berukuran tetap (baca ulang dengan RiwayatBiner)."""
+        return self._export(path, self._format_bin, incremental, header=RiwayatBiner.header(), **opsi)
+
+    def snapshot_riwayat(self):
+        """Salinan riwayat yang konsisten untuk dibaca thread lain (lihat _export sumber=)."""
+        if hasattr(self.history, "snapshot"):
+            return self.history.snapshot()
+        return _SnapshotRiwayat(list(self.history))
+
+    def _export(self, path, formatter, incremental, header="", sumber=None, progress=None, batal=None):
+        """Tulis riwayat per blok; mode incremental hanya menambah entri baru.
+
+        Pada mode incremental, ID entri terakhir yang sudah diexport
+        (high-water mark) disimpan di file <path>.hwm; export incremental
+        berikutnya dimulai dari entri sesudah ID itu. Export penuh tidak
+        menulis <path>.hwm dan menghapus yang lama (isinya sudah basi).
+        Export penuh ditulis ke <path>.tmp lalu di-rename, sehingga file lama
+        tetap utuh jika export gagal atau dibatalkan; export incremental
+        dipotong kembali ke ukuran semula.
+
+        sumber: snapshot_riwayat() (default: riwayat aktif), progress(selesai,
+        jumlah) dipanggil setiap blok, batal: threading.Event untuk membatalkan.
+        Mengembalikan path, atau None jika dibatalkan.
+        """
+        ins = self.instrumentasi
+        waktu = time.perf_counter
+        t_mulai = waktu() if ins is not None else 0
+        riwayat = sumber if sumber is not None else self.history
+        hwm = self._baca_hwm(path) if incremental and os.path.exists(path) else 0
+        start = riwayat.posisi_setelah(hwm) if hwm else 0
+        jumlah = len(riwayat)
+        baca = riwayat.page if hasattr(riwayat, "page") else (lambda a, b: riwayat[a:b])
+        target = path if hwm else path + ".tmp"
+        selesai = False
+        # Header bytes = formatter menghasilkan bytes (export_bin)
+        mode = ("a" if hwm else "w") + ("b" if isinstance(header, bytes) else "")
+        mode_teks = "b" not in mode
+        try:
+            with open(target, mode, encoding="utf-8" if mode_teks else None, newline="" if mode_teks else None,
+                      buffering=EXPORT_BUFFER) as f:
+                ukuran_awal = f.tell()
+                try:
+                    if not hwm:
+                        f.write(header)
+                    # Perulangan per blok (Modul 3): satu write per blok entri
+                    for awal in range(start, jumlah, EXPORT_BLOCK):
+                        if batal is not None and batal.is_set():
+                            break
+                        if ins is None:
+                            entries = baca(awal, min(awal + EXPORT_BLOCK, jumlah))
+                            f.write(formatter(enumerate(entries, awal + 1)))
+                        else:
+                            t0 = waktu()
+                            entries = baca(awal, min(awal + EXPORT_BLOCK, jumlah))
+                            t1 = waktu()
+                            potongan = formatter(enumerate(entries, awal + 1))
+                            t2 = waktu()
+                            f.write(potongan)
+                            ins.catat("export/baca", t1 - t0)
+                            ins.catat("export/format", t2 - t1)
+                            ins.catat("export/tulis", waktu() - t2)
+                        if entries:
+                            hwm = max(hwm, entries[-1]['id'])
+                        if progress is not None:
+                            progress(min(awal + EXPORT_BLOCK, jumlah) - start, jumlah - start)
+                    else:
+                        selesai = True
+                finally:
+                    if not selesai and target == path:
+                        # Incremental gagal/dibatalkan: buang bagian yang sudah ditambahkan
+                        f.flush()
+                        f.truncate(ukuran_awal)
+        finally:
+            if not selesai and target != path and os.path.exists(target):
+                os.remove(target)
+        if not selesai:
+            return None
+        if target != path:
+            os.replace(target, path)
+        if incremental:
+            self._simpan_hwm(path, hwm)
+        elif os.path.exists(path + ".hwm"):
+            os.remove(path + ".hwm")
+        if ins is not None:
+            ins.catat("export/total", waktu() - t_mulai)
+        return path
+
+    # --- IMPORT RIWAYAT ---
+    def import_riwayat(self, path, format=None, batch=IMPORT_BATCH, progress=None, batal=None):
+        """Muat file export riwayat (txt, jsonl, atau csv) ke riwayat secara streaming.
+
+        File dibaca per baris sehingga memori tetap konstan berapa pun
+        ukurannya; entri disisipkan per `batch` lewat history.extend (satu
+        transaksi di SQLite). Blok yang rusak dilewati dan dilaporkan.
+        format: None = dideteksi dari isi file. progress(byte_dibaca,
+        ukuran_file) dipanggil setiap batch, batal: threading.Event; batch
+        yang sudah disimpan tetap ada jika import dibatalkan.
+
+        Mengembalikan dict laporan: format, diimpor, rusak, galat (daftar
+        (nomor_baris, pesan), paling banyak IMPORT_MAX_GALAT), dibatalkan.
+        """
+        if format is None:
+            format = _deteksi_format_impor(path)
+        if format not in FORMAT_IMPORT:
+            raise ValueError(f"Format import tidak dikenal: {format!r}")
+        ins = self.instrumentasi
+        waktu = time.perf_counter
+        t_mulai = waktu()
+        ukuran = os.path.getsize(path)
+        simpan = self.tulis_riwayat
+        laporan = {'format': format, 'diimpor': 0, 'rusak': 0, 'galat': [], 'dibatalkan': False}
+        unik = {} # Entri dengan input & hasil sama memakai objek yang sama (seperti HasilUnik)
+        antrean = []
+        with open(path, "rb", buffering=EXPORT_BUFFER) as f:
+            pembaca = _PembacaBaris(f)
+            if format == "csv":
+                sumber = _baca_csv(pembaca, self)
+            else:
+                sumber = (_baca_jsonl if format == "jsonl" else _baca_txt)(pembaca)
+            # Perulangan streaming (Modul 3): paling banyak satu batch di memori
+            for nomor, entry in sumber:
+                if batal is not None and batal.is_set():
+                    laporan['dibatalkan'] = True
+                    break
+                if isinstance(entry, ValueError):
+                    laporan['rusak'] += 1
+                    if len(laporan['galat']) < IMPORT_MAX_GALAT:
+                        laporan['galat'].append((nomor, str(entry)))
+                    continue
+                kunci = (_konfigurasi(entry['inputs']), entry['hasil'].baris)
+                rekam = unik.get(kunci)
+                if rekam is None:
+                    if len(unik) >= DEDUP_CACHE_SIZE:
+                        unik.clear()
+                    rekam = unik[kunci] = (entry['inputs'], entry['hasil'])
+                entry['inputs'], entry['hasil'] = rekam
+                antrean.append(entry)
+                if len(antrean) >= batch:
+                    self._simpan_batch(simpan, antrean, laporan)
+                    if progress is not None:
+                        progress(pembaca.posisi, ukuran)
+            else:
+                if antrean:
+                    self._simpan_batch(simpan, antrean, laporan)
+                if progress is not None:
+                    progress(ukuran, ukuran)
+        if ins is not None:
+            ins.catat("import/total", waktu() - t_mulai)
+        return laporan
+
+    def _simpan_batch(self, simpan, antrean, laporan):
+        ins = self.instrumentasi
+        t0 = time.perf_counter() if ins is not None else 0
+        simpan(antrean)
+        if ins is not None:
+            ins.catat("import/simpan", time.perf_counter() - t0)
+        laporan['diimpor'] += len(antrean)
+        antrean.clear()
+
+    @staticmethod
+    def _baca_hwm(path):
+        try:
+            with open(path + ".hwm", encoding="utf-8") as f:
+                return int(json.load(f)["id_terakhir"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    @staticmethod
+    def _simpan_hwm(path, id_terakhir):
+        with open(path + ".hwm", "w", encoding="utf-8") as f:
+            json.dump({"id_terakhir": id_terakhir}, f)
+
+    @staticmethod
+    def _format_txt(block):
+        parts = []
+        # Perulangan (Modul 3) untuk menyusun teks
+        for i, e in block:
+            parts.append(f"=== Riwayat {i} ===\nWaktu: {e['timestamp']}\nTotal Harta: {format_rp(e['total'])}\nInput:\n")
+            # Perulangan (Modul 3) untuk input
+            parts.extend(f"  {k}: {v}\n" for k, v in e['inputs'].items())
+            parts.append("Hasil:\n")
+            # Perulangan (Modul 3) untuk hasil
+            parts.extend(f"  {k}: {v}\n" for k, v in _format_hasil(e['hasil']))
+            parts.append("\n")
+        return "".join(parts)
+
+    def _format_csv(self, block):
+        labels = self._label_batch()
+        rows = []
+        for i, e in block:
+            kolom = _kolom_hasil(e['hasil'])
+            rows.append([i, e['id'], e['timestamp'], e['total'], *(e['inputs'][k] for k in INPUT_KEYS),
+                         *(kolom.get(label, 0) for label in labels)])
+        return self._format_csv_rows(rows)
+
+    @staticmethod
+    def _format_csv_rows(rows):
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+        return buf.getvalue()
+
+    @staticmethod
+    def _format_bin(block):
+        return b"".join([RiwayatBiner.rekaman(e) for _, e in block])
+
+    @staticmethod
+    def _format_jsonl(block):
+        lines = []
+        for i, e in block:
+            hasil = e['hasil']
+            baris = hasil.baris if isinstance(hasil, HasilWarisan) else [(k, v, 0, None, 0) for k, v in hasil.items()]
+            lines.append(json.dumps({'no': i, 'id': e['id'], 'timestamp': e['timestamp'], 'total': e['total'],
+                                     'inputs': e['inputs'], 'hasil': baris}, ensure_ascii=False))
+            lines.append("\n")
+        return "".join(lines)
+
+# --- WIDGET: LISTBOX VIRTUAL (MODUL 8) ---
+class VirtualListbox:
+    """Listbox yang hanya memformat dan menggambar baris yang terlihat.
+
+    Data diambil lewat jumlah() -> banyak baris dan ambil(start, stop) ->
+    list teks baris [start, stop). Semua indeks (seleksi, see, on_select)
+    adalah indeks absolut pada sumber data, bukan posisi di layar. Teks
+    sebuah baris dianggap tidak bergantung pada posisinya, sehingga hapus
+    dan tambah cukup memperbarui satu baris layar.
+
+    versi() (opsional) mengembalikan penghitung perubahan sumber data
+    (lihat RiwayatMemori.versi); dipakai sinkron() untuk mengenali
+    perubahan yang tidak mengubah jumlah baris.
+    """
+    def __init__(self, parent, jumlah, ambil, on_select=None, height=20, versi=None, **kw):
+        _import_gui()
+        self._jumlah = jumlah
+        self._versi = versi
+        self._ambil = ambil
+        self._on_select = on_select
+        self._height = height
+        self._top = 0 # Indeks data pada baris layar pertama
+        self._selected = None
+        self.frame = tk.Frame(parent, bg=PANEL_BG)
+        self.listbox = tk.Listbox(self.frame, height=height, exportselection=False, **kw)
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self._on_scroll)
+        self.listbox.pack(side="left", fill="y")
+        self.scrollbar.pack(side="left", fill="y")
+
+        # Binding scroll & keyboard (Modul 8)
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", self._on_wheel)
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_break(-3))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_break(3))
+        self.listbox.bind("<Up>", lambda e: self._geser_seleksi(-1))
+        self.listbox.bind("<Down>", lambda e: self._geser_seleksi(1))
+        self.refresh()
+
+    def pack(self, **kw):
+        self.frame.pack(**kw)
+
+    def winfo_exists(self):
+        return self.frame.winfo_exists()
+
+    # --- Render ---
+    def _max_top(self):
+        return max(self._jumlah() - self._height, 0)
+
+    def _catat(self):
+        """Simpan jumlah baris dan versi sumber yang sudah tergambar; kembalikan jumlah."""
+        self._v = self._versi() if self._versi is not None else None
+        self._n = self._jumlah()
+        return self._n
+
+    def refresh(self):
+        """Gambar ulang seluruh viewport (sumber data berubah total)."""
+        n = self._catat()
+        if self._selected is not None and self._selected >= n:
+            self._selected = None
+        self._top = min(self._top, self._max_top())
+        self._render(0)
+
+    def _render(self, dari_baris):
+        """Gambar ulang baris layar mulai dari dari_baris sampai bawah viewport."""
+        self.listbox.delete(dari_baris, tk.END)
+        teks = self._ambil(self._top + dari_baris, self._top + self._height)
+        if teks:
+            self.listbox.insert(tk.END, *teks)
+        self._render_seleksi()
+        self._update_scrollbar()
+
+    def _render_seleksi(self):
+        self.listbox.select_clear(0, tk.END)
+        if self._selected is not None and self._top <= self._selected < self._top + self._height:
+            self.listbox.select_set(self._selected - self._top)
 
-class Suami(AhliWaris):
-    """Suami mendapatkan 1/4 (ada anak) atau 1/2 (tidak ada anak)."""
-    def __init__(self): super().__init__("👨‍🦱 Suami")
-    # Polymorphism: Logika bagian Suami
-    def get_bagian(self, harta, ctx):
-        if not ctx.get('suami', False): return 0
-        # Pengkondisian (Modul 2)
-        if ctx.get('jumlah_anak', 0) > 0:
-            return harta * (1/4)
-        return harta * (1/2)
+    def _update_scrollbar(self):
+        n = self._jumlah()
+        if n == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self._top / n, min(self._top + self._height, n) / n)
 
-class Istri(AhliWaris):
-    """Istri mendapatkan 1/8 (ada anak) atau 1/4 (tidak ada anak)."""
-    def __init__(self): super().__init__("👩‍🦰 Istri")
-    # Polymorphism: Logika bagian Istri
-    def get_bagian(self, harta, ctx):
-        if not ctx.get('istri', False): return 0
-        # Pengkondisian (Modul 2)
-        if ctx.get('jumlah_anak', 0) > 0:
-            return harta * (1/8)
-        return harta * (1/4)
+    # --- Navigasi ---
+    def scroll_to(self, top):
+        top = max(0, min(int(top), self._max_top()))
+        if top != self._top:
+            self._top = top
+            self._render(0)
 
-class Anak(AhliWaris):
-    """Kelas untuk menampung jumlah anak dan menghitung unit ashabah."""
-    def __init__(self, laki=0, perempuan=0):
-        super().__init__("Anak-anak")
-        self._laki = laki
-        self._perempuan = perempuan
-    # Setter (Modul 6)
-    def set_jumlah(self, laki, perempuan):
-        self._laki = laki
-        self._perempuan = perempuan
-    def total_unit_ashabah(self): 
-        # Laki-laki = 2 unit, Perempuan = 1 unit (Modul 1: Variabel/Tipe Data)
-        return self._laki * 2 + self._perempuan * 1
-    def get_bagian(self, harta, ctx): 
-        # Method ini tidak digunakan untuk perhitungan fixed share
-        return 0 
+    def see(self, idx):
+        if idx < self._top:
+            self.scroll_to(idx)
+        elif idx >= self._top + self._height:
+            self.scroll_to(idx - self._height + 1)
 
-class WarisanCalculator:
-    """Logika inti perhitungan warisan Faraidh."""
-    def __init__(self):
-        # Inisialisasi objek ahli waris (Modul 5)
-        self.ayah = Ayah()
-        self.ibu = Ibu()
-        self.suami = Suami()
-        self.istri = Istri()
-        self.anak = Anak(0,0)
-        # List untuk riwayat, bertindak sebagai Stack (Modul 7)
-        self.history = [] 
+    def _on_scroll(self, *args):
+        # Perintah dari Scrollbar: ("moveto", frac) atau ("scroll", n, "units"/"pages")
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self._jumlah())
+        elif args[0] == "scroll":
+            langkah = int(args[1]) * (self._height if args[2] == "pages" else 1)
+            self.scroll_to(self._top + langkah)
 
-    # Method utama perhitungan (Modul 4)
-    def compute(self, total, ayah=False, ibu=False, suami=False, istri=False, anak_laki=0, anak_perempuan=0):
-        # Pengkondisian (Modul 2)
-        if total <= 0:
-            raise ValueError("Total harta harus lebih besar dari 0.")
+    def _scroll_break(self, langkah):
+        self.scroll_to(self._top + langkah)
+        return "break"
 
-        # Context untuk perhitungan bagian tetap
-        ctx = {
-            'ayah': ayah, 'ibu': ibu, 'suami': suami, 'istri': istri,
-            'jumlah_anak': anak_laki + anak_perempuan
-        }
+    def _on_wheel(self, event):
+        return self._scroll_break(-3 if event.delta > 0 else 3)
 
-        self.anak.set_jumlah(anak_laki, anak_perempuan)
+    # --- Seleksi ---
+    def curselection(self):
+        return () if self._selected is None else (self._selected,)
 
-        hasil = {}
-        fixed_shares = {}
-        total_anak = anak_laki + anak_perempuan
+    def select(self, idx):
+        """Pilih baris data idx dan gulir agar terlihat."""
+        self._selected = idx if 0 <= idx < self._jumlah() else None
+        if self._selected is not None:
+            self.see(idx)
+        self._render_seleksi()
 
-        # 1. Hitung bagian tetap (Ashabul Furudh) - Memanggil get_bagian (Polymorphism)
-        if ayah and total_anak > 0: 
-            fixed_shares[self.ayah.get_nama()] = self.ayah.get_bagian(total, ctx)
-        
-        # Bagian Ibu, Suami, Istri
-        if ibu: fixed_shares[self.ibu.get_nama()] = self.ibu.get_bagian(total, ctx)
-        if suami: fixed_shares[self.suami.get_nama()] = self.suami.get_bagian(total, ctx)
-        if istri: fixed_shares[self.istri.get_nama()] = self.istri.get_bagian(total, ctx)
-
-        # Bagian Anak Perempuan saja (fixed share) - Pengkondisian (Modul 2)
-        if anak_laki == 0 and anak_perempuan > 0:
-            if anak_perempuan == 1:
-                fixed_shares["👧 Anak Perempuan (1)"] = total * 0.5
-            else:
-                fixed_shares["👧 Anak Perempuan (total)"] = total * (2/3)
+    def _on_listbox_select(self, event):
+        sel = self.listbox.curselection()
+        if not sel: return
+        self._selected = self._top + sel[0]
+        if self._on_select:
+            self._on_select(self._selected)
 
-        total_fixed = sum(fixed_shares.values())
+    def _geser_seleksi(self, delta):
+        n = self._jumlah()
+        if n:
+            awal = self._selected if self._selected is not None else self._top
+            self.select(max(0, min(awal + delta, n - 1)))
+            if self._on_select:
+                self._on_select(self._selected)
+        return "break"
 
-        # 2. Aturan Awl - Pengkondisian (Modul 2)
-        if total_fixed > total and anak_laki == 0:
-            scale = total / total_fixed
-            # Perulangan untuk Scale down (Modul 3)
-            for k in list(fixed_shares.keys()):
-                fixed_shares[k] = fixed_shares[k] * scale
-            total_fixed = sum(fixed_shares.values()) # Hitung ulang total fixed setelah Awl
+    # --- Pembaruan inkremental ---
+    def row_appended(self):
+        """Sumber data bertambah satu baris di akhir."""
+        n = self._catat()
+        if self._top <= n - 1 < self._top + self._height:
+            self.listbox.insert(tk.END, *self._ambil(n - 1, n))
+        self._update_scrollbar()
 
-        # Masukkan bagian tetap ke hasil
-        hasil.update(fixed_shares)
-        sisa = total - total_fixed
+    def rows_appended(self, jumlah_baru):
+        """Sumber data bertambah beberapa baris di akhir; viewport mengikuti jika berada di bawah."""
+        n = self._catat()
+        awal = n - jumlah_baru
+        if self._top >= max(awal - self._height, 0):
+            # Baris terakhir sebelumnya terlihat: ikuti data yang masuk
+            top = self._max_top()
+            if top != self._top:
+                self._top = top
+                self._render(0)
+                return
+        if awal < self._top + self._height:
+            self._render(max(awal - self._top, 0))
+        else:
+            self._update_scrollbar()
 
-        # 3. Pembagian Residu (Ashabah)
-        
-        # Ashabah anak-anak (sisa dibagi 2:1) - Pengkondisian (Modul 2)
-        if anak_laki > 0 and sisa > 0:
-            units = self.anak.total_unit_ashabah()
-            if units > 0:
-                # Anak laki-laki
-                if anak_laki > 0:
-                    bagian_laki_total = sisa * ((anak_laki * 2) / units)
-                    hasil["🧒 Anak Laki-laki (total)"] = bagian_laki_total
-                    # Perulangan untuk setiap anak (Modul 3)
-                    per = bagian_laki_total / anak_laki
-                    for i in range(1, anak_laki + 1):
-                        hasil[f"  └─ Anak Laki-laki {i}"] = per
-                # Anak perempuan (ikut ashabah)
-                if anak_perempuan > 0:
-                    # Hapus fixed share anak perempuan jika sudah dihitung di sini
-                    if "👧 Anak Perempuan (total)" in hasil:
-                         del hasil["👧 Anak Perempuan (total)"]
-
-                    bagian_perempuan_total = sisa * ((anak_perempuan * 1) / units)
-                    hasil["👧 Anak Perempuan (total)"] = bagian_perempuan_total
-                    # Perulangan untuk setiap anak (Modul 3)
-                    per = bagian_perempuan_total / anak_perempuan
-                    for i in range(1, anak_perempuan + 1):
-                        hasil[f"  └─ Anak Perempuan {i}"] = per
-                sisa = 0
-
-        # Ashabah Ayah (jika tidak ada anak sama sekali) - Pengkondisian (Modul 2)
-        elif total_anak == 0 and ayah and sisa > 0:
-            # Ayah mengambil sisa (menjadi Ashabah Bin-Nafs)
-            key = self.ayah.get_nama()
-            existing = hasil.get(key, 0)
-            hasil[key] = existing + sisa
-            sisa = 0
-
-        # 4. Finalisasi dan Pembulatan (Modul 4: Safety / Final Rounding)
-        # Perulangan untuk pembulatan (Modul 3)
-        for k in list(hasil.keys()):
-            # Pastikan pembulatan di akhir perhitungan
-            hasil[k] = round(hasil[k])
-
-        # Sisa tidak terdistribusi
-        if sisa > 0:
-            hasil["📦 Sisa (tidak terdistribusi)"] = round(sisa)
-            
-        # Simpan riwayat (Modul 7: Stack/Push)
-        entry = {
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'total': round(total),
-            'inputs': {'ayah': ayah, 'ibu': ibu, 'suami': suami, 'istri': istri,
-                       'anak_laki': anak_laki, 'anak_perempuan': anak_perempuan},
-            'hasil': hasil
-        }
-        self.history.append(entry)
-        return hasil
+    def row_deleted(self, idx):
+        """Baris data idx sudah dihapus; perbarui paling banyak satu baris layar."""
+        self._catat()
+        if self._selected is not None:
+            if self._selected == idx:
+                self._selected = None
+            elif self._selected > idx:
+                self._selected -= 1
+        if idx < self._top:
+            # Baris di atas viewport: isi layar tidak berubah
+            self._top -= 1
+        elif idx < self._top + self._height:
+            self.listbox.delete(idx - self._top)
+            if self._top > self._max_top():
+                # Data di bawah habis: geser viewport satu baris ke atas
+                self._top -= 1
+                self.listbox.insert(0, *self._ambil(self._top, self._top + 1))
+            else:
+                bawah = self._top + self.listbox.size()
+                teks = self._ambil(bawah, min(bawah + 1, self._top + self._height))
+                if teks:
+                    self.listbox.insert(tk.END, *teks)
+        self._render_seleksi()
+        self._update_scrollbar()
 
-    # --- METHOD UNTUK MANAJEMEN RIWAYAT ---
-    def reset_history(self):
-        # Non-Return Method (Modul 4)
-        self.history.clear()
+    def sinkron(self):
+        """Susulkan perubahan sumber data yang tidak diberitahukan; True jika ada perubahan.
 
-    def export_txt(self, path):
-        """Export riwayat perhitungan ke file teks."""
-        # Perulangan (Modul 3) untuk menulis data
-        with open(path, "w", encoding="utf-8") as f:
-            for i, e in enumerate(self.history, 1):
-                f.write(f"=== Riwayat {i} ===\n")
-                f.write(f"Waktu: {e['timestamp']}\n")
-                f.write(f"Total Harta: {format_rp(e['total'])}\n")
-                f.write("Input:\n")
-                # Perulangan (Modul 3) untuk input
-                for k, v in e['inputs'].items(): 
-                    f.write(f"  {k}: {v}\n")
-                f.write("Hasil:\n")
-                # Perulangan (Modul 3) untuk hasil
-                for k, v in e['hasil'].items(): 
-                    f.write(f"  {k}: {format_rp(v)}\n")
-                f.write("\n")
-        return path
+        Jika hanya ada baris baru di akhir (selisih versi sama dengan selisih
+        jumlah, atau jumlah bertambah tanpa versi()) baris itu cukup
+        ditambahkan seperti rows_appended; selain itu (hapus, hapus lalu
+        tambah, sisip di tengah) seluruh viewport digambar ulang.
+        """
+        n = self._jumlah()
+        v = self._versi() if self._versi is not None else None
+        if n == self._n and v == self._v:
+            return False
+        if v is None or self._v is None:
+            hanya_tambah = v is self._v
+        else:
+            hanya_tambah = v - self._v == n - self._n
+        if n > self._n and hanya_tambah:
+            self.rows_appended(n - self._n)
+        else:
+            self.refresh()
+        return True
 
 # --- KELAS UTAMA GUI (MODUL 8: GUI Programming) ---
 class AppWarisanUI:
-    def __init__(self, root):
+    def __init__(self, root, calc=None):
         # Constructor (Modul 5)
+        _import_gui()
         self.root = root
         root.title("🕌 Warisan — Aplikasi Penghitung Faraidh")
         root.geometry("980x700")
         root.configure(bg=BG_MAIN)
-        self.calc = WarisanCalculator() # Membuat objek kalkulator (Modul 5)
+        self.calc = calc if calc is not None else WarisanCalculator() # Membuat objek kalkulator (Modul 5)
+        self._filter_riwayat = None # Hasil filter view Riwayat (None = semua)
 
         main = tk.Frame(root, bg=BG_MAIN)
         main.pack(fill="both", expand=True) # Layout Management (Modul 8)
@@ -281,16 +2854,25 @@ class AppWarisanUI:
         self.subheader = tk.Label(self.content, text="", font=FONT_SUB, bg=CONTENT_BG, fg=ACCENT_GOLD)
         self.subheader.pack(pady=(0,8))
         
+        # Job after() yang masih tertunda per widget, agar render baru membatalkan yang lama
+        self._render_jobs = {}
+        # (thread, Event batal) export latar yang sedang berjalan
+        self._export_aktif = None
+        # Keadaan Hitung Massal terakhir (tetap ada saat berpindah view)
+        self._batch = None
+
         # Efek pengetikan (opsional tapi menarik)
-        root.after(150, lambda: self._fade_in_label(self.header, "Aplikasi Penghitung Warisan", delay=18))
-        root.after(500, lambda: self._fade_in_label(self.subheader, "Selamat Mencoba!", delay=16))
+        self._jadwalkan(self.header, 150, self._fade_in_label, self.header, "Aplikasi Penghitung Warisan", 18)
+        self._jadwalkan(self.subheader, 500, self._fade_in_label, self.subheader, "Selamat Mencoba!", 16)
 
         # Button Sidebar
         self.menu_buttons = {}
         menu_items = [
             ("Hitung Warisan", self.show_hitung_view),
+            ("Hitung Massal (CSV)", self.show_batch_view),
             ("Riwayat Perhitungan", self.show_riwayat_view),
             ("Penjelasan Warisan", self.show_penjelasan_view),
+            ("Diagnostik", self.show_diagnostik_view),
             ("Keluar", self.on_quit)
         ]
         # Perulangan untuk membuat tombol (Modul 3)
@@ -307,36 +2889,91 @@ class AppWarisanUI:
             b.bind("<ButtonRelease-1>", lambda e, w=b: w.config(relief="raised"))
             self.menu_buttons[label] = b
 
+        # Frame tiap view dibangun sekali saat pertama dikunjungi, lalu hanya disembunyikan
+        self._views = {}
         self.current_view = None
         self.show_hitung_view()
 
     # --- UI HELPERS (MODUL 4: Method) ---
+    def _jadwalkan(self, widget, delay, fn, *args):
+        """after() yang menggantikan job tertunda sebelumnya milik widget yang sama."""
+        self._batalkan_render(widget)
+        self._render_jobs[str(widget)] = widget.after(delay, fn, *args)
+
+    def _batalkan_render(self, widget):
+        job = self._render_jobs.pop(str(widget), None)
+        if job is not None:
+            try:
+                widget.after_cancel(job)
+            except tk.TclError:
+                pass
+
     def _fade_in_label(self, label, text, delay=20):
-        """Menampilkan teks huruf demi huruf."""
+        """Menampilkan teks huruf demi huruf (atau sekaligus jika animasi dimatikan)."""
         # Non-Return Method (Modul 4)
-        label.config(text="")
+        self._render_jobs.pop(str(label), None)
+        if not RENDER_ANIMASI_LABEL:
+            label.config(text=text)
+            return
         def step(i=0):
-            if i <= len(text):
-                label.config(text=text[:i])
-                label.after(delay, step, i+1)
+            self._render_jobs.pop(str(label), None)
+            if not label.winfo_exists():
+                return
+            label.config(text=text[:i])
+            if i < len(text):
+                self._jadwalkan(label, delay, step, i+1)
         step()
 
-    def _fade_insert_lines(self, text_widget, lines, delay=40):
-        """Memasukkan baris demi baris ke dalam Text widget."""
+    def _render_lines(self, text_widget, lines, frame_ms=RENDER_FRAME_MS):
+        """Memasukkan baris ke Text widget per blok dalam anggaran waktu satu frame.
+
+        Render baru membatalkan render lama yang belum selesai pada widget yang sama,
+        sehingga hasil dua perhitungan tidak pernah saling menyisip.
+        """
         # Non-Return Method (Modul 4)
+        self._batalkan_render(text_widget)
         text_widget.delete("1.0", tk.END)
+        anggaran = frame_ms / 1000
         def step(i=0):
+            self._render_jobs.pop(str(text_widget), None)
+            if not text_widget.winfo_exists():
+                return
+            batas = time.perf_counter() + anggaran
+            blok = 64
+            # Perulangan per blok (Modul 3): satu insert per blok baris
+            while i < len(lines):
+                text_widget.insert(tk.END, "\n".join(lines[i:i + blok]) + "\n")
+                i += blok
+                if time.perf_counter() >= batas:
+                    break
+                blok *= 2
             if i < len(lines):
-                text_widget.insert(tk.END, lines[i] + "\n")
-                text_widget.after(delay, step, i+1)
+                self._jadwalkan(text_widget, 1, step, i)
         step()
 
-    def clear_content(self):
-        """Hapus widget konten kecuali header & subheader."""
+    def _tampilkan_view(self, nama, label_text, bangun):
+        """Tampilkan frame view `nama`; True jika frame baru saja dibangun.
+
+        View dibangun lewat bangun(wadah) hanya pada kunjungan pertama.
+        Berpindah view cukup menyembunyikan frame lama (pack_forget), sehingga
+        isi input, seleksi dan posisi scroll tetap seperti ditinggalkan.
+        """
         # Non-Return Method (Modul 4)
-        for child in list(self.content.pack_slaves()):
-            if child not in (self.header, self.subheader):
-                child.destroy()
+        self.mark_active(label_text)
+        if self.current_view == nama:
+            return False
+        lama = self._views.get(self.current_view)
+        if lama is not None:
+            lama.pack_forget()
+        wadah = self._views.get(nama)
+        baru = wadah is None
+        if baru:
+            wadah = self._views[nama] = tk.Frame(self.content, bg=CONTENT_BG)
+        wadah.pack(fill="both", expand=True)
+        self.current_view = nama
+        if baru:
+            bangun(wadah)
+        return baru
 
     def mark_active(self, label_text):
         """Highlight tombol aktif di sidebar."""
@@ -350,11 +2987,11 @@ class AppWarisanUI:
     # --- VIEW: Hitung Warisan (MODUL 8: Layout) ---
     def show_hitung_view(self):
         # Method untuk menampilkan view (Modul 8)
-        self.clear_content()
-        self.mark_active("Hitung Warisan")
+        self._tampilkan_view("hitung", "Hitung Warisan", self._bangun_hitung_view)
 
+    def _bangun_hitung_view(self, wadah):
         # Frame utama input dan output (Modul 8)
-        panel = tk.Frame(self.content, bg=PANEL_BG, bd=2, relief="groove")
+        panel = tk.Frame(wadah, bg=PANEL_BG, bd=2, relief="groove")
         panel.pack(padx=16, pady=8, fill="x")
 
         # Kolom Input (Left)
@@ -385,9 +3022,12 @@ class AppWarisanUI:
         # Tombol Aksi (Modul 8)
         btns = tk.Frame(left, bg=PANEL_BG)
         btns.grid(row=4, column=0, columnspan=2, pady=(12,0))
-        tk.Button(btns, text="🔍 Hitung", bg=SIDEBAR_BTN, fg=WHITE, command=self.action_hitung, bd=0, padx=12, pady=6).grid(row=0, column=0, padx=6)
+        tk.Button(btns, text="🔍 Hitung & Simpan", bg=SIDEBAR_BTN, fg=WHITE, command=self.action_hitung, bd=0, padx=12, pady=6).grid(row=0, column=0, padx=6)
         tk.Button(btns, text="♻ Reset Input", bg=BTN_RESET, fg=WHITE, command=self.action_reset_inputs, bd=0, padx=10, pady=6).grid(row=0, column=1, padx=6)
         tk.Button(btns, text="💾 Export Riwayat", bg=ACCENT_GOLD, fg=WHITE, command=self.action_export, bd=0, padx=10, pady=6).grid(row=0, column=2, padx=6)
+        self.c_live = tk.BooleanVar(value=True)
+        tk.Checkbutton(left, text="⚡ Pratinjau langsung (riwayat disimpan saat Hitung)", bg=PANEL_BG,
+                       variable=self.c_live, command=self._jadwalkan_preview).grid(row=5, column=0, columnspan=2, sticky="w", pady=(8,0))
 
         # Kolom Output (Right) (Modul 8)
         right = tk.Frame(panel, bg=PANEL_BG)
@@ -397,34 +3037,305 @@ class AppWarisanUI:
         self.txt_hasil = tk.Text(right, height=16, bg=CONTENT_BG, font=FONT_SMALL, bd=0)
         self.txt_hasil.pack(fill="both", expand=True, pady=(4,0))
 
-        self.current_view = "hitung"
+        # Binding perubahan input ke pratinjau langsung (Modul 8: Event)
+        for ent in (self.ent_harta, self.ent_laki, self.ent_perempuan):
+            ent.bind("<KeyRelease>", lambda e: self._jadwalkan_preview())
+        for var in (self.c_ayah, self.c_ibu, self.c_suami, self.c_istri):
+            var.trace_add("write", lambda *a: self._jadwalkan_preview())
+
+    # --- VIEW: Hitung Massal dari CSV (MODUL 8: Layout) ---
+    def show_batch_view(self):
+        # Method untuk menampilkan view (Modul 8)
+        self._tampilkan_view("batch", "Hitung Massal (CSV)", self._bangun_batch_view)
+
+    def _bangun_batch_view(self, wadah):
+        panel = tk.Frame(wadah, bg=PANEL_BG, bd=2, relief="groove")
+        panel.pack(padx=16, pady=8, fill="both", expand=True)
+
+        # Tombol kontrol (Modul 8)
+        ctrl = tk.Frame(panel, bg=PANEL_BG)
+        ctrl.pack(anchor="w", padx=8, pady=(10,4))
+        tk.Button(ctrl, text="📂 Pilih CSV", bg=SIDEBAR_BTN, fg=WHITE, bd=0, padx=10, pady=4,
+                  command=self.action_batch_pilih).pack(side="left", padx=4)
+        self.btn_batch_jeda = tk.Button(ctrl, text="⏸ Jeda", bg=SIDEBAR_BTN, fg=WHITE, bd=0, padx=10, pady=4,
+                                        command=self.action_batch_jeda)
+        self.btn_batch_jeda.pack(side="left", padx=4)
+        tk.Button(ctrl, text="✖ Batal", bg=BTN_RESET, fg=WHITE, bd=0, padx=10, pady=4,
+                  command=self.action_batch_batal).pack(side="left", padx=4)
+        self.btn_batch_simpan = tk.Button(ctrl, text="💾 Simpan ke Riwayat", bg=ACCENT_GOLD, fg=WHITE, bd=0, padx=10, pady=4,
+                                          command=self.action_batch_simpan)
+        self.btn_batch_simpan.pack(side="left", padx=4)
+
+        # Progres (Modul 8)
+        prog = tk.Frame(panel, bg=PANEL_BG)
+        prog.pack(anchor="w", padx=12, pady=(2,6))
+        self.bar_batch = tk.Canvas(prog, width=400, height=14, bg=CONTENT_BG, highlightthickness=0)
+        self.bar_batch.pack(side="left")
+        self.isi_batch = self.bar_batch.create_rectangle(0, 0, 0, 14, fill=SIDEBAR_BTN, width=0)
+        self.lbl_batch = tk.Label(prog, text="", bg=PANEL_BG, font=FONT_SMALL, fg=TEXT_COLOR)
+        self.lbl_batch.pack(side="left", padx=8)
+
+        # Tabel hasil: Listbox virtual, baris diformat hanya saat terlihat
+        tk.Label(panel, text=f"{'Baris':>6}  {'Total Harta':>22}  {'Ahli Waris':<16} Bagian (Rp)", bg=PANEL_BG,
+                 font=("Courier", 10, "bold"), fg=TEXT_COLOR).pack(anchor="w", padx=8)
+        self.lb_batch = VirtualListbox(panel, jumlah=self._batch_jumlah, ambil=self._ambil_batch_labels,
+                                       on_select=self.on_select_batch, width=110, height=14, font=("Courier", 10))
+        self.lb_batch.pack(padx=8, anchor="w")
+        self.txt_batch_detail = tk.Text(panel, height=8, bg=CONTENT_BG, font=FONT_SMALL, bd=0)
+        self.txt_batch_detail.pack(fill="both", expand=True, padx=8, pady=(6,8))
+
+        self._segarkan_batch_status()
+
+    def _batch_view_ada(self):
+        # Tabel tetap diperbarui meskipun view sedang tersembunyi
+        return "batch" in self._views
+
+    def _batch_jumlah(self):
+        return len(self._batch['hasil']) if self._batch is not None else 0
+
+    def _ambil_batch_labels(self, start, stop):
+        if self._batch is None:
+            return []
+        return [self._format_baris_batch(item) for item in self._batch['hasil'][start:stop]]
+
+    @staticmethod
+    def _format_baris_batch(item):
+        """Teks satu baris tabel Hitung Massal."""
+        nomor, kasus, hasil = item
+        if hasil is None:
+            return f"{nomor:>6}  ✖ {kasus}"
+        total, ayah, ibu, suami, istri, laki, perempuan = kasus
+        ahli = " ".join(k for k, v in (("Ay", ayah), ("Ib", ibu), ("Su", suami), ("Is", istri)) if v)
+        ahli = f"{ahli} L{laki} P{perempuan}".strip()
+        bagian = " · ".join(f"{label.split(' ', 1)[-1]} {v:,}" for label, v, _, _, _ in hasil.baris)
+        return f"{nomor:>6}  {format_rp(total):>22}  {ahli:<16} {bagian}"
+
+    def on_select_batch(self, idx):
+        """Tampilkan rincian satu kasus Hitung Massal."""
+        nomor, kasus, hasil = self._batch['hasil'][idx]
+        if hasil is None:
+            lines = [f"Baris {nomor} tidak dihitung:", f"  {kasus}"]
+        else:
+            lines = [f"Baris {nomor} — Total Harta: {format_rp(kasus[0])}", "Input:"]
+            lines.extend(f"  {k}: {v}" for k, v in zip(INPUT_KEYS, kasus[1:]))
+            lines.append("Hasil:")
+            lines.extend(f"  {k}: {v}" for k, v in _format_hasil(hasil))
+        self._render_lines(self.txt_batch_detail, lines)
+
+    def _segarkan_batch_status(self):
+        """Perbarui progres, teks status dan tombol view Hitung Massal (jika sudah dibangun)."""
+        if not self._batch_view_ada():
+            return
+        st = self._batch
+        if st is None:
+            self.lbl_batch.config(text="Pilih file CSV (kolom: total, ayah, ibu, suami, istri, anak_laki, anak_perempuan).")
+            return
+        self.bar_batch.coords(self.isi_batch, 0, 0, 400 * st['posisi'] / max(st['ukuran'], 1), 14)
+        keadaan = st['keadaan'] if st['keadaan'] != "berjalan" or st['jalan'].is_set() else "dijeda"
+        self.lbl_batch.config(text=f"{os.path.basename(st['path'])}: {st['ok']} kasus, {st['galat']} baris tidak valid"
+                                   f" — {keadaan}; {st['tersimpan']} tersimpan ke riwayat")
+        self.btn_batch_jeda.config(text="▶ Lanjut" if not st['jalan'].is_set() else "⏸ Jeda")
+        self.btn_batch_simpan.config(state="disabled" if st['menyimpan'] else "normal")
+
+    # --- HITUNG MASSAL DI THREAD LATAR ---
+    def action_batch_pilih(self):
+        """Pilih file CSV kasus lalu hitung di thread latar."""
+        # Action Handler (Modul 8)
+        if self._batch is not None and self._batch['keadaan'] == "berjalan":
+            messagebox.showwarning("Hitung Massal Berjalan", "Tunggu proses sebelumnya selesai atau batalkan dulu.")
+            return
+        path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("Semua file", "*.*")])
+        if not path:
+            return
+        self._mulai_batch(path)
+
+    def _mulai_batch(self, path):
+        """Baca & hitung CSV di thread latar; hasil dikirim per potongan lewat antrian."""
+        try:
+            ukuran = os.path.getsize(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Gagal membuka CSV:\n{e}")
+            return
+        batal = threading.Event()
+        jalan = threading.Event() # Di-clear saat dijeda
+        jalan.set()
+        antrian = queue.Queue()
+
+        def kerja():
+            # hitung() tanpa efek samping: kalkulator & cache rencana dipakai bersama thread GUI
+            hitung = self.calc.hitung
+            try:
+                with open(path, "rb", buffering=EXPORT_BUFFER) as f:
+                    pembaca = _PembacaBaris(f)
+                    potongan = []
+                    # Perulangan streaming (Modul 3): satu kiriman per BATCH_GUI_CHUNK kasus
+                    for nomor, kasus in _iter_kasus_csv(pembaca):
+                        if isinstance(kasus, ValueError):
+                            potongan.append((nomor, str(kasus), None))
+                        else:
+                            potongan.append((nomor, kasus, hitung(*kasus)))
+                        if len(potongan) >= BATCH_GUI_CHUNK:
+                            antrian.put(("baris", potongan, pembaca.posisi))
+                            potongan = []
+                            jalan.wait()
+                            if batal.is_set():
+                                antrian.put(("selesai", "dibatalkan"))
+                                return
+                    antrian.put(("baris", potongan, pembaca.posisi))
+                antrian.put(("selesai", "selesai"))
+            except Exception as e:
+                antrian.put(("gagal", e))
+
+        self._batch = {'path': path, 'ukuran': max(ukuran, 1), 'posisi': 0, 'hasil': [],
+                       'ok': 0, 'galat': 0, 'disimpan': 0, 'tersimpan': 0, 'menyimpan': False, 'keadaan': "berjalan",
+                       'batal': batal, 'jalan': jalan, 'antrian': antrian,
+                       'thread': threading.Thread(target=kerja, name="hitung-massal", daemon=True)}
+        if self._batch_view_ada():
+            self.lb_batch.refresh()
+            self.txt_batch_detail.delete("1.0", tk.END)
+        self._segarkan_batch_status()
+        self._batch['thread'].start()
+        self.root.after(BATCH_GUI_POLL_MS, self._poll_batch, self._batch)
+
+    def _poll_batch(self, st):
+        """Dipanggil lewat root.after: pindahkan hasil dari antrian ke tabel."""
+        if st is not self._batch:
+            return # Proses lama yang sudah diganti
+        baru = 0
+        pesan = None
+        # Kosongkan antrian (Modul 3); tabel hanya menggambar baris yang terlihat
+        while True:
+            try:
+                item = st['antrian'].get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "baris":
+                _, potongan, st['posisi'] = item
+                st['hasil'].extend(potongan)
+                galat = sum(1 for _, _, hasil in potongan if hasil is None)
+                st['galat'] += galat
+                st['ok'] += len(potongan) - galat
+                baru += len(potongan)
+            else:
+                pesan = item
+        if baru and self._batch_view_ada():
+            self.lb_batch.rows_appended(baru)
+        if pesan is None:
+            self._segarkan_batch_status()
+            self.root.after(BATCH_GUI_POLL_MS, self._poll_batch, st)
+            return
+        if pesan[0] == "gagal":
+            st['keadaan'] = "gagal"
+            messagebox.showerror("Error", f"Gagal membaca CSV:\n{pesan[1]}")
+        else:
+            st['keadaan'] = pesan[1]
+            if pesan[1] == "selesai":
+                st['posisi'] = st['ukuran']
+        self._segarkan_batch_status()
+
+    def action_batch_jeda(self):
+        st = self._batch
+        if st is None or st['keadaan'] != "berjalan":
+            return
+        if st['jalan'].is_set():
+            st['jalan'].clear()
+        else:
+            st['jalan'].set()
+        self._segarkan_batch_status()
+
+    def action_batch_batal(self):
+        st = self._batch
+        if st is None or st['keadaan'] != "berjalan":
+            return
+        st['batal'].set()
+        st['jalan'].set() # Bangunkan thread yang sedang dijeda agar bisa berhenti
+
+    def action_batch_simpan(self):
+        """Tulis semua kasus yang sudah dihitung (dan belum tersimpan) ke riwayat."""
+        st = self._batch
+        if st is None or st['menyimpan']:
+            return
+        if st['disimpan'] >= len(st['hasil']):
+            messagebox.showinfo("Hitung Massal", "Tidak ada hasil baru untuk disimpan.")
+            return
+        st['menyimpan'] = True
+        self._segarkan_batch_status()
+        self._simpan_batch_bertahap(st)
+
+    def _simpan_batch_bertahap(self, st):
+        """Simpan IMPORT_BATCH kasus per giliran after(), agar GUI tetap responsif."""
+        mulai = st['disimpan']
+        akhir = min(mulai + IMPORT_BATCH, len(st['hasil']))
+        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entries = [{'timestamp': waktu, 'total': round(kasus[0]), 'inputs': dict(zip(INPUT_KEYS, kasus[1:])),
+                    'hasil': hasil}
+                   for _, kasus, hasil in st['hasil'][mulai:akhir] if hasil is not None]
+        try:
+            self.calc.tulis_riwayat(entries)
+        except Exception as e:
+            st['menyimpan'] = False
+            self._segarkan_batch_status()
+            messagebox.showerror("Error", f"Gagal menyimpan ke riwayat:\n{e}")
+            return
+        st['disimpan'] = akhir
+        st['tersimpan'] += len(entries)
+        if akhir < len(st['hasil']):
+            self._segarkan_batch_status()
+            self.root.after(1, self._simpan_batch_bertahap, st)
+            return
+        st['menyimpan'] = False
+        self._segarkan_batch_status()
+        messagebox.showinfo("Sukses", f"{st['tersimpan']} kasus tersimpan ke riwayat." if st['keadaan'] != "berjalan"
+                            else f"Hasil sejauh ini ({st['tersimpan']} kasus) tersimpan; simpan lagi setelah selesai.")
 
     # --- VIEW: Riwayat (MODUL 8: Layout) ---
     def show_riwayat_view(self):
         # Method untuk menampilkan view (Modul 8)
-        self.clear_content()
-        self.mark_active("Riwayat Perhitungan")
+        if not self._tampilkan_view("riwayat", "Riwayat Perhitungan", self._bangun_riwayat_view):
+            self._sinkron_riwayat()
 
-        frame = tk.Frame(self.content, bg=PANEL_BG, bd=2, relief="groove")
+    def _sinkron_riwayat(self):
+        """Susulkan riwayat yang bertambah/berkurang selama view Riwayat tersembunyi."""
+        if self.lb.sinkron() and self._filter_riwayat is None and self.calc.history:
+            self.lb.select(len(self.calc.history) - 1) # Stack/Peek (Modul 7)
+            self.show_riwayat_detail_from_entry(self.calc.history[-1])
+
+    def _bangun_riwayat_view(self, wadah):
+        frame = tk.Frame(wadah, bg=PANEL_BG, bd=2, relief="groove")
         frame.pack(padx=16, pady=8, fill="both", expand=True)
 
         # List Riwayat (Modul 8)
         left = tk.Frame(frame, bg=PANEL_BG)
         left.pack(side="left", padx=12, pady=12, fill="y")
         tk.Label(left, text="📚 Riwayat:", bg=PANEL_BG, font=("Arial",12,"bold"), fg=TEXT_COLOR).pack(anchor="w")
-        self.lb = tk.Listbox(left, width=36, height=20)
-        self.lb.pack(pady=(6,0))
-        self.lb.bind("<<ListboxSelect>>", self.on_select_history)
 
-        # Populate listbox (Modul 3)
-        self.lb.delete(0, tk.END)
-        for i, e in enumerate(self.calc.history, 1):
-            self.lb.insert(tk.END, f"{i}. {e['timestamp']} — {format_rp(e['total'])}")
+        # Filter Riwayat (memakai indeks waktu, total & konfigurasi)
+        self._filter_riwayat = None # None = tampilkan semua riwayat
+        flt = tk.Frame(left, bg=PANEL_BG)
+        flt.pack(anchor="w", pady=(6,0))
+        tk.Label(flt, text="Tanggal:", bg=PANEL_BG, font=FONT_SMALL, fg=TEXT_COLOR).grid(row=0, column=0, sticky="w")
+        self.ent_f_dari = tk.Entry(flt, width=11); self.ent_f_dari.grid(row=0, column=1)
+        tk.Label(flt, text="s/d", bg=PANEL_BG, font=FONT_SMALL).grid(row=0, column=2)
+        self.ent_f_sampai = tk.Entry(flt, width=11); self.ent_f_sampai.grid(row=0, column=3)
+        tk.Label(flt, text="Total:", bg=PANEL_BG, font=FONT_SMALL, fg=TEXT_COLOR).grid(row=1, column=0, sticky="w")
+        self.ent_f_min = tk.Entry(flt, width=11); self.ent_f_min.grid(row=1, column=1)
+        tk.Label(flt, text="s/d", bg=PANEL_BG, font=FONT_SMALL).grid(row=1, column=2)
+        self.ent_f_max = tk.Entry(flt, width=11); self.ent_f_max.grid(row=1, column=3)
+        self.c_f_konfig = tk.BooleanVar()
+        tk.Checkbutton(flt, text="Ahli waris sama dengan yang dipilih", bg=PANEL_BG, font=FONT_SMALL,
+                       variable=self.c_f_konfig).grid(row=2, column=0, columnspan=4, sticky="w")
+        tk.Button(flt, text="🔎 Filter", bg=SIDEBAR_BTN, fg=WHITE, bd=0, command=self.action_filter_history).grid(row=3, column=0, columnspan=2, sticky="w", pady=(4,0))
+        tk.Button(flt, text="✖ Semua", bg=BTN_RESET, fg=WHITE, bd=0, command=self.action_clear_filter).grid(row=3, column=2, columnspan=2, sticky="w", pady=(4,0))
+
+        # Listbox virtual: hanya baris yang terlihat yang diambil & diformat
+        self.lb = VirtualListbox(left, jumlah=self._riwayat_jumlah, ambil=self._ambil_riwayat_labels,
+                                 versi=self._riwayat_versi,
+                                 on_select=self.on_select_history, width=36, height=20)
+        self.lb.pack(pady=(6,0))
         
         # Auto-select last entry
         if self.calc.history:
-            self.lb.select_set(tk.END) # Stack/Peek (Modul 7)
-            self.lb.see(tk.END)
+            self.lb.select(len(self.calc.history) - 1) # Stack/Peek (Modul 7)
 
         # Detail Riwayat (Modul 8)
         right = tk.Frame(frame, bg=PANEL_BG)
@@ -448,15 +3359,13 @@ class AppWarisanUI:
         tk.Button(actions, text="Reset Semua Riwayat", bg=BTN_RESET, fg=WHITE, command=self.action_clear_history, bd=0).pack(side="left", padx=6)
         tk.Button(actions, text="💾 Export (.txt)", bg=ACCENT_GOLD, fg=WHITE, command=self.action_export, bd=0).pack(side="left", padx=6)
 
-        self.current_view = "riwayat"
-
     # --- VIEW: Penjelasan Warisan (MODUL 8: Layout) ---
     def show_penjelasan_view(self):
         # Method untuk menampilkan view (Modul 8)
-        self.clear_content()
-        self.mark_active("Penjelasan Warisan")
+        self._tampilkan_view("penjelasan", "Penjelasan Warisan", self._bangun_penjelasan_view)
 
-        panel = tk.Frame(self.content, bg=PANEL_BG, bd=2, relief="groove")
+    def _bangun_penjelasan_view(self, wadah):
+        panel = tk.Frame(wadah, bg=PANEL_BG, bd=2, relief="groove")
         panel.pack(padx=16, pady=8, fill="both", expand=True)
 
         tk.Label(panel, text="📘 Penjelasan Singkat Faraidh", bg=PANEL_BG, font=("Arial", 14, "bold"), fg=TEXT_COLOR).pack(anchor="w", pady=(6,4))
@@ -475,13 +3384,110 @@ class AppWarisanUI:
         )
         teks.insert("1.0", isi)
         teks.config(state="disabled")
-        self.current_view = "penjelasan"
+
+    # --- VIEW: Diagnostik (MODUL 8: Layout) ---
+    def show_diagnostik_view(self):
+        # Method untuk menampilkan view (Modul 8)
+        self._tampilkan_view("diagnostik", "Diagnostik", self._bangun_diagnostik_view)
+        # Statistik berubah selama view tersembunyi: selalu disegarkan saat ditampilkan
+        self.refresh_diagnostik()
+
+    def _bangun_diagnostik_view(self, wadah):
+        panel = tk.Frame(wadah, bg=PANEL_BG, bd=2, relief="groove")
+        panel.pack(padx=16, pady=8, fill="both", expand=True)
+
+        tk.Label(panel, text="⏱ Diagnostik Waktu per Fase", bg=PANEL_BG, font=("Arial", 14, "bold"), fg=TEXT_COLOR).pack(anchor="w", pady=(6,4))
+        ctrl = tk.Frame(panel, bg=PANEL_BG)
+        ctrl.pack(anchor="w", padx=8)
+        self.c_instrumentasi = tk.BooleanVar(value=self.calc.instrumentasi is not None)
+        tk.Checkbutton(ctrl, text="Aktifkan instrumentasi", bg=PANEL_BG, variable=self.c_instrumentasi,
+                       command=self.action_toggle_instrumentasi).pack(side="left")
+        tk.Button(ctrl, text="🔄 Segarkan", bg=SIDEBAR_BTN, fg=WHITE, bd=0, command=self.refresh_diagnostik).pack(side="left", padx=6)
+        tk.Button(ctrl, text="Reset Statistik", bg=BTN_RESET, fg=WHITE, bd=0, command=self.action_reset_instrumentasi).pack(side="left", padx=6)
+
+        self.txt_diagnostik = tk.Text(panel, bg=CONTENT_BG, font=("Courier", 10), bd=0)
+        self.txt_diagnostik.pack(fill="both", expand=True, padx=8, pady=(4,8))
+
+    def refresh_diagnostik(self):
+        """Tampilkan statistik instrumentasi terbaru."""
+        stats = self.calc.instrumentasi_stats()
+        cache = stats['plan_cache']
+        dedup = stats['dedup']
+        lines = [f"Instrumentasi: {'aktif' if stats['aktif'] else 'nonaktif'}",
+                 f"Cache rencana: {cache['hits']} hit, {cache['misses']} miss, {cache['currsize']}/{cache['maxsize']} terisi",
+                 f"Kasus berulang (dedup): {dedup['hits']} hit, {dedup['misses']} miss, {dedup['currsize']}/{dedup['maxsize']} unik"
+                 + (f" — {dedup['hits'] / (dedup['hits'] + dedup['misses']):.0%} berulang" if dedup['hits'] + dedup['misses'] else ""),
+                 f"Jumlah riwayat: {stats['riwayat']}", "",
+                 f"{'Fase':22s} {'Jumlah':>8s} {'Rata (µs)':>11s} {'Maks (µs)':>11s} {'Total (ms)':>11s}"]
+        # Perulangan (Modul 3)
+        for nama, f in sorted(stats['fase'].items()):
+            lines.append(f"{nama:22s} {f['jumlah']:8d} {f['rata_us']:11.1f} {f['maks_us']:11.1f} {f['total_ms']:11.2f}")
+            lines.append("    " + ", ".join(f"{k}: {v}" for k, v in f['histogram'].items()))
+        self.txt_diagnostik.delete("1.0", tk.END)
+        self.txt_diagnostik.insert("1.0", "\n".join(lines))
+
+    def action_toggle_instrumentasi(self):
+        if self.c_instrumentasi.get():
+            self.calc.enable_instrumentasi()
+        else:
+            self.calc.disable_instrumentasi()
+        self.refresh_diagnostik()
+
+    def action_reset_instrumentasi(self):
+        if self.calc.instrumentasi is not None:
+            self.calc.instrumentasi.reset()
+        self.refresh_diagnostik()
     
     # --- ACTION HANDLERS (MODUL 4: Method) ---
     def action_hitung(self):
         # Action Handler (Modul 8)
         self.hitung_warisan()
 
+    def _jadwalkan_preview(self):
+        """Debounce: pratinjau dihitung setelah input diam PREVIEW_DEBOUNCE_MS."""
+        if not self.c_live.get():
+            return
+        # Memakai slot job txt_hasil, jadi render lama yang belum selesai ikut dibatalkan
+        self._jadwalkan(self.txt_hasil, PREVIEW_DEBOUNCE_MS, self._tampilkan_preview)
+
+    def _tampilkan_preview(self):
+        """Hitung dan tampilkan pratinjau tanpa menambah riwayat."""
+        self._render_jobs.pop(str(self.txt_hasil), None)
+        if not self.txt_hasil.winfo_exists():
+            return
+        try:
+            harta = parse_total(self.ent_harta.get())
+        except ValueError:
+            harta = 0
+        laki = safe_int(self.ent_laki.get(), 0)
+        perempuan = safe_int(self.ent_perempuan.get(), 0)
+
+        # Input belum lengkap: beri petunjuk saja, tanpa messagebox (Modul 2)
+        if harta <= 0:
+            pesan = "Masukkan total harta untuk melihat pratinjau."
+        elif self.c_suami.get() and self.c_istri.get():
+            pesan = "Pilih Suami ATAU Istri, tidak keduanya."
+        elif laki < 0 or perempuan < 0:
+            pesan = "Jumlah anak tidak boleh negatif."
+        else:
+            pesan = None
+        if pesan is not None:
+            self._render_lines(self.txt_hasil, [f"ℹ {pesan}"])
+            return
+
+        try:
+            hasil = self.calc.preview(total=harta, ayah=self.c_ayah.get(), ibu=self.c_ibu.get(),
+                                      suami=self.c_suami.get(), istri=self.c_istri.get(),
+                                      anak_laki=laki, anak_perempuan=perempuan)
+        except ValueError as e:
+            # Mis. total inf/nan: tampilkan sebagai galat input, jangan biarkan lolos dari callback after()
+            self._render_lines(self.txt_hasil, [f"⚠ {e}"])
+            return
+        lines = [f"Total Harta: {format_rp(harta)}   (pratinjau — belum disimpan)", ""]
+        for k, v in _format_hasil(hasil):
+            lines.append(f"{k}: 💰 {v}")
+        self._render_lines(self.txt_hasil, lines)
+
     def action_reset_inputs(self):
         """Reset semua input di view Hitung Warisan."""
         # Non-Return Method (Modul 4)
@@ -491,43 +3497,173 @@ class AppWarisanUI:
             self.ent_laki.insert(0,"0"); self.ent_perempuan.insert(0,"0")
             self.c_ayah.set(False); self.c_ibu.set(False); self.c_suami.set(False); self.c_istri.set(False)
             if hasattr(self, "txt_hasil"):
+                self._batalkan_render(self.txt_hasil)
                 self.txt_hasil.delete("1.0", tk.END)
             messagebox.showinfo("Reset", "Input berhasil direset.")
         except Exception:
             messagebox.showerror("Error", "Gagal mereset input.")
 
     def action_export(self):
-        """Menyimpan riwayat ke file .txt."""
+        """Menyimpan riwayat ke file .txt/.csv/.jsonl/.wrb di thread latar."""
         # Action Handler (Modul 8)
         if not self.calc.history:
             messagebox.showwarning("Riwayat Kosong", "Tidak ada riwayat untuk disimpan.")
             return
-            
+        if self._export_aktif is not None:
+            messagebox.showwarning("Export Berjalan", "Tunggu export sebelumnya selesai atau batalkan dulu.")
+            return
+
         default_filename = f"Warisan_Riwayat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         path = filedialog.asksaveasfilename(defaultextension=".txt", 
                                              initialfile=default_filename,
-                                             filetypes=[("Text files","*.txt")])
+                                             filetypes=[("Text files","*.txt"), ("CSV files","*.csv"),
+                                                        ("JSON Lines","*.jsonl"), ("Rekaman biner","*.wrb")])
         if not path: return
         
-        try:
-            self.calc.export_txt(path)
+        # Pilih format berdasarkan ekstensi file (Modul 2)
+        ext = os.path.splitext(path)[1].lower()
+        exporter = {".csv": self.calc.export_csv, ".jsonl": self.calc.export_jsonl,
+                    ".wrb": self.calc.export_bin}.get(ext, self.calc.export_txt)
+        self._mulai_export(exporter, path)
+
+    # --- EXPORT DI THREAD LATAR ---
+    def _mulai_export(self, exporter, path):
+        """Jalankan export di thread latar atas snapshot riwayat; GUI tetap responsif."""
+        # Snapshot diambil di thread utama agar konsisten dengan isi riwayat saat ini
+        sumber = self.calc.snapshot_riwayat()
+        batal = threading.Event()
+        antrian = queue.Queue()
+
+        def kerja():
+            try:
+                hasil = exporter(path, sumber=sumber, batal=batal,
+                                 progress=lambda n, jumlah: antrian.put(("progres", n, jumlah)))
+                antrian.put(("selesai", hasil))
+            except Exception as e:
+                antrian.put(("gagal", e))
+            finally:
+                if hasattr(sumber, "close"):
+                    sumber.close()
+
+        # Jendela progres (Modul 8: Layout)
+        win = tk.Toplevel(self.root)
+        win.title("Export Riwayat")
+        win.configure(bg=PANEL_BG)
+        win.protocol("WM_DELETE_WINDOW", batal.set)
+        tk.Label(win, text=f"Menyimpan ke {os.path.basename(path)} ...", bg=PANEL_BG, font=FONT_NORMAL, fg=TEXT_COLOR).pack(padx=16, pady=(12,6))
+        bar = tk.Canvas(win, width=300, height=18, bg=CONTENT_BG, highlightthickness=0)
+        bar.pack(padx=16)
+        isi = bar.create_rectangle(0, 0, 0, 18, fill=SIDEBAR_BTN, width=0)
+        lbl = tk.Label(win, text=f"0 / {len(sumber)}", bg=PANEL_BG, font=FONT_SMALL, fg=TEXT_COLOR)
+        lbl.pack(pady=4)
+        tk.Button(win, text="✖ Batal", bg=BTN_RESET, fg=WHITE, bd=0, padx=10, pady=4, command=batal.set).pack(pady=(0,12))
+
+        thread = threading.Thread(target=kerja, name="export-riwayat", daemon=True)
+        self._export_aktif = (thread, batal)
+        thread.start()
+        self.root.after(EXPORT_POLL_MS, self._poll_export, antrian, win, bar, isi, lbl, path)
+
+    def _poll_export(self, antrian, win, bar, isi, lbl, path):
+        """Dipanggil lewat root.after: perbarui progres dari antrian thread export."""
+        pesan = None
+        # Kosongkan antrian; hanya progres terakhir yang perlu digambar (Modul 3)
+        while True:
+            try:
+                item = antrian.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "progres":
+                _, n, jumlah = item
+                bar.coords(isi, 0, 0, 300 * n / max(jumlah, 1), 18)
+                lbl.config(text=f"{n} / {jumlah}")
+            else:
+                pesan = item
+        if pesan is None:
+            self.root.after(EXPORT_POLL_MS, self._poll_export, antrian, win, bar, isi, lbl, path)
+            return
+        self._export_aktif = None
+        win.destroy()
+        # Pengkondisian hasil export (Modul 2)
+        if pesan[0] == "gagal":
+            messagebox.showerror("Error", f"Gagal menyimpan riwayat:\n{pesan[1]}")
+        elif pesan[1] is None:
+            messagebox.showinfo("Dibatalkan", "Export dibatalkan; file tujuan tidak diubah.")
+        else:
             messagebox.showinfo("Sukses", f"Riwayat tersimpan di:\n{path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal menyimpan riwayat:\n{e}")
 
-    def update_riwayat_ui_after_delete(self):
+    def _riwayat_jumlah(self):
+        """Jumlah baris di Listbox riwayat (semua riwayat atau hasil filter)."""
+        if self._filter_riwayat is not None:
+            return len(self._filter_riwayat)
+        return len(self.calc.history)
+
+    def _riwayat_versi(self):
+        """Penghitung perubahan riwayat (None jika backend tidak memilikinya)."""
+        return getattr(self.calc.history, "versi", None)
+
+    def _riwayat_entries(self, start, stop):
+        """Entri riwayat pada baris Listbox [start, stop)."""
+        if self._filter_riwayat is not None:
+            return self._filter_riwayat[max(start, 0):stop]
+        return self.calc.history_page(start, stop)
+
+    def _ambil_riwayat_labels(self, start, stop):
+        """Sumber baris untuk VirtualListbox: teks riwayat [start, stop)."""
+        # Perulangan (Modul 3)
+        return [format_riwayat_label(e) for e in self._riwayat_entries(start, stop)]
+
+    def action_filter_history(self):
+        """Tampilkan hanya riwayat yang cocok dengan filter."""
+        def teks(ent):
+            return ent.get().strip() or None
+        try:
+            total_min, total_max = (float(t.replace(",", "")) if t else None
+                                    for t in (teks(self.ent_f_min), teks(self.ent_f_max)))
+        except ValueError:
+            messagebox.showerror("Input Error", "Batas total harta harus berupa angka.")
+            return
+        konfigurasi = None
+        if self.c_f_konfig.get():
+            sel = self.lb.curselection()
+            if not sel:
+                messagebox.showwarning("Peringatan", "Pilih riwayat sebagai contoh konfigurasi ahli waris.")
+                return
+            konfigurasi = _konfigurasi(self._riwayat_entries(sel[0], sel[0] + 1)[0]['inputs'])
+        try:
+            self._filter_riwayat = self.calc.history.cari(
+                waktu_dari=teks(self.ent_f_dari), waktu_sampai=teks(self.ent_f_sampai),
+                total_min=total_min, total_max=total_max, konfigurasi=konfigurasi)
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+        self.update_riwayat_ui_after_delete()
+
+    def action_clear_filter(self):
+        """Kembali menampilkan semua riwayat."""
+        for ent in (self.ent_f_dari, self.ent_f_sampai, self.ent_f_min, self.ent_f_max):
+            ent.delete(0, tk.END)
+        self.c_f_konfig.set(False)
+        self._filter_riwayat = None
+        self.update_riwayat_ui_after_delete()
+
+    def _riwayat_list_aktif(self):
+        """True jika Listbox riwayat sudah dibangun (meskipun view sedang tersembunyi)."""
+        return "riwayat" in self._views
+
+    def update_riwayat_ui_after_delete(self, idx=None):
         """Fungsi helper untuk memperbarui Listbox dan detail setelah penghapusan."""
-        # Perulangan (Modul 3) untuk memperbarui Listbox
-        self.lb.delete(0, tk.END)
-        for i, e in enumerate(self.calc.history, 1):
-            self.lb.insert(tk.END, f"{i}. {e['timestamp']} — {format_rp(e['total'])}")
+        # Hanya baris terlihat yang digambar ulang; idx=None berarti riwayat berubah total
+        if idx is None:
+            self.lb.refresh()
+        else:
+            self.lb.row_deleted(idx)
 
         # Atur seleksi dan detail
-        if self.calc.history:
+        jumlah = self._riwayat_jumlah()
+        if jumlah:
             # Pilih elemen terakhir sebagai default (Stack/Peek - Modul 7)
-            self.lb.select_set(tk.END) 
-            self.lb.see(tk.END)
-            self.show_riwayat_detail_from_entry(self.calc.history[-1])
+            self.lb.select(jumlah - 1)
+            self.show_riwayat_detail_from_entry(self._riwayat_entries(jumlah - 1, jumlah)[0])
         else:
             # Kosongkan detail jika riwayat kosong
             if hasattr(self, "txt_riwayat_detail"):
@@ -548,19 +3684,22 @@ class AppWarisanUI:
 
         # Ambil indeks pertama yang dipilih
         idx_to_delete = selected_indices[0]
+        entry = self._riwayat_entries(idx_to_delete, idx_to_delete + 1)[0]
         
         # Pengkondisian Konfirmasi (Modul 2)
-        if messagebox.askyesno("Konfirmasi Hapus", f"Yakin ingin menghapus riwayat ke-{idx_to_delete + 1}?"):
+        if messagebox.askyesno("Konfirmasi Hapus", f"Yakin ingin menghapus riwayat #{entry['id']}?"):
             try:
-                # Hapus dari list data inti (Modul 7: Stack/List Operation)
-                self.calc.history.pop(idx_to_delete) 
+                # Hapus berdasarkan ID stabil (Modul 7: Stack/List Operation)
+                self.calc.hapus_riwayat(entry['id'])
+                if self._filter_riwayat is not None:
+                    del self._filter_riwayat[idx_to_delete]
 
                 # Perbarui Listbox UI dan Detail
-                self.update_riwayat_ui_after_delete()
+                self.update_riwayat_ui_after_delete(idx_to_delete)
 
                 messagebox.showinfo("Sukses", "Riwayat berhasil dihapus.")
 
-            except IndexError:
+            except (IndexError, KeyError):
                 messagebox.showerror("Error", "Indeks riwayat tidak valid.")
             except Exception as e:
                 messagebox.showerror("Error", f"Gagal menghapus riwayat: {e}")
@@ -571,7 +3710,8 @@ class AppWarisanUI:
             self.calc.reset_history()
             
             # Memperbarui tampilan
-            if hasattr(self, "lb"): 
+            if self._riwayat_list_aktif(): 
+                self._filter_riwayat = None
                 self.update_riwayat_ui_after_delete() 
                  
             messagebox.showinfo("Sukses", "Semua riwayat telah dihapus.")
@@ -580,9 +3720,8 @@ class AppWarisanUI:
     def hitung_warisan(self):
         # Non-Return Method (Modul 4)
         try:
-            harta_text = self.ent_harta.get().replace(",", "").strip()
-            harta = float(harta_text)
-            if harta <= 0: raise ValueError("Total harta harus lebih besar dari 0.") # Pengkondisian (Modul 2)
+            harta = parse_total(self.ent_harta.get())
+            _cek_total(harta) # Pengkondisian (Modul 2)
         except ValueError as e:
             messagebox.showerror("Input Error", "Masukkan jumlah harta (angka positif) dengan benar! " + str(e))
             return
@@ -618,35 +3757,26 @@ class AppWarisanUI:
 
         # Tampilkan Hasil (Modul 3: Perulangan)
         lines = [f"Total Harta: {format_rp(harta)}", ""]
-        for k, v in hasil.items():
-            lines.append(f"{k}: 💰 {format_rp(v)}")
+        for k, v in _format_hasil(hasil):
+            lines.append(f"{k}: 💰 {v}")
             
         if hasattr(self, "txt_hasil"):
-            self._fade_insert_lines(self.txt_hasil, lines)
+            self._render_lines(self.txt_hasil, lines)
 
-        # Update riwayat di view Riwayat (jika sudah dibuat)
-        if hasattr(self, "lb"): # Pengkondisian (Modul 2)
-            last_entry = self.calc.history[-1]
-            self.lb.insert(tk.END, f"{len(self.calc.history)}. {last_entry['timestamp']} — {format_rp(last_entry['total'])}")
-            self.lb.select_clear(0, tk.END)
-            self.lb.select_set(tk.END) # Stack/Peek (Modul 7)
-            self.lb.see(tk.END)
-        
-        # Jika sedang di view riwayat, otomatis tampilkan detailnya (Modul 2)
-        if self.current_view == "riwayat" and hasattr(self, "txt_riwayat_detail"):
+        # Update riwayat di view Riwayat (jika sudah dibuat), detail ikut diperbarui
+        # walau view tersembunyi karena sinkron() nanti tidak melihat perubahan lagi
+        if self._riwayat_list_aktif() and self._filter_riwayat is None: # Pengkondisian (Modul 2)
+            self.lb.row_appended()
+            self.lb.select(len(self.calc.history) - 1) # Stack/Peek (Modul 7)
             self.show_riwayat_detail_from_entry(self.calc.history[-1])
 
     # --- RIWAYAT HANDLERS ---
-    def on_select_history(self, event):
+    def on_select_history(self, idx):
         """Menampilkan detail riwayat yang dipilih di listbox."""
         # Method Event Handler (Modul 4/8)
-        sel = event.widget.curselection()
-        if not sel: return
-        idx = sel[0]
-        try:
-            entry = self.calc.history[idx]
-        except IndexError:
-            return
+        entries = self._riwayat_entries(idx, idx + 1)
+        if not entries: return
+        entry = entries[0]
         self.show_riwayat_detail_from_entry(entry)
 
     def show_riwayat_detail_from_entry(self, entry):
@@ -669,17 +3799,671 @@ class AppWarisanUI:
             
         txt.insert(tk.END, "\nHasil:\n")
         # Perulangan (Modul 3)
-        for k, v in entry['hasil'].items():
-            txt.insert(tk.END, f"  {k}: {format_rp(v)}\n")
+        for k, v in _format_hasil(entry['hasil']):
+            txt.insert(tk.END, f"  {k}: {v}\n")
 
     def on_quit(self):
         """Konfirmasi keluar aplikasi."""
         # Method Aksi (Modul 4)
         if messagebox.askyesno("Keluar", "Yakin mau keluar aplikasi?"):
+            if self._export_aktif is not None:
+                # Hentikan export latar agar file .tmp dibersihkan sebelum keluar
+                thread, batal = self._export_aktif
+                batal.set()
+                thread.join(timeout=5)
+            if self._batch is not None and self._batch['keadaan'] == "berjalan":
+                self._batch['batal'].set()
+                self._batch['jalan'].set()
+                self._batch['thread'].join(timeout=5)
+            self.calc.close()
             self.root.destroy()
 
+# --- MODE HEADLESS (CLI) ---
+def _parse_bool(teks):
+    """Nilai boolean dari sel CSV ("1", "true", "ya", "y", "x" = True)."""
+    return str(teks).strip().lower() in ("1", "true", "ya", "y", "x", "yes")
+
+def cli_compute(args):
+    """python TA.py compute TOTAL [--ayah] [--ibu] ... : hitung satu kasus."""
+    # Validasi sama dengan form Hitung (Modul 2)
+    if args.suami and args.istri:
+        print("Error: pilih Suami ATAU Istri, tidak keduanya.", file=sys.stderr)
+        return 2
+    if args.laki < 0 or args.perempuan < 0:
+        print("Error: jumlah anak tidak boleh negatif.", file=sys.stderr)
+        return 2
+    calc = WarisanCalculator()
+    tambahan = {k: getattr(args, k) for k in ("kakek", "nenek", "cucu_laki", "cucu_perempuan",
+                                              "saudara_laki", "saudara_perempuan")}
+    try:
+        if any(tambahan.values()) or args.radd:
+            hasil = calc.hitung_lengkap(args.total, radd=args.radd, ayah=args.ayah, ibu=args.ibu, suami=args.suami,
+                                        istri=args.istri, anak_laki=args.laki, anak_perempuan=args.perempuan,
+                                        **tambahan)
+        else:
+            hasil = calc.compute(args.total, args.ayah, args.ibu, args.suami, args.istri, args.laki, args.perempuan)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    lines = [f"Total Harta: {format_rp(args.total)}", ""]
+    lines.extend(f"{k}: {v}" for k, v in _format_hasil(hasil))
+    print("\n".join(lines))
+    return 0
+
+def cli_batch(args):
+    """python TA.py batch in.csv out.csv : hitung setiap baris CSV secara streaming.
+
+    Kolom input: total (wajib), ayah, ibu, suami, istri, anak_laki,
+    anak_perempuan. Output: kolom input diikuti satu kolom per ahli waris
+    (sama dengan compute_batch). Dengan --workers N blok baris dibagi ke
+    N proses; urutan output tetap sama dengan input. Baris yang tidak valid
+    dilaporkan dan dilewati (exit code 1).
+    """
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    try:
+        laporan = run_batch(args.input, args.output, workers=workers, chunk=args.chunk)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    n, durasi = laporan['dihitung'], laporan['detik']
+    laju = n / durasi if durasi > 0 else 0
+    print(f"{n} kasus dihitung, {laporan['rusak']} baris tidak valid dilewati dalam {durasi:.2f} s"
+          f" ({laju:,.0f} kasus/detik, {workers} worker) -> {args.output}", file=sys.stderr)
+    for nomor, pesan in laporan['galat']:
+        print(f"  baris data {nomor}: {pesan}", file=sys.stderr)
+    if laporan['rusak'] > len(laporan['galat']):
+        print(f"  ... dan {laporan['rusak'] - len(laporan['galat'])} baris tidak valid lainnya", file=sys.stderr)
+    return 1 if laporan['rusak'] else 0
+
+def cli_import(args):
+    """python TA.py import FILE --db riwayat.db : muat export riwayat ke SQLite secara streaming."""
+    if not args.db:
+        print("Error: tentukan --db (atau WARISAN_RIWAYAT_DB) sebagai tujuan import.", file=sys.stderr)
+        return 2
+    t0 = time.perf_counter()
+    try:
+        calc = WarisanCalculator(history=RiwayatSQLite(args.db))
+        try:
+            laporan = calc.import_riwayat(args.input, format=args.format, batch=max(args.batch, 1))
+        finally:
+            calc.close()
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    durasi = time.perf_counter() - t0
+    print(f"{laporan['diimpor']} entri diimpor ({laporan['format']}), {laporan['rusak']} blok rusak dilewati"
+          f" dalam {durasi:.2f} s -> {args.db}", file=sys.stderr)
+    for nomor, pesan in laporan['galat']:
+        print(f"  baris {nomor}: {pesan}", file=sys.stderr)
+    if laporan['rusak'] > len(laporan['galat']):
+        print(f"  ... dan {laporan['rusak'] - len(laporan['galat'])} blok rusak lainnya", file=sys.stderr)
+    return 1 if laporan['rusak'] else 0
+
+def run_batch(input_path, output_path, workers=1, chunk=BATCH_CHUNK):
+    """Hitung file CSV kasus ke file CSV hasil; kembalikan laporan.
+
+    Input dibaca per blok `chunk` baris. Dengan workers > 1 blok dikirim ke
+    ProcessPoolExecutor (tiap worker punya WarisanCalculator sendiri yang
+    tetap hangat), paling banyak 2 * workers blok sedang diproses, dan hasil
+    ditulis sesuai urutan input sehingga memori tetap terbatas.
+
+    Baris yang tidak valid dilewati dan dicatat. Output ditulis ke file
+    sementara yang baru menggantikan output_path setelah seluruh input
+    selesai, sehingga kegagalan tidak meninggalkan output terpotong.
+    Laporan: dihitung, rusak, galat ((nomor_baris_data, pesan), paling
+    banyak IMPORT_MAX_GALAT), detik.
+    """
+    mulai = time.perf_counter()
+    laporan = {'dihitung': 0, 'rusak': 0, 'galat': [], 'detik': 0.0}
+    target = output_path + ".tmp"
+    selesai = False
+    try:
+        with open(input_path, newline="", encoding="utf-8") as fin, \
+                open(target, "w", newline="", encoding="utf-8", buffering=EXPORT_BUFFER) as fout:
+            reader = csv.reader(fin)
+            header = [h.strip() for h in next(reader, [])]
+            if "total" not in header:
+                raise ValueError("file input harus punya kolom 'total'")
+            labels = WarisanCalculator()._label_batch()
+            fout.write(WarisanCalculator._format_csv_rows([["total", *INPUT_KEYS, *labels]]))
+
+            def blok_blok():
+                nomor = 1
+                while True:
+                    rows = list(itertools.islice(reader, chunk))
+                    if not rows:
+                        return
+                    yield rows, nomor
+                    nomor += len(rows)
+
+            def tulis(blok):
+                teks, dihitung, galat = blok
+                fout.write(teks)
+                laporan['dihitung'] += dihitung
+                laporan['rusak'] += len(galat)
+                laporan['galat'].extend(galat[:IMPORT_MAX_GALAT - len(laporan['galat'])])
+
+            if workers <= 1:
+                calc = WarisanCalculator()
+                # Perulangan per blok (Modul 3)
+                for rows, nomor in blok_blok():
+                    tulis(_hitung_blok_csv(calc, header, rows, nomor))
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init) as pool:
+                    antre = deque() # future per blok sesuai urutan input
+                    try:
+                        for rows, nomor in blok_blok():
+                            antre.append(pool.submit(_batch_worker, header, rows, nomor))
+                            if len(antre) >= workers * 2:
+                                tulis(antre.popleft().result())
+                        while antre:
+                            tulis(antre.popleft().result())
+                    except BaseException:
+                        for fut in antre:
+                            fut.cancel()
+                        raise
+        os.replace(target, output_path)
+        selesai = True
+    finally:
+        if not selesai and os.path.exists(target):
+            os.remove(target)
+    laporan['detik'] = time.perf_counter() - mulai
+    return laporan
+
+def _hitung_blok_csv(calc, header, rows, nomor_awal):
+    """Hitung satu blok baris CSV mentah; hasilnya (teks CSV, jumlah dihitung, galat).
+
+    Baris tidak valid tidak ikut dihitung; galat berisi (nomor_baris_data, pesan).
+    Baris kosong dilewati tanpa dicatat.
+    """
+    kasus, galat = [], []
+    for nomor, r in enumerate(rows, nomor_awal):
+        if not any(sel.strip() for sel in r):
+            continue
+        try:
+            kasus.append(_kasus_csv(dict(zip(header, r))))
+        except ValueError as e:
+            galat.append((nomor, str(e)))
+    if not kasus:
+        return "", 0, galat
+    kolom = [list(c) for c in zip(*kasus)]
+    hasil = calc.compute_batch(*kolom)
+    return calc._format_csv_rows(zip(*kolom, *(hasil[label] for label in calc._label_batch()))), len(kasus), galat
+
+# Kalkulator milik proses worker (dibuat sekali oleh initializer pool)
+_worker_calc = None
+
+def _batch_worker_init():
+    global _worker_calc
+    _worker_calc = WarisanCalculator()
+
+def _batch_worker(header, rows, nomor_awal):
+    return _hitung_blok_csv(_worker_calc, header, rows, nomor_awal)
+
+def _kasus_csv(r):
+    """Argumen _hitung dari satu baris CSV (dict kolom -> teks); tidak valid -> ValueError."""
+    total = parse_total(r.get("total") or "")
+    ayah, ibu, suami, istri = (_parse_bool(r.get(k) or "") for k in INPUT_KEYS[:4])
+    laki, perempuan = (int(r.get(k) or 0) for k in INPUT_KEYS[4:])
+    # Validasi sama dengan form Hitung (Modul 2)
+    _cek_total(total)
+    if suami and istri:
+        raise ValueError("Pilih Suami ATAU Istri, tidak keduanya.")
+    if laki < 0 or perempuan < 0:
+        raise ValueError("Jumlah anak tidak boleh negatif.")
+    return (total, ayah, ibu, suami, istri, laki, perempuan)
+
+def _iter_kasus_csv(pembaca):
+    """Kasus dari CSV input batch per baris: (nomor_baris, argumen _hitung | ValueError).
+
+    Kolom sama dengan perintah batch; baris yang tidak valid dilaporkan
+    tanpa menghentikan pembacaan. Header tanpa kolom total -> ValueError.
+    """
+    header = None
+    for teks in pembaca:
+        if teks is not None and not teks.strip():
+            continue
+        if header is None:
+            header = [h.strip() for h in next(csv.reader((teks or "",)))]
+            if "total" not in header:
+                raise ValueError("Header CSV harus memiliki kolom 'total'.")
+            continue
+        try:
+            if teks is None:
+                raise ValueError("bukan teks UTF-8")
+            kasus = _kasus_csv(dict(zip(header, next(csv.reader((teks,))))))
+            # Hasil Hitung Massal bisa disimpan ke riwayat
+            _cek_riwayat(kasus[0], kasus[5], kasus[6])
+            yield pembaca.nomor, kasus
+        except ValueError as e:
+            yield pembaca.nomor, e
+
+# --- MODE LAYANAN (JSON per baris lewat socket) ---
+class WarisanService:
+    """Layanan asyncio: satu request JSON per baris, satu respons JSON per baris.
+
+    Request: {"id": ..., "total": 1000000, "ayah": true, ..., "anak_laki": 2}
+    (flag harus boolean JSON, jumlah anak bilangan bulat JSON) atau
+    {"op": "stats"}. Respons: {"id": ..., "ok": true, "hasil": {...},
+    "anak": {...}} atau {"id": ..., "ok": false, "error": "..."}; urutan
+    respons dalam satu koneksi bisa berbeda dengan urutan request, gunakan "id".
+
+    "hasil" berisi satu nilai per kelas ahli waris; baris per anak tidak
+    dijabarkan (ribuan anak akan melebihi SERVICE_MAX_LINE di sisi klien).
+    "anak" memetakan label kelas anak ke {"label_anak", "jumlah",
+    "nilai_per_anak", "lebih"}: anak ke-1..lebih menerima nilai_per_anak + 1,
+    sisanya nilai_per_anak.
+
+    Request identik yang sedang dihitung digabung (coalescing) menjadi satu
+    perhitungan. Paling banyak max_inflight request diproses bersamaan;
+    setelah itu server berhenti membaca socket (backpressure) sampai ada
+    yang selesai. Layanan tidak menulis riwayat.
+    """
+    def __init__(self, calc=None, max_inflight=SERVICE_MAX_INFLIGHT, workers=SERVICE_WORKERS):
+        from concurrent.futures import ThreadPoolExecutor
+        self.calc = calc if calc is not None else WarisanCalculator()
+        self.max_inflight = max_inflight
+        self.server = None
+        self._sem = None
+        self._pending = {} # kunci request -> future perhitungan yang sedang berjalan
+        self._klien = set() # Task _handle untuk koneksi yang masih terbuka
+        self._latensi = deque(maxlen=SERVICE_LATENCY_WINDOW)
+        # Perhitungan di thread terpisah agar event loop tetap responsif untuk hasil besar;
+        # semua thread memakai satu kalkulator (hitung() thread-safe)
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1))
+        self.jumlah_request = 0
+        self.jumlah_coalesced = 0
+        self.jumlah_error = 0
+        self._inflight = 0
+
+    async def start(self, host="127.0.0.1", port=0, unix_path=None):
+        """Mulai mendengarkan di TCP host:port (port 0 = bebas) atau Unix socket."""
+        import asyncio
+        self._sem = asyncio.Semaphore(self.max_inflight)
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self._handle, path=unix_path, limit=SERVICE_MAX_LINE)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port, limit=SERVICE_MAX_LINE)
+        return self.server
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        import asyncio
+        self.server.close()
+        # Koneksi yang masih terbuka dihentikan dan ditunggu agar tidak ada task yatim
+        for t in list(self._klien):
+            t.cancel()
+        if self._klien:
+            await asyncio.gather(*self._klien, return_exceptions=True)
+        await self.server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """Statistik layanan: jumlah request, coalesced, error, inflight, p50/p99 (ms)."""
+        lat = sorted(self._latensi)
+        def persentil(p):
+            return round(lat[min(len(lat) - 1, int(round(p * (len(lat) - 1))))] * 1000, 3) if lat else 0.0
+        return {'request': self.jumlah_request, 'coalesced': self.jumlah_coalesced,
+                'error': self.jumlah_error, 'inflight': self._inflight,
+                'p50_ms': persentil(0.50), 'p99_ms': persentil(0.99)}
+
+    async def _handle(self, reader, writer):
+        import asyncio
+        klien = asyncio.current_task()
+        self._klien.add(klien)
+        tugas = set()
+        lock = asyncio.Lock() # Satu penulis per koneksi
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self._tulis(writer, lock, json.dumps({'id': None, 'ok': False, 'error': "request terlalu panjang"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Backpressure: tunggu slot sebelum membaca request berikutnya
+                await self._sem.acquire()
+                t = asyncio.create_task(self._proses(line, writer, lock))
+                tugas.add(t)
+                t.add_done_callback(tugas.discard)
+            if tugas:
+                await asyncio.gather(*tugas, return_exceptions=True)
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # Layanan ditutup: hentikan request yang masih berjalan di koneksi ini
+            for t in tugas:
+                t.cancel()
+            await asyncio.gather(*tugas, return_exceptions=True)
+        finally:
+            self._klien.discard(klien)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _proses(self, line, writer, lock):
+        mulai = time.perf_counter()
+        self.jumlah_request += 1
+        self._inflight += 1
+        req_id = None
+        try:
+            try:
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    raise ValueError("request harus berupa objek JSON")
+                req_id = req.get('id')
+                if req.get('op') == "stats":
+                    respon = json.dumps({'id': req_id, 'ok': True, 'stats': self.stats()})
+                else:
+                    fragmen = await self._hitung_coalesced(_kunci_request(req))
+                    respon = f'{{"id": {json.dumps(req_id)}, "ok": true, {fragmen}}}'
+            except (ValueError, TypeError, KeyError) as e:
+                self.jumlah_error += 1
+                respon = json.dumps({'id': req_id, 'ok': False, 'error': str(e)})
+            await self._tulis(writer, lock, respon)
+        finally:
+            self._inflight -= 1
+            self._sem.release()
+            self._latensi.append(time.perf_counter() - mulai)
+
+    async def _tulis(self, writer, lock, respon):
+        async with lock:
+            try:
+                writer.write(respon.encode("utf-8") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _hitung_coalesced(self, kunci):
+        """Hitung kunci request; request identik yang datang bersamaan berbagi hasil."""
+        import asyncio
+        fut = self._pending.get(kunci)
+        if fut is not None:
+            self.jumlah_coalesced += 1
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().run_in_executor(self._executor, self._hitung_json, kunci)
+        self._pending[kunci] = fut
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            if self._pending.get(kunci) is fut:
+                del self._pending[kunci]
+
+    def _hitung_json(self, kunci):
+        """Field "hasil" dan "anak" sebagai fragmen JSON (dibagi oleh semua request yang digabung).
+
+        Ukurannya sebanding dengan jumlah kelas ahli waris, bukan jumlah anak.
+        """
+        hasil = self.calc.hitung(*kunci)
+        kelas, anak = {}, {}
+        for label, nilai, jumlah, label_anak, per in hasil.baris:
+            kelas[label] = nilai
+            if jumlah:
+                anak[label] = {'label_anak': label_anak, 'jumlah': jumlah, 'nilai_per_anak': per,
+                               'lebih': HasilWarisan._lebih(nilai, jumlah, per)}
+        return (f'"hasil": {json.dumps(kelas, ensure_ascii=False)}, '
+                f'"anak": {json.dumps(anak, ensure_ascii=False)}')
+
+def _kunci_request(req):
+    """Validasi request layanan dan ubah menjadi tuple argumen _hitung."""
+    total = req['total'] if type(req['total']) is int else float(req['total'])
+    _cek_total(total)
+    for k in INPUT_KEYS[:4]:
+        if type(req.get(k, False)) is not bool:
+            raise ValueError(f"'{k}' harus boolean JSON (true/false).")
+    for k in INPUT_KEYS[4:]:
+        if type(req.get(k, 0)) is not int:
+            raise ValueError(f"'{k}' harus bilangan bulat JSON.")
+    ayah, ibu, suami, istri = (req.get(k, False) for k in INPUT_KEYS[:4])
+    laki, perempuan = (req.get(k, 0) for k in INPUT_KEYS[4:])
+    # Validasi sama dengan form Hitung (Modul 2)
+    if suami and istri:
+        raise ValueError("Pilih Suami ATAU Istri, tidak keduanya.")
+    if laki < 0 or perempuan < 0:
+        raise ValueError("Jumlah anak tidak boleh negatif.")
+    return (total, ayah, ibu, suami, istri, laki, perempuan)
+
+def cli_serve(args):
+    """python TA.py serve [--host H] [--port P | --unix PATH] : jalankan layanan JSON."""
+    import asyncio
+    async def jalan():
+        service = WarisanService(max_inflight=args.max_inflight, workers=args.workers)
+        await service.start(host=args.host, port=args.port, unix_path=args.unix)
+        print(f"Layanan Warisan mendengarkan di {service.address}", file=sys.stderr)
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.close()
+    try:
+        asyncio.run(jalan())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+# --- BENCHMARK ---
+BENTUK_KELUARGA = ("tanpa_anak", "hanya_perempuan", "awl", "anak_banyak", "campuran")
+
+def generate_kasus(n, bentuk="campuran", seed=0):
+    """Bangkitkan n kasus (total, ayah, ibu, suami, istri, laki, perempuan) secara deterministik.
+
+    bentuk: "tanpa_anak", "hanya_perempuan", "awl" (pasangan + orang tua +
+    anak perempuan, memicu Awl), "anak_banyak" (ratusan-ribuan anak) atau
+    "campuran" (gabungan realistis, banyak bentuk berulang).
+    """
+    import random
+    r = random.Random(f"{bentuk}:{seed}")
+    kasus = []
+    # Perulangan pembangkit (Modul 3)
+    for _ in range(n):
+        total = float(r.randint(10, 50_000) * 1_000_000)
+        suami = r.random() < 0.5
+        istri = not suami and r.random() < 0.8
+        ayah, ibu = r.random() < 0.5, r.random() < 0.5
+        b = bentuk if bentuk != "campuran" else r.choice(("tanpa_anak", "hanya_perempuan", "awl", "biasa", "biasa"))
+        if b == "tanpa_anak":
+            laki, perempuan = 0, 0
+        elif b == "hanya_perempuan":
+            laki, perempuan = 0, r.randint(1, 6)
+        elif b == "awl":
+            ayah = ibu = True
+            laki, perempuan = 0, r.randint(2, 6)
+            suami, istri = (True, False) if r.random() < 0.5 else (False, True)
+        elif b == "anak_banyak":
+            laki, perempuan = r.randint(200, 2000), r.randint(200, 2000)
+        else:
+            laki, perempuan = r.randint(0, 4), r.randint(0, 4)
+        kasus.append((total, ayah, ibu, suami, istri, laki, perempuan))
+    return kasus
+
+def _ukur(fungsi, ulang=3):
+    """Waktu terbaik (detik) dari beberapa kali menjalankan fungsi()."""
+    terbaik = None
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi()
+        durasi = time.perf_counter() - mulai
+        terbaik = durasi if terbaik is None else min(terbaik, durasi)
+    return terbaik
+
+def run_benchmarks(n=2000, seed=0):
+    """Jalankan seluruh benchmark; hasil berupa dict nama -> mikrodetik per operasi."""
+    import tempfile
+    hasil = {}
+    for bentuk in BENTUK_KELUARGA:
+        kasus = generate_kasus(n if bentuk != "anak_banyak" else max(n // 20, 1), bentuk, seed)
+        def scalar():
+            calc = WarisanCalculator()
+            for k in kasus:
+                calc.compute(*k)
+        hasil[f"compute/{bentuk}"] = _ukur(scalar) / len(kasus) * 1e6
+        kolom = list(zip(*kasus))
+        calc = WarisanCalculator()
+        hasil[f"compute_batch/{bentuk}"] = _ukur(lambda: calc.compute_batch(*kolom)) / len(kasus) * 1e6
+
+    # Riwayat: append, hapus per ID, dan pengisian viewport Listbox (tanpa Tk)
+    calc = WarisanCalculator()
+    kasus = generate_kasus(n, "campuran", seed)
+    for k in kasus:
+        calc.compute(*k)
+    entries = list(calc.history)
+    def append():
+        h = RiwayatMemori()
+        for e in entries:
+            h.append(dict(e, id=None))
+    hasil["riwayat/append"] = _ukur(append) / len(entries) * 1e6
+    def hapus():
+        h = RiwayatMemori()
+        for e in entries:
+            h.append(dict(e, id=None))
+        for i in range(len(entries), 0, -2):
+            h.delete_id(i)
+    hasil["riwayat/append+delete"] = _ukur(hapus) / len(entries) * 1e6
+    def viewport():
+        for awal in range(0, len(calc.history), 20):
+            [format_riwayat_label(e) for e in calc.history_page(awal, awal + 20)]
+    hasil["riwayat/listbox_row"] = _ukur(viewport) / len(entries) * 1e6
+
+    # Export riwayat ke semua format
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("txt", "csv", "jsonl"):
+            export = getattr(calc, f"export_{fmt}")
+            path = os.path.join(tmp, f"riwayat.{fmt}")
+            hasil[f"export/{fmt}"] = _ukur(lambda: export(path)) / len(entries) * 1e6
+    hasil["format_rp"] = _ukur(lambda: [format_rp(k[0]) for k in kasus]) / len(kasus) * 1e6
+    return hasil
+
+def compare_benchmarks(hasil, baseline, threshold=BENCH_THRESHOLD):
+    """Bandingkan hasil dengan baseline; kembalikan list (nama, base, sekarang, rasio, regresi).
+
+    Ambang per benchmark bisa diatur lewat baseline["thresholds"][nama].
+    """
+    ambang = baseline.get("thresholds", {})
+    laporan = []
+    for nama, base in baseline.get("hasil", {}).items():
+        if nama not in hasil or base <= 0:
+            continue
+        rasio = hasil[nama] / base
+        laporan.append((nama, base, hasil[nama], rasio, rasio > 1 + ambang.get(nama, threshold)))
+    return laporan
+
+def cli_bench(args):
+    """python TA.py bench [--save F] [--compare F] : jalankan benchmark."""
+    hasil = run_benchmarks(n=args.n, seed=args.seed)
+    for nama, us in hasil.items():
+        print(f"{nama:32s} {us:12.2f} µs/op")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({'meta': {'python': sys.version.split()[0], 'n': args.n, 'seed': args.seed,
+                                'waktu': datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+                       'thresholds': {}, 'hasil': hasil}, f, indent=2)
+        print(f"Baseline disimpan di {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        laporan = compare_benchmarks(hasil, baseline, args.threshold)
+        regresi = [r for r in laporan if r[4]]
+        for nama, base, now, rasio, lambat in laporan:
+            print(f"{'REGRESI' if lambat else 'ok':8s} {nama:32s} {base:10.2f} -> {now:10.2f} µs/op (x{rasio:.2f})")
+        if regresi:
+            print(f"{len(regresi)} benchmark melewati ambang regresi.", file=sys.stderr)
+            return 1
+    return 0
+
+def run_gui(args=None):
+    """Jalankan aplikasi Tk (satu-satunya jalur yang mengimpor tkinter)."""
+    _import_gui()
+    # Set WARISAN_RIWAYAT_DB=<file.db> agar riwayat disimpan permanen di SQLite,
+    # atau WARISAN_RIWAYAT=kolom untuk riwayat RAM berbentuk kolom (hemat memori)
+    db_path = os.environ.get("WARISAN_RIWAYAT_DB")
+    if db_path:
+        history = RiwayatSQLite(db_path)
+    elif os.environ.get("WARISAN_RIWAYAT") == "kolom":
+        history = RiwayatKolom()
+    else:
+        history = None
+    calc = WarisanCalculator(history=history)
+    root = tk.Tk()
+    app = AppWarisanUI(root, calc)
+    if args is not None and args.timing:
+        root.update_idletasks()
+        _cetak_timing("gui")
+    root.mainloop()
+    return 0
+
+def _cetak_timing(mode):
+    print(f"[timing] {mode}: siap {(time.perf_counter() - _T_MULAI) * 1000:.1f} ms sejak start modul", file=sys.stderr)
+
+def main(argv=None):
+    """Entry point: tanpa argumen membuka GUI; 'compute' / 'batch' berjalan headless."""
+    import argparse # Hanya dibutuhkan saat dijalankan sebagai program
+    parser = argparse.ArgumentParser(prog="TA.py", description="Aplikasi Penghitung Warisan (Faraidh)")
+    parser.add_argument("--timing", action="store_true", help="cetak waktu start ke stderr")
+    sub = parser.add_subparsers(dest="mode")
+    p_compute = sub.add_parser("compute", help="hitung satu kasus")
+    p_compute.add_argument("total", type=parse_total)
+    for nama in ("ayah", "ibu", "suami", "istri"):
+        p_compute.add_argument(f"--{nama}", action="store_true")
+    p_compute.add_argument("--laki", type=int, default=0, help="jumlah anak laki-laki")
+    p_compute.add_argument("--perempuan", type=int, default=0, help="jumlah anak perempuan")
+    # Ahli waris tambahan dari tabel aturan (dihitung lewat hitung_lengkap, tanpa riwayat)
+    for nama in ("kakek", "nenek"):
+        p_compute.add_argument(f"--{nama}", action="store_true")
+    for nama in ("cucu_laki", "cucu_perempuan", "saudara_laki", "saudara_perempuan"):
+        p_compute.add_argument(f"--{nama.replace('_', '-')}", dest=nama, type=int, default=0,
+                               help=f"jumlah {nama.replace('_', ' ')}")
+    p_compute.add_argument("--radd", action="store_true", help="kembalikan sisa ke ashabul furudh (selain suami/istri)")
+    p_batch = sub.add_parser("batch", help="hitung file CSV kasus")
+    p_batch.add_argument("input")
+    p_batch.add_argument("output")
+    p_batch.add_argument("--workers", type=int, default=1, help="jumlah proses (0 = semua core)")
+    p_batch.add_argument("--chunk", type=int, default=BATCH_CHUNK, help="baris per blok")
+    p_import = sub.add_parser("import", help="muat file export riwayat (txt/jsonl/csv) ke database SQLite")
+    p_import.add_argument("input")
+    p_import.add_argument("--db", default=os.environ.get("WARISAN_RIWAYAT_DB"),
+                          help="file SQLite tujuan (default: WARISAN_RIWAYAT_DB)")
+    p_import.add_argument("--format", choices=FORMAT_IMPORT, default=None, help="default: dideteksi dari isi file")
+    p_import.add_argument("--batch", type=int, default=IMPORT_BATCH, help="entri per transaksi")
+    p_serve = sub.add_parser("serve", help="jalankan layanan JSON per baris (TCP/Unix socket)")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--unix", default=None, help="path Unix socket (menggantikan host/port)")
+    p_serve.add_argument("--max-inflight", type=int, default=SERVICE_MAX_INFLIGHT)
+    p_serve.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="jumlah thread perhitungan")
+    p_bench = sub.add_parser("bench", help="jalankan benchmark dan bandingkan dengan baseline")
+    p_bench.add_argument("--n", type=int, default=2000, help="jumlah kasus per skenario")
+    p_bench.add_argument("--seed", type=int, default=0)
+    p_bench.add_argument("--save", default=None, help="simpan hasil sebagai baseline JSON")
+    p_bench.add_argument("--compare", default=None, help="bandingkan dengan baseline JSON")
+    p_bench.add_argument("--threshold", type=float, default=BENCH_THRESHOLD,
+                         help="ambang regresi default (0.25 = 25%% lebih lambat)")
+    sub.add_parser("gui", help="buka aplikasi GUI (default)")
+    args = parser.parse_args(argv)
+
+    if args.mode == "compute":
+        kode = cli_compute(args)
+    elif args.mode == "batch":
+        kode = cli_batch(args)
+    elif args.mode == "import":
+        kode = cli_import(args)
+    elif args.mode == "serve":
+        return cli_serve(args)
+    elif args.mode == "bench":
+        kode = cli_bench(args)
+    else:
+        return run_gui(args)
+    if args.timing:
+        _cetak_timing(args.mode)
+    return kode
+
 if __name__ == "__main__":
     # Program Utama (Modul 8)
-    root = tk.Tk()
-    app = AppWarisanUI(root)
-    root.mainloop()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
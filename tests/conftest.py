@@ -0,0 +1,34 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import TA
+
+
+def _kasus(n, seed=1):
+    """Kasus acak (total, ayah, ibu, suami, istri, anak_laki, anak_perempuan)."""
+    r = random.Random(seed)
+    hasil = []
+    for _ in range(n):
+        suami = r.random() < .4
+        istri = not suami and r.random() < .5
+        total = r.choice([r.randint(1, 100), r.randint(1, 10**7), r.randint(1, 10**12)])
+        hasil.append((total, r.random() < .5, r.random() < .5, suami, istri,
+                      r.choice([0, 0, 1, 2, r.randint(0, 40)]), r.choice([0, 1, 2, r.randint(0, 40)])))
+    return hasil
+
+
+@pytest.fixture
+def kasus():
+    return _kasus
+
+
+@pytest.fixture
+def calc():
+    c = TA.WarisanCalculator()
+    yield c
+    c.close()
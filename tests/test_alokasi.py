@@ -0,0 +1,42 @@
+import TA
+
+
+def _per_anak(hasil):
+    """label_anak -> jumlah baris per anak dari hasil yang diekspansi."""
+    jumlah = {}
+    for label, nilai in hasil.items():
+        if label.startswith("  └─ "):
+            kelas = label.rpartition(" ")[0]
+            jumlah[kelas] = jumlah.get(kelas, 0) + nilai
+    return jumlah
+
+
+def test_baris_per_anak_sama_dengan_total_kelas(calc):
+    hasil = calc.compute(100, anak_laki=3)
+    assert [v for k, v in hasil.items() if k.startswith("  └─ ")] == [34, 33, 33]
+    assert hasil["  └─ Anak Laki-laki 1"] == 34
+    assert hasil["  └─ Anak Laki-laki 3"] == 33
+
+
+def test_jumlah_per_anak_dan_kelas_eksak(calc, kasus):
+    for k in kasus(2000):
+        hasil = calc.hitung(*k)
+        assert sum(nilai for _, nilai, _, _, _ in hasil.baris) == k[0]
+        per_anak = _per_anak(hasil)
+        for label, nilai, jumlah, label_anak, _ in hasil.baris:
+            if jumlah:
+                assert per_anak[label_anak] == nilai
+                nilai_anak = [hasil[f"{label_anak} {i}"] for i in range(1, jumlah + 1)]
+                assert max(nilai_anak) - min(nilai_anak) <= 1
+
+
+def test_format_items_sama_dengan_items(calc):
+    hasil = calc.compute(1000003, True, True, False, True, 7, 5)
+    assert list(hasil.format_items(TA.format_rp)) == [(k, TA.format_rp(v)) for k, v in hasil.items()]
+
+
+def test_total_sangat_besar_tetap_eksak(calc):
+    total = 10**40 + 7
+    hasil = calc.hitung(total, True, True, False, True, 3, 4)
+    assert sum(v for k, v in hasil.items() if not k.startswith("  └─ ")) == total
+    assert sum(_per_anak(hasil).values()) == sum(v for _, v, j, _, _ in hasil.baris if j)
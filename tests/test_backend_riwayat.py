@@ -0,0 +1,77 @@
+import pytest
+
+import TA
+
+
+def _pokok(entry):
+    return (entry['id'], entry['total'], dict(entry['inputs']), tuple(entry['hasil'].baris))
+
+
+def _lengkap(entry):
+    return (entry['timestamp'],) + _pokok(entry)
+
+
+@pytest.fixture
+def backends(tmp_path):
+    hasil = [TA.RiwayatMemori(), TA.RiwayatKolom(), TA.RiwayatSQLite(str(tmp_path / "r.db"), window=50)]
+    yield hasil
+    hasil[2].close()
+
+
+def test_compute_tercatat_sama_di_semua_backend(backends, kasus):
+    daftar = kasus(300, seed=4)
+    isi = []
+    for history in backends:
+        calc = TA.WarisanCalculator(history=history)
+        for k in daftar:
+            calc.compute(*k)
+        isi.append([_pokok(e) for e in history])
+    assert isi[0] == isi[1] == isi[2]
+    assert len(isi[0]) == len(daftar)
+
+
+def _entri(kasus):
+    calc = TA.WarisanCalculator()
+    hasil = []
+    for i, k in enumerate(kasus):
+        hasil.append({'timestamp': f"2024-0{1 + i % 9}-{10 + i % 18} 0{i % 10}:15:00", 'total': k[0],
+                      'inputs': dict(zip(TA.INPUT_KEYS, k[1:])), 'hasil': calc.hitung(*k)})
+    return hasil
+
+
+def test_akses_cari_dan_hapus_setara(backends, kasus, tmp_path):
+    entries = _entri(kasus(400, seed=6))
+    for history in backends:
+        TA.WarisanCalculator(history=history).tulis_riwayat([dict(e) for e in entries])
+    path = str(tmp_path / "r.wrb")
+    TA.WarisanCalculator(history=backends[0]).export_bin(path)
+    with TA.RiwayatBiner(path) as biner:
+        semua = backends + [biner]
+        acuan = [_lengkap(e) for e in backends[0]]
+        for history in semua:
+            assert len(history) == len(acuan)
+            assert [_lengkap(e) for e in history] == acuan
+            assert [_lengkap(e) for e in history.page(120, 180)] == acuan[120:180]
+            assert _lengkap(history[-1]) == acuan[-1]
+            assert _lengkap(history.get_id(57)) == acuan[56]
+            assert history.index_of_id(57) == 56 and history.posisi_setelah(57) == 57
+            with pytest.raises(KeyError):
+                history.get_id(10 ** 6)
+
+        konfig = tuple(entries[3]['inputs'][k] for k in TA.INPUT_KEYS)
+        for filter_ in ({'waktu_dari': "2024-03-01", 'waktu_sampai': "2024-05-20"},
+                        {'total_min': 50, 'total_max': 10 ** 7},
+                        {'konfigurasi': konfig},
+                        {'waktu_dari': "2024-02-01", 'total_min': 1000}):
+            harapan = [_lengkap(e) for e in backends[0].cari(**filter_)]
+            assert harapan
+            for history in backends[1:]:
+                assert [_lengkap(e) for e in history.cari(**filter_)] == harapan, filter_
+
+    for history in backends:
+        for entry_id in range(1, 401, 3):
+            history.delete_id(entry_id)
+    acuan = [_lengkap(e) for e in backends[0]]
+    for history in backends[1:]:
+        assert [_lengkap(e) for e in history] == acuan
+        assert history.index_of_id(acuan[10][1]) == 10
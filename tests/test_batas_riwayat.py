@@ -0,0 +1,60 @@
+import io
+import json
+
+import pytest
+
+import TA
+
+
+def _backends(tmp_path):
+    return [TA.RiwayatMemori(), TA.RiwayatKolom(), TA.RiwayatSQLite(str(tmp_path / "r.db"))]
+
+
+def test_total_di_luar_int64_ditolak_sebelum_dihitung(tmp_path):
+    for history in _backends(tmp_path):
+        calc = TA.WarisanCalculator(history=history)
+        with pytest.raises(ValueError):
+            calc.compute(2 ** 63, ayah=True)
+        with pytest.raises(ValueError):
+            calc.compute(float("inf"), ayah=True)
+        with pytest.raises(ValueError):
+            calc.compute(1000, anak_laki=2 ** 32)
+        assert len(calc.history) == 0
+        calc.close()
+
+
+def test_total_maksimum_tersimpan_dan_bisa_diexport(tmp_path):
+    for history in _backends(tmp_path):
+        calc = TA.WarisanCalculator(history=history)
+        hasil = calc.compute(TA.TOTAL_MAKS_RIWAYAT, True, True, False, True, 3, 2)
+        assert calc.history[-1]['hasil'] == hasil
+        path = str(tmp_path / f"{type(history).__name__}.wrb")
+        assert calc.export_bin(path) == path
+        with TA.RiwayatBiner(path) as rb:
+            assert rb[0]['total'] == TA.TOTAL_MAKS_RIWAYAT
+        calc.close()
+
+
+def test_hitung_tanpa_riwayat_tetap_menerima_total_besar(calc):
+    assert sum(v for _, v, _, _, _ in calc.hitung(10 ** 30, ayah=True).baris) == 10 ** 30
+
+
+def test_import_total_besar_dilaporkan_sebagai_blok_rusak(tmp_path, calc):
+    calc.compute(1000, ayah=True)
+    path = str(tmp_path / "r.jsonl")
+    calc.export_jsonl(path)
+    with open(path, encoding="utf-8") as f:
+        obj = json.loads(f.readline())
+    obj['total'] = 2 ** 64
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(obj) + "\n")
+    tujuan = TA.WarisanCalculator(history=TA.RiwayatKolom())
+    laporan = tujuan.import_riwayat(path)
+    assert (laporan['diimpor'], laporan['rusak']) == (1, 1)
+
+
+def test_csv_hitung_massal_menolak_total_besar():
+    teks = f"total,ayah\n1000,1\n{2 ** 63},1\n".encode()
+    hasil = list(TA._iter_kasus_csv(TA._PembacaBaris(io.BytesIO(teks))))
+    assert hasil[0][1] == (1000, True, False, False, False, 0, 0)
+    assert isinstance(hasil[1][1], ValueError)
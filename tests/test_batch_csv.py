@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import TA
+
+HEADER = "total,ayah,ibu,suami,istri,anak_laki,anak_perempuan\n"
+
+
+def test_baris_tidak_valid_dilewati_dan_dilaporkan(tmp_path):
+    masuk, keluar = tmp_path / "in.csv", tmp_path / "out.csv"
+    masuk.write_text(HEADER + "1000,1,0,0,0,1,0\nabc,1,0,0,0,0,0\n\n"
+                     "500,0,1,1,1,0,0\n700,0,1,0,1,0,-2\n900,1,1,0,1,2,1\n", encoding="utf-8")
+    for workers in (1, 2):
+        laporan = TA.run_batch(str(masuk), str(keluar), workers=workers, chunk=2)
+        assert laporan['dihitung'] == 2 and laporan['rusak'] == 3
+        assert [nomor for nomor, _ in laporan['galat']] == [2, 4, 5]
+        baris = keluar.read_text(encoding="utf-8").splitlines()
+        assert len(baris) == 3
+        assert baris[1].startswith("1000,") and baris[2].startswith("900,")
+
+
+def test_gagal_di_tengah_tidak_meninggalkan_output_terpotong(tmp_path):
+    masuk, keluar = tmp_path / "in.csv", tmp_path / "out.csv"
+    masuk.write_bytes((HEADER + "1000,1,0,0,0,1,0\n" * 50).encode() + b"\xff\xfe\n")
+    keluar.write_text("lama", encoding="utf-8")
+    with pytest.raises(ValueError):
+        TA.run_batch(str(masuk), str(keluar), chunk=10)
+    assert keluar.read_text(encoding="utf-8") == "lama"
+    assert not os.path.exists(str(keluar) + ".tmp")
+
+
+def test_output_proses_pool_identik_byte_per_byte(tmp_path, kasus):
+    masuk = tmp_path / "in.csv"
+    with open(masuk, "w", encoding="utf-8", newline="") as f:
+        f.write(HEADER)
+        for total, *flags, laki, perempuan in kasus(2500, seed=9):
+            f.write(",".join([str(total), *("1" if x else "0" for x in flags), str(laki), str(perempuan)]) + "\n")
+    hasil = {}
+    for workers, chunk in ((1, 1000), (3, 97), (4, 1000)):
+        keluar = tmp_path / f"out{workers}.csv"
+        laporan = TA.run_batch(str(masuk), str(keluar), workers=workers, chunk=chunk)
+        assert laporan['dihitung'] == 2500 and laporan['rusak'] == 0
+        hasil[workers] = keluar.read_bytes()
+    assert hasil[1] == hasil[3] == hasil[4]
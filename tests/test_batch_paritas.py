@@ -0,0 +1,36 @@
+import pytest
+
+import TA
+
+
+def _cek_paritas(calc, kasus):
+    kolom = calc.compute_batch(*zip(*kasus))
+    labels = calc._label_batch()
+    assert set(kolom) == set(labels)
+    for i, k in enumerate(kasus):
+        harapan = dict.fromkeys(labels, 0)
+        for label, nilai, jumlah, label_anak, per in calc.hitung(*k).baris:
+            harapan[label] = nilai
+            if jumlah:
+                harapan[label_anak] = per
+        assert {label: int(kolom[label][i]) for label in labels} == harapan, k
+
+
+def test_compute_batch_numpy_sama_dengan_hitung(calc, kasus):
+    pytest.importorskip("numpy")
+    _cek_paritas(calc, kasus(3000, seed=11))
+
+
+def test_compute_batch_tanpa_numpy_sama_dengan_hitung(calc, kasus, monkeypatch):
+    monkeypatch.setattr(TA, "_import_numpy", lambda: None)
+    _cek_paritas(calc, kasus(1000, seed=12))
+
+
+def test_compute_batch_total_besar_kembali_ke_jalur_biasa(calc):
+    kasus = [(10 ** 30 + 7, True, True, False, True, 3, 2), (1000, False, True, True, False, 0, 1)]
+    _cek_paritas(calc, kasus)
+
+
+def test_compute_batch_total_tidak_valid(calc):
+    with pytest.raises(ValueError):
+        calc.compute_batch([1000, 0], [True, False])
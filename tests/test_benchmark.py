@@ -0,0 +1,34 @@
+import json
+
+import TA
+
+BASELINE = {'thresholds': {'ketat': 0.05},
+            'hasil': {'cepat': 10.0, 'lambat': 10.0, 'ketat': 10.0, 'hilang': 5.0, 'nol': 0.0}}
+
+
+def test_ambang_regresi():
+    hasil = {'cepat': 12.0, 'lambat': 13.0, 'ketat': 10.6, 'baru': 99.0, 'nol': 1.0}
+    laporan = {nama: (base, sekarang, rasio, regresi)
+               for nama, base, sekarang, rasio, regresi in TA.compare_benchmarks(hasil, BASELINE, threshold=0.25)}
+    # 20% lebih lambat masih di bawah ambang 25%; 30% ditandai regresi
+    assert laporan['cepat'] == (10.0, 12.0, 1.2, False)
+    assert laporan['lambat'][3] is True and laporan['lambat'][2] == 1.3
+    # Ambang per benchmark dari baseline menggantikan ambang umum
+    assert laporan['ketat'][3] is True
+    # Kunci yang tidak ada di salah satu sisi (atau baseline 0) dilewati
+    assert set(laporan) == {'cepat', 'lambat', 'ketat'}
+
+
+def test_tanpa_kunci_baseline():
+    assert TA.compare_benchmarks({'cepat': 1.0}, {}) == []
+    assert TA.compare_benchmarks({}, BASELINE) == []
+
+
+def test_cli_bench_exit_code(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(BASELINE), encoding="utf-8")
+    monkeypatch.setattr(TA, "run_benchmarks", lambda n, seed: {'cepat': 11.0, 'lambat': 10.0})
+    assert TA.main(["bench", "--compare", str(path)]) == 0
+    monkeypatch.setattr(TA, "run_benchmarks", lambda n, seed: {'cepat': 11.0, 'lambat': 20.0})
+    assert TA.main(["bench", "--compare", str(path)]) == 1
+    assert "REGRESI" in capsys.readouterr().out
@@ -0,0 +1,30 @@
+import TA
+
+
+def test_kasus_berulang_berbagi_rekaman(calc):
+    for _ in range(3):
+        calc.compute(1000, ayah=True, anak_laki=2)
+    calc.compute(1000, ibu=True)
+    a, b, c, d = calc.history
+    assert a['inputs'] is b['inputs'] is c['inputs'] and a['hasil'] is b['hasil'] is c['hasil']
+    assert d['hasil'] is not a['hasil']
+    info = calc.hasil_unik.info()
+    assert info['hits'] == 2 and info['misses'] == 2
+
+
+def test_rekaman_lama_dibuang_tetapi_riwayat_utuh():
+    unik = TA.HasilUnik(maxsize=2)
+    for kunci in "abca":
+        unik.ambil(kunci, lambda: object())
+    assert unik.info() == {'hits': 0, 'misses': 4, 'currsize': 2, 'maxsize': 2}
+
+
+def test_import_memakai_objek_bersama(calc, tmp_path):
+    for _ in range(4):
+        calc.compute(5000, istri=True, anak_perempuan=3)
+    path = str(tmp_path / "r.jsonl")
+    calc.export_jsonl(path)
+    baru = TA.WarisanCalculator()
+    baru.import_riwayat(path)
+    hasil = {id(e['hasil']) for e in baru.history}
+    assert len(baru.history) == 4 and len(hasil) == 1
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import TA
+
+
+class BatalSetelah:
+    """Pengganti threading.Event yang menjadi set setelah n kali dicek."""
+    def __init__(self, n):
+        self.n = n
+
+    def is_set(self):
+        self.n -= 1
+        return self.n < 0
+
+
+def _isi(calc, n, awal=1000):
+    for i in range(n):
+        calc.compute(awal + i, ayah=True, istri=True, anak_laki=i % 3, anak_perempuan=1)
+
+
+def _baca(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+@pytest.mark.parametrize("nama", ["export_txt", "export_csv", "export_jsonl"])
+def test_batal_di_tengah_tidak_mengubah_file(calc, tmp_path, monkeypatch, nama, incremental):
+    monkeypatch.setattr(TA, "EXPORT_BLOCK", 10)
+    export = getattr(calc, nama)
+    path = str(tmp_path / "riwayat.out")
+    _isi(calc, 25)
+    assert export(path, incremental=True) == path
+    isi, hwm = _baca(path), _baca(path + ".hwm")
+
+    _isi(calc, 100, awal=5000)
+    batal = BatalSetelah(3)
+    assert export(path, incremental=incremental, batal=batal) is None
+    assert batal.n < 0 # benar-benar dibatalkan setelah beberapa blok
+    assert _baca(path) == isi
+    assert _baca(path + ".hwm") == hwm
+    assert sorted(os.listdir(tmp_path)) == ["riwayat.out", "riwayat.out.hwm"]
+
+    # Export berikutnya tetap lengkap seolah pembatalan tidak pernah terjadi
+    assert export(path, incremental=incremental) == path
+    acuan = str(tmp_path / "acuan.out")
+    getattr(TA.WarisanCalculator(history=calc.history), nama)(acuan)
+    assert _baca(path) == _baca(acuan)
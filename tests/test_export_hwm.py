@@ -0,0 +1,34 @@
+import os
+
+import TA
+
+
+def test_hwm_hanya_untuk_export_incremental(calc, tmp_path):
+    path = str(tmp_path / "riwayat.txt")
+    calc.compute(1000, ayah=True)
+    calc.export_txt(path)
+    assert not os.path.exists(path + ".hwm")
+
+    calc.export_txt(path, incremental=True)
+    calc.compute(2000, ibu=True)
+    calc.export_txt(path, incremental=True)
+    assert os.path.exists(path + ".hwm")
+    assert open(path, encoding="utf-8").read().count("=== Riwayat") == 2
+
+    # Export penuh menimpa file dan membuang high-water mark yang basi
+    calc.export_txt(path)
+    assert not os.path.exists(path + ".hwm")
+    calc.compute(3000, ayah=True)
+    calc.export_txt(path, incremental=True)
+    assert open(path, encoding="utf-8").read().count("=== Riwayat") == 3
+
+
+def test_export_bin_dengan_instrumentasi(calc, tmp_path):
+    calc.instrumentasi = TA.Instrumentasi()
+    for total in range(1, 50):
+        calc.compute(total * 1000, ayah=True, anak_perempuan=2)
+    path = str(tmp_path / "riwayat.wrb")
+    calc.export_bin(path)
+    with TA.RiwayatBiner(path) as rb:
+        assert len(rb) == 49
+    assert not os.path.exists(path + ".hwm")
@@ -0,0 +1,35 @@
+import pytest
+
+import TA
+
+
+def test_baris_per_anak_tidak_disimpan(calc):
+    hasil = calc.hitung(10 ** 9, istri=True, anak_laki=10 ** 6, anak_perempuan=3)
+    assert len(hasil.baris) == 3
+    assert len(hasil) == 3 + 10 ** 6 + 3
+    label = TA.LABEL_PER_ANAK_LAKI
+    assert hasil[f"{label} 1"] in (hasil[f"{label} 1000000"], hasil[f"{label} 1000000"] + 1)
+    for kunci in (f"{label} 0", f"{label} 1000001", f"{label} x", "Tidak ada"):
+        with pytest.raises(KeyError):
+            hasil[kunci]
+    assert hasil.get("Tidak ada", -1) == -1
+
+
+def test_mapping_sama_dengan_ekspansi(calc):
+    hasil = calc.hitung(1000, True, True, False, True, 3, 2)
+    items = list(hasil.items())
+    assert list(hasil) == [k for k, _ in items]
+    assert dict(items) == {k: hasil[k] for k in hasil}
+    assert list(hasil.format_items(TA.format_rp)) == [(k, TA.format_rp(v)) for k, v in items]
+    assert hasil == dict(items)
+
+
+def test_sisa_nol_rupiah_tidak_dicantumkan(calc, tmp_path):
+    # Suami 1/2 + Ibu 1/3, sisa 1/6: dengan total 1 rupiah sisanya habis dibulatkan
+    assert TA.LABEL_SISA not in calc.compute(1, ibu=True, suami=True)
+    assert calc.compute(600, ibu=True, suami=True)[TA.LABEL_SISA] == 100
+    path = str(tmp_path / "r.csv")
+    calc.export_csv(path)
+    baru = TA.WarisanCalculator()
+    baru.import_riwayat(path)
+    assert [e['hasil'] for e in baru.history] == [e['hasil'] for e in calc.history]
@@ -0,0 +1,55 @@
+import TA
+
+KONFIG = dict(ayah=True, ibu=True, suami=True, anak_laki=1, anak_perempuan=2)
+
+
+def test_catat_dan_stats():
+    ins = TA.Instrumentasi()
+    ins.catat("fase", 0.5e-6)
+    ins.catat("fase", 3e-6)
+    ins.catat("fase", 1.0)
+    st = ins.stats()["fase"]
+    assert st["jumlah"] == 3
+    assert abs(st["total_ms"] - (1.0 + 3.5e-6) * 1000) < 1e-9
+    assert abs(st["rata_us"] - (1.0 + 3.5e-6) / 3 * 1e6) < 1e-6
+    assert abs(st["maks_us"] - 1e6) < 1e-6
+    assert st["histogram"] == {"<=1 µs": 1, "<=5 µs": 1, ">100000 µs": 1}
+    ins.reset()
+    assert ins.stats() == {}
+
+
+def test_nonaktif_tanpa_fase(calc):
+    calc.compute(1000, **KONFIG)
+    st = calc.instrumentasi_stats()
+    assert st["aktif"] is False
+    assert st["fase"] == {}
+    assert st["riwayat"] == 1
+
+
+def test_compute_dan_export_tercatat(calc, tmp_path):
+    ins = calc.enable_instrumentasi()
+    assert calc.enable_instrumentasi() is ins
+    for total in (1000, 2000, 3000):
+        calc.compute(total, **KONFIG)
+    calc.export_txt(str(tmp_path / "riwayat.txt"))
+
+    st = calc.instrumentasi_stats()
+    assert st["aktif"] is True
+    assert st["riwayat"] == 3
+    assert st["plan_cache"]["misses"] == 1
+    assert st["plan_cache"]["hits"] == 2
+    assert st["plan_cache"]["currsize"] == 1
+
+    fase = st["fase"]
+    assert fase["compute/total"]["jumlah"] == 3
+    assert fase["export/total"]["jumlah"] == 1
+    for nama, data in fase.items():
+        assert set(data) == {"jumlah", "total_ms", "rata_us", "maks_us", "histogram"}, nama
+        assert data["total_ms"] >= 0
+        assert data["maks_us"] >= data["rata_us"] >= 0
+        assert sum(data["histogram"].values()) == data["jumlah"]
+
+    calc.disable_instrumentasi()
+    calc.compute(4000, **KONFIG)
+    st = calc.instrumentasi_stats()
+    assert st["aktif"] is False and st["fase"] == {}
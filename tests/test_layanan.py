@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+
+import TA
+
+
+async def _klien(service, requests):
+    host, port = service.address[:2]
+    reader, writer = await asyncio.open_connection(host, port, limit=TA.SERVICE_MAX_LINE)
+    for req in requests:
+        writer.write(json.dumps(req).encode() + b"\n")
+    await writer.drain()
+    respons = [json.loads(await reader.readline()) for _ in requests]
+    writer.close()
+    return respons
+
+
+def _jalankan(uji, **opsi):
+    async def utama():
+        service = TA.WarisanService(**opsi)
+        await service.start(port=0)
+        try:
+            return await uji(service)
+        finally:
+            await service.close()
+    return asyncio.run(utama())
+
+
+def test_respons_ringkas_untuk_ribuan_anak():
+    async def uji(service):
+        return await _klien(service, [{'id': 1, 'total': 10 ** 9, 'istri': True, 'anak_laki': 5000, 'anak_perempuan': 3}])
+    respon, = _jalankan(uji)
+    assert respon['ok']
+    hasil = TA.WarisanCalculator().hitung(10 ** 9, istri=True, anak_laki=5000, anak_perempuan=3)
+    assert respon['hasil'] == {label: nilai for label, nilai, *_ in hasil.baris}
+    for label, nilai, jumlah, label_anak, per in hasil.baris:
+        if jumlah:
+            anak = respon['anak'][label]
+            assert anak['label_anak'] == label_anak and anak['jumlah'] == jumlah
+            nilai_anak = [anak['nilai_per_anak'] + (i < anak['lebih']) for i in range(jumlah)]
+            assert nilai_anak == [hasil[f"{label_anak} {i}"] for i in range(1, jumlah + 1)]
+            assert sum(nilai_anak) == nilai
+
+
+def test_flag_bukan_boolean_json_ditolak():
+    async def uji(service):
+        return await _klien(service, [{'id': 1, 'total': 100, 'ayah': "false"},
+                                      {'id': 2, 'total': 100, 'anak_laki': "2"},
+                                      {'id': 3, 'total': 100, 'anak_laki': True},
+                                      {'id': 4, 'total': 100, 'ayah': False, 'ibu': True}])
+    respons = {r['id']: r for r in _jalankan(uji)}
+    assert [respons[i]['ok'] for i in (1, 2, 3, 4)] == [False, False, False, True]
+    assert "ayah" in respons[1]['error']
+
+
+def test_request_identik_digabung():
+    async def uji(service):
+        lepas = threading.Event()
+        panggilan = []
+        asli = service._hitung_json
+
+        def hitung_tertahan(kunci):
+            panggilan.append(kunci)
+            lepas.wait(5)
+            return asli(kunci)
+        service._hitung_json = hitung_tertahan
+
+        async def lepaskan():
+            while service.jumlah_request < 10:
+                await asyncio.sleep(0.01)
+            lepas.set()
+        respons, _ = await asyncio.gather(
+            _klien(service, [{'id': i, 'total': 1000, 'ayah': True, 'anak_laki': 2} for i in range(10)]),
+            lepaskan())
+        return respons, panggilan, service.jumlah_coalesced
+    respons, panggilan, coalesced = _jalankan(uji)
+    assert len(panggilan) == 1 and coalesced == 9
+    assert sorted(r['id'] for r in respons) == list(range(10))
+    assert all(r['hasil'] == respons[0]['hasil'] for r in respons)
+
+
+def test_close_dengan_klien_terbuka_tanpa_error():
+    async def uji(service):
+        host, port = service.address[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b'{"id": 1, "total": 100, "ayah": true}\n')
+        await writer.drain()
+        assert json.loads(await reader.readline())['ok']
+        await asyncio.wait_for(service.close(), 5)
+        assert await reader.read() == b""
+        assert not service._klien
+        return True
+    assert _jalankan(uji)
@@ -0,0 +1,69 @@
+import itertools
+
+import pytest
+
+import TA
+from TA import (LABEL_ANAK_LAKI_TOTAL, LABEL_ANAK_PEREMPUAN_1, LABEL_ANAK_PEREMPUAN_TOTAL, LABEL_AYAH,
+                LABEL_CUCU_LAKI_TOTAL, LABEL_CUCU_PEREMPUAN_1, LABEL_CUCU_PEREMPUAN_TOTAL, LABEL_IBU, LABEL_ISTRI,
+                LABEL_KAKEK, LABEL_NENEK, LABEL_SAUDARA_PEREMPUAN_TOTAL, LABEL_SISA, LABEL_SUAMI)
+
+# (total, radd, ahli waris, {label kelas: nilai}) dihitung manual
+KASUS = [
+    # Hajb: kakek terhalang ayah, nenek terhalang ibu, cucu terhalang anak laki-laki
+    (1200, False, dict(ayah=True, kakek=True), {LABEL_AYAH: 1200}),
+    (1200, False, dict(ayah=True, ibu=True, nenek=True), {LABEL_IBU: 400, LABEL_AYAH: 800}),
+    (1200, False, dict(ayah=True, nenek=True), {LABEL_NENEK: 200, LABEL_AYAH: 1000}),
+    (1200, False, dict(anak_laki=1, cucu_laki=2, cucu_perempuan=1), {LABEL_ANAK_LAKI_TOTAL: 1200}),
+    (1200, False, dict(kakek=True, anak_laki=1), {LABEL_KAKEK: 200, LABEL_ANAK_LAKI_TOTAL: 1000}),
+    # Saudara yang mahjub oleh ayah tetap menurunkan bagian ibu menjadi 1/6
+    (1200, False, dict(ayah=True, ibu=True, saudara_laki=2), {LABEL_IBU: 200, LABEL_AYAH: 1000}),
+    # Cucu perempuan 1/6 penyempurna 2/3; terhalang oleh dua anak perempuan
+    (1200, False, dict(anak_perempuan=1, cucu_perempuan=1),
+     {LABEL_ANAK_PEREMPUAN_1: 600, LABEL_CUCU_PEREMPUAN_1: 200, LABEL_SISA: 400}),
+    (1200, False, dict(anak_perempuan=2, cucu_perempuan=1), {LABEL_ANAK_PEREMPUAN_TOTAL: 800, LABEL_SISA: 400}),
+    # Ashabah: cucu laki-laki 2:1, saudari ma'al ghair bersama anak perempuan
+    (2400, False, dict(istri=True, cucu_laki=1, cucu_perempuan=1),
+     {LABEL_ISTRI: 300, LABEL_CUCU_LAKI_TOTAL: 1400, LABEL_CUCU_PEREMPUAN_TOTAL: 700}),
+    (1200, False, dict(anak_perempuan=1, saudara_perempuan=1),
+     {LABEL_ANAK_PEREMPUAN_1: 600, LABEL_SAUDARA_PEREMPUAN_TOTAL: 600}),
+    # Awl: 1/2 + 2/3 = 7/6
+    (1400, False, dict(suami=True, saudara_perempuan=2), {LABEL_SUAMI: 600, LABEL_SAUDARA_PEREMPUAN_TOTAL: 800}),
+    # Radd: sisa kembali sebanding bagian, kecuali ke suami/istri
+    (1200, True, dict(anak_perempuan=1, cucu_perempuan=1), {LABEL_ANAK_PEREMPUAN_1: 900, LABEL_CUCU_PEREMPUAN_1: 300}),
+    (1200, True, dict(ibu=True, anak_perempuan=1), {LABEL_IBU: 300, LABEL_ANAK_PEREMPUAN_1: 900}),
+    (1200, True, dict(istri=True, anak_perempuan=1), {LABEL_ISTRI: 150, LABEL_ANAK_PEREMPUAN_1: 1050}),
+    (1200, False, dict(istri=True, anak_perempuan=1), {LABEL_ISTRI: 150, LABEL_ANAK_PEREMPUAN_1: 600, LABEL_SISA: 450}),
+    (1200, True, dict(suami=True), {LABEL_SUAMI: 600, LABEL_SISA: 600}),
+]
+
+
+@pytest.mark.parametrize("total, radd, ahli_waris, harapan", KASUS)
+def test_hajb_awl_radd(calc, total, radd, ahli_waris, harapan):
+    hasil = calc.hitung_lengkap(total, radd=radd, **ahli_waris)
+    assert {label: nilai for label, nilai, *_ in hasil.baris} == harapan
+
+
+def test_mesin_tanpa_cache_sama_dengan_cache(calc):
+    kunci = [a['kunci'] for a in TA.ATURAN_AHLI_WARIS]
+    for nilai in itertools.islice(itertools.product((0, 1, 2), repeat=len(kunci)), 0, None, 7):
+        ahli_waris = dict(zip(kunci, nilai))
+        if ahli_waris['suami'] and ahli_waris['istri'] or any(
+                ahli_waris[a['kunci']] > 1 for a in TA.ATURAN_AHLI_WARIS if not a.get('jumlah')):
+            continue
+        jumlah = calc.mesin.vektor(ahli_waris)
+        for radd in (False, True):
+            assert calc.mesin.evaluasi(jumlah, radd) == calc.mesin.evaluasi(jumlah, radd, pakai_cache=False)
+
+
+def test_ahli_waris_dasar_sama_dengan_hitung(calc, kasus):
+    for k in kasus(300, seed=2):
+        ahli_waris = dict(zip(TA.INPUT_KEYS, k[1:]))
+        assert calc.hitung_lengkap(k[0], **ahli_waris).baris == calc.hitung(*k).baris
+
+
+@pytest.mark.parametrize("total", ["inf", "nan", "0"])
+def test_cli_compute_total_tidak_valid(total, capsys):
+    assert TA.main(["compute", total, "--kakek"]) == 2
+    assert capsys.readouterr().err.startswith("Error: Total harta")
+    with pytest.raises(ValueError):
+        TA.WarisanCalculator().hitung_lengkap(TA.parse_total(total), kakek=True)
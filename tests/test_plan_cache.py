@@ -0,0 +1,30 @@
+import TA
+
+KONFIG = dict(ayah=True, ibu=True, istri=True, anak_laki=2, anak_perempuan=3)
+
+
+def test_kombinasi_berulang_memakai_cache(calc):
+    calc.compute(1000, **KONFIG)
+    awal = calc.plan_cache_info()
+    for total in (2000, 3000, 10 ** 9):
+        calc.compute(total, **KONFIG)
+    info = calc.plan_cache_info()
+    assert info.hits == awal.hits + 3
+    assert info.misses == awal.misses
+
+    calc.compute(1000, ibu=True, anak_perempuan=1)
+    assert calc.plan_cache_info().misses == awal.misses + 1
+
+
+def test_rencana_tidak_bergantung_pada_total(calc):
+    rencana = calc.get_plan(**KONFIG)
+    calc.compute(12345, **KONFIG)
+    assert calc.get_plan(**KONFIG) is rencana
+    # Argumen bukan bool/int kanonik tetap memetakan ke rencana yang sama
+    assert calc.get_plan(ayah=1, ibu="x", istri=True, anak_laki=2.0, anak_perempuan=3) is rencana
+
+
+def test_cache_hangat_sama_dengan_cache_kosong(kasus):
+    hangat = TA.WarisanCalculator()
+    for k in kasus(200, seed=3):
+        assert hangat.compute(*k) == TA.WarisanCalculator().compute(*k)
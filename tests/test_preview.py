@@ -0,0 +1,47 @@
+import pytest
+
+import TA
+
+KONFIG = dict(ayah=True, ibu=True, istri=True, anak_laki=2, anak_perempuan=1)
+
+
+def test_preview_tidak_menyentuh_riwayat(calc):
+    calc.compute(5000, **KONFIG)
+    sebelum = list(calc.history)
+    for total in (1000, 2000, 10 ** 12):
+        calc.preview(total, **KONFIG)
+    assert list(calc.history) == sebelum
+    assert len(calc.history) == 1
+
+
+def test_preview_sama_dengan_compute(calc, kasus):
+    for k in kasus(300, seed=11):
+        assert calc.preview(*k) == TA.WarisanCalculator().compute(*k)
+
+
+def test_preview_memakai_ulang_rencana_jika_hanya_total_berubah(calc):
+    calc.preview(1000, **KONFIG)
+    awal = calc.plan_cache_info()
+    for total in range(1001, 1100):
+        calc.preview(total, **KONFIG)
+    # Rencana diambil dari pratinjau sebelumnya, cache tidak disentuh sama sekali
+    info = calc.plan_cache_info()
+    assert (info.hits, info.misses) == (awal.hits, awal.misses)
+
+    calc.preview(1000, **dict(KONFIG, anak_laki=3))
+    assert calc.plan_cache_info().misses == awal.misses + 1
+
+
+def test_preview_total_tidak_valid(calc):
+    with pytest.raises(ValueError):
+        calc.preview(0, **KONFIG)
+    assert len(calc.history) == 0
+
+
+def test_preview_total_tak_hingga(calc):
+    calc.preview(1000, **KONFIG)
+    for total in (float("inf"), float("nan")):
+        with pytest.raises(ValueError, match="terhingga"):
+            calc.preview(total, **KONFIG)
+    # Pratinjau berikutnya tetap memakai rencana yang sama
+    assert calc.preview(2000, **KONFIG) == calc.hitung(2000, **KONFIG)
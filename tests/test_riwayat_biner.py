@@ -0,0 +1,37 @@
+import gc
+
+import pytest
+
+import TA
+
+
+@pytest.fixture
+def file_bin(calc, tmp_path):
+    for total in range(1, 100):
+        calc.compute(total * 1000, ayah=True, anak_laki=2)
+    path = str(tmp_path / "riwayat.wrb")
+    calc.export_bin(path)
+    return path
+
+
+def test_close_saat_tabel_masih_dipegang(file_bin):
+    np = pytest.importorskip("numpy")
+    rb = TA.RiwayatBiner(file_bin)
+    tabel = rb.tabel()
+    potongan = rb.kolom("total")[2:5]
+    ids = np.asarray(rb.kolom("id"))
+    rb.close()
+    rb.close()
+    assert list(tabel['total'][:3]) == [1000, 2000, 3000]
+    assert list(potongan) == [3000, 4000, 5000]
+    assert list(ids[:3]) == [1, 2, 3]
+    del tabel, potongan, ids
+    gc.collect()
+
+
+def test_close_melepas_view_kolom(file_bin):
+    with TA.RiwayatBiner(file_bin) as rb:
+        total = rb.kolom("total")
+        assert sum(total) == sum(range(1, 100)) * 1000
+    with pytest.raises(ValueError):
+        total[0]
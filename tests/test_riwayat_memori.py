@@ -0,0 +1,62 @@
+import bisect
+import random
+import threading
+
+import TA
+
+
+def test_daftar_terurut_setara_list_terurut(monkeypatch):
+    monkeypatch.setattr(TA._DaftarTerurut, "BLOK", 8)
+    r = random.Random(3)
+    daftar, acuan = TA._DaftarTerurut(), []
+    for langkah in range(5000):
+        if acuan and r.random() < .45:
+            x = r.choice(acuan)
+            acuan.remove(x)
+            daftar.remove(x)
+        else:
+            x = r.randint(0, 2000)
+            if x in acuan:
+                continue
+            bisect.insort(acuan, x)
+            daftar.add(x)
+        if langkah % 50 == 0:
+            assert list(daftar) == acuan and len(daftar) == len(acuan)
+            x = r.randint(-1, 2001)
+            assert daftar.bisect_left(x) == bisect.bisect_left(acuan, x)
+            assert daftar.bisect_right(x) == bisect.bisect_right(acuan, x)
+            if acuan:
+                i = r.randrange(len(acuan))
+                assert daftar[i] == acuan[i] and daftar[-1] == acuan[-1]
+                assert daftar[i:i + 17] == acuan[i:i + 17]
+
+
+def test_hapus_per_id_menjaga_posisi_dan_indeks(calc):
+    for total in range(100, 400):
+        calc.compute(total, ayah=True, anak_laki=total % 3)
+    ids = [e['id'] for e in calc.history]
+    for i in ids[::3]:
+        calc.hapus_riwayat(i)
+    sisa = [i for i in ids if i not in set(ids[::3])]
+    assert [e['id'] for e in calc.history] == sisa
+    assert [calc.history.index_of_id(i) for i in sisa] == list(range(len(sisa)))
+    assert [e['id'] for e in calc.history.cari(total_min=150, total_max=250)] == \
+        [e['id'] for e in calc.history if 150 <= e['total'] <= 250]
+
+
+def test_hapus_riwayat_aman_bersamaan_dengan_compute(calc):
+    for total in range(1, 501):
+        calc.compute(total, ibu=True)
+    ids = [e['id'] for e in calc.history]
+
+    def tulis():
+        for total in range(1000, 1500):
+            calc.compute(total, ayah=True)
+
+    t = threading.Thread(target=tulis)
+    t.start()
+    for i in ids:
+        calc.hapus_riwayat(i)
+    t.join()
+    assert len(calc.history) == 500
+    assert all(e['total'] >= 1000 for e in calc.history)
@@ -0,0 +1,54 @@
+import pytest
+
+import TA
+
+
+def _isi(history):
+    return [(e['timestamp'], e['total'], dict(e['inputs']), tuple(e['hasil'].baris)) for e in history]
+
+
+@pytest.fixture
+def calc_terisi(calc, kasus):
+    for k in kasus(250, seed=8):
+        calc.compute(*k)
+    calc.compute(TA.TOTAL_MAKS_RIWAYAT, True, True, True, False, 5, 4)
+    calc.compute(1, istri=True, anak_perempuan=40)
+    return calc
+
+
+@pytest.mark.parametrize("format", ["txt", "csv", "jsonl"])
+def test_export_lalu_import_kembali_sama(calc_terisi, tmp_path, format):
+    path = str(tmp_path / f"riwayat.{format}")
+    getattr(calc_terisi, f"export_{format}")(path)
+    baru = TA.WarisanCalculator()
+    laporan = baru.import_riwayat(path)
+    assert laporan['format'] == format and laporan['rusak'] == 0
+    assert laporan['diimpor'] == len(calc_terisi.history)
+    assert _isi(baru.history) == _isi(calc_terisi.history)
+
+
+@pytest.mark.parametrize("format", ["txt", "csv", "jsonl"])
+def test_export_incremental_sama_dengan_export_penuh(calc_terisi, tmp_path, format):
+    export = getattr(calc_terisi, f"export_{format}")
+    penuh, bertahap = str(tmp_path / f"penuh.{format}"), str(tmp_path / f"bertahap.{format}")
+    export(bertahap, incremental=True)
+    calc_terisi.compute(12345, ayah=True, anak_laki=2)
+    export(bertahap, incremental=True)
+    export(penuh)
+    baru = TA.WarisanCalculator()
+    baru.import_riwayat(bertahap)
+    assert _isi(baru.history) == _isi(calc_terisi.history)
+    with open(penuh, "rb") as a, open(bertahap, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_export_bin_lalu_baca_mmap_dan_export_ulang(calc_terisi, tmp_path):
+    path = str(tmp_path / "riwayat.wrb")
+    calc_terisi.export_bin(path)
+    with TA.RiwayatBiner(path) as biner:
+        assert _isi(biner) == _isi(calc_terisi.history)
+        ulang = str(tmp_path / "ulang.jsonl")
+        calc_terisi.export_jsonl(ulang, sumber=biner)
+    baru = TA.WarisanCalculator()
+    baru.import_riwayat(ulang)
+    assert _isi(baru.history) == _isi(calc_terisi.history)
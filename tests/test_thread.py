@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+import TA
+
+
+@pytest.mark.parametrize("backend", ["memori", "kolom", "sqlite"])
+def test_compute_paralel_mencatat_semua_entri(kasus, tmp_path, backend):
+    history = {'memori': TA.RiwayatMemori, 'kolom': TA.RiwayatKolom,
+               'sqlite': lambda: TA.RiwayatSQLite(str(tmp_path / "r.db"))}[backend]()
+    calc = TA.WarisanCalculator(history=history)
+    bagian = [kasus(150, seed=s) for s in range(6)]
+    galat = []
+
+    def kerja(daftar):
+        try:
+            for k in daftar:
+                assert calc.compute(*k).baris == calc.hitung(*k).baris
+        except BaseException as e: # Diteruskan ke thread utama
+            galat.append(e)
+
+    threads = [threading.Thread(target=kerja, args=(d,)) for d in bagian]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not galat
+    ids = [e['id'] for e in calc.history]
+    assert len(ids) == 900 and len(set(ids)) == 900 and ids == sorted(ids)
+    tercatat = sorted((e['total'], tuple(e['inputs'][k] for k in TA.INPUT_KEYS)) for e in calc.history)
+    assert tercatat == sorted((k[0], k[1:]) for d in bagian for k in d)
+    calc.close()
+
+
+def test_hitung_paralel_deterministik(kasus):
+    calc = TA.WarisanCalculator()
+    daftar = kasus(400, seed=21)
+    acuan = [TA.WarisanCalculator().hitung(*k).baris for k in daftar]
+    hasil = [None] * 4
+
+    def kerja(n):
+        hasil[n] = [calc.hitung(*k).baris for k in daftar]
+
+    threads = [threading.Thread(target=kerja, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(h == acuan for h in hasil)
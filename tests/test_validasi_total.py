@@ -0,0 +1,38 @@
+import pytest
+
+import TA
+
+TAK_HINGGA = (float("inf"), float("-inf"), float("nan"))
+
+
+def _pemanggil(calc):
+    dasar = {'total': 1000, 'inputs': dict(zip(TA.INPUT_KEYS, (True, True, False, True, 1, 1)))}
+    return {
+        'hitung': lambda t: calc.hitung(t, ayah=True, anak_laki=1),
+        'compute': lambda t: calc.compute(t, ayah=True, anak_laki=1),
+        'compute_batch': lambda t: calc.compute_batch([1000, t], [True, True]),
+        'hitung_varian': lambda t: calc.hitung_varian(dasar, total=t),
+        'sweep_varian': lambda t: list(calc.sweep_varian(dasar, total=[1000, t])),
+    }
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_total_tak_hingga_ditolak_dengan_pesan_sendiri(calc, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(TA, "_import_numpy", lambda: None)
+    for nama, panggil in _pemanggil(calc).items():
+        for total in TAK_HINGGA:
+            with pytest.raises(ValueError, match="terhingga"):
+                panggil(total)
+        for total in (0, -5, -0.5):
+            with pytest.raises(ValueError, match="lebih besar dari 0"):
+                panggil(total)
+    assert len(calc.history) == 0
+
+
+def test_baris_csv_dan_request_layanan_tak_hingga_ditolak():
+    for teks in ("inf", "nan", "-inf"):
+        with pytest.raises(ValueError, match="terhingga"):
+            TA._kasus_csv({'total': teks, 'ayah': "1"})
+        with pytest.raises(ValueError, match="terhingga"):
+            TA._kunci_request({'total': teks, 'ayah': True})
@@ -0,0 +1,42 @@
+import itertools
+
+import TA
+
+PASANGAN = ((False, False), (True, False), (False, True))
+ANAK = (0, 1, 2, 3, 7)
+TOTAL = (1, 97, 1_000_000, 10 ** 15 + 3)
+
+
+def _grid():
+    for (ayah, ibu), (suami, istri), laki, perempuan in itertools.product(
+            itertools.product((False, True), repeat=2), PASANGAN, ANAK, ANAK):
+        yield {'ayah': ayah, 'ibu': ibu, 'suami': suami, 'istri': istri,
+               'anak_laki': laki, 'anak_perempuan': perempuan}
+
+
+def _acuan(total, inputs):
+    return TA.WarisanCalculator().hitung(total, *(inputs[k] for k in TA.INPUT_KEYS))
+
+
+def test_hitung_varian_sama_dengan_compute(calc):
+    acuan = {}
+    for inputs in _grid():
+        dasar = {'total': 1_000_000, 'inputs': inputs}
+        # Ubah satu input (atau total) dari setiap kasus dasar; cache kalkulator dipakai bersama
+        perubahan = [{'total': t} for t in TOTAL]
+        perubahan += [{k: not inputs[k]} for k in ('ayah', 'ibu')]
+        perubahan += [{'suami': s, 'istri': i} for s, i in PASANGAN]
+        perubahan += [{k: n} for k in ('anak_laki', 'anak_perempuan') for n in ANAK]
+        for ubah in perubahan:
+            varian = calc.hitung_varian(dasar, verifikasi=True, **ubah)
+            kunci = (varian['total'], tuple(varian['inputs'][k] for k in TA.INPUT_KEYS))
+            if kunci not in acuan:
+                acuan[kunci] = tuple(_acuan(varian['total'], varian['inputs']).baris)
+            assert tuple(varian['hasil'].baris) == acuan[kunci], (dasar, ubah)
+
+
+def test_sweep_varian_sama_dengan_compute(calc):
+    dasar = {'total': 500, 'inputs': next(_grid())}
+    for varian in calc.sweep_varian(dasar, total=TOTAL, ibu=(False, True), istri=(False, True),
+                                    anak_laki=ANAK, anak_perempuan=ANAK):
+        assert tuple(varian['hasil'].baris) == tuple(_acuan(varian['total'], varian['inputs']).baris)
@@ -0,0 +1,48 @@
+import pytest
+
+import TA
+
+
+@pytest.fixture(params=["memori", "kolom", "sqlite"])
+def calc_backend(request, tmp_path):
+    history = {'memori': TA.RiwayatMemori, 'kolom': TA.RiwayatKolom,
+               'sqlite': lambda: TA.RiwayatSQLite(str(tmp_path / "r.db"))}[request.param]()
+    calc = TA.WarisanCalculator(history=history)
+    yield calc
+    calc.close()
+
+
+def _selisih(history, awal):
+    versi, jumlah = awal
+    return history.versi - versi, len(history) - jumlah
+
+
+def test_versi_membedakan_tambah_di_akhir_dari_perubahan_lain(calc_backend):
+    h = calc_backend.history
+    for total in (1000, 2000, 3000):
+        calc_backend.compute(total, ayah=True)
+
+    awal = (h.versi, len(h))
+    calc_backend.compute(4000, ibu=True)
+    calc_backend.compute(5000, ibu=True)
+    dv, dn = _selisih(h, awal)
+    assert dv == dn == 2
+
+    # Hapus lalu tambah: jumlah tetap, versi berubah
+    awal = (h.versi, len(h))
+    entry = calc_backend.hapus_riwayat(h[0]['id'])
+    calc_backend.compute(6000, ayah=True)
+    dv, dn = _selisih(h, awal)
+    assert dn == 0 and dv != dn
+
+    # Sisip di tengah urutan (ID lama dipakai kembali)
+    awal = (h.versi, len(h))
+    h.append(entry)
+    dv, dn = _selisih(h, awal)
+    assert h[0]['id'] == entry['id'] and dn == 1 and dv != dn
+
+    awal = (h.versi, len(h))
+    calc_backend.reset_history()
+    calc_backend.compute(7000, ayah=True)
+    dv, dn = _selisih(h, awal)
+    assert dv != dn